@@ -0,0 +1,190 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Benchmarks the metric extraction of synthetic resource scans, see README.md
+
+    python3 -m benchmarks [--resource-counts 1000 10000] [--check-baselines | --update-baselines]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from dataclasses import asdict
+from dataclasses import replace
+from multiprocessing.context import SpawnContext
+from typing import Any
+
+from benchmarks.extraction import BenchmarkConfiguration
+from benchmarks.extraction import run_extraction_benchmark
+
+DEFAULT_RESOURCE_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_BASELINES_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "baselines.json")
+
+# Results compared with the baselines, with an absolute slack that absorbs the noise of small values
+GATED_RESULTS = {
+    "WallSeconds": 0.05,
+    "ExtractionRssMb": 4.0,
+    "TracedPeakMb": 1.0,
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    arguments = parse_arguments(argv)
+    configuration = BenchmarkConfiguration(
+        resource_count=0,
+        concurrency=arguments.concurrency,
+        prefetch_depth=arguments.prefetch_depth,
+        page_latency_seconds=arguments.page_latency_ms / 1000,
+    )
+
+    results = run_benchmarks(configuration, arguments.resource_counts, arguments.repeat)
+    print_results(results)
+
+    if arguments.update_baselines:
+        write_baselines(arguments.baselines, configuration, results)
+        return 0
+
+    if arguments.check_baselines:
+        return check_baselines(arguments.baselines, configuration, results, arguments.tolerance)
+
+    return 0
+
+
+def parse_arguments(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks", description=__doc__)
+    parser.add_argument("--resource-counts", type=int, nargs="+", default=DEFAULT_RESOURCE_COUNTS)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per resource count, the fastest is kept")
+    parser.add_argument("--concurrency", type=int, default=1, help="LIST_RESOURCES_CONCURRENCY")
+    parser.add_argument("--prefetch-depth", type=int, default=2, help="PAGE_PREFETCH_DEPTH")
+    parser.add_argument("--page-latency-ms", type=float, default=0.0, help="Simulated latency of every page")
+    parser.add_argument("--baselines", default=DEFAULT_BASELINES_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative regression")
+
+    baselines_group = parser.add_mutually_exclusive_group()
+    baselines_group.add_argument("--check-baselines", action="store_true")
+    baselines_group.add_argument("--update-baselines", action="store_true")
+
+    return parser.parse_args(argv)
+
+
+def run_benchmarks(
+    configuration: BenchmarkConfiguration, resource_counts: list[int], repeat: int
+) -> dict[str, dict[str, Any]]:
+    context = multiprocessing.get_context("spawn")
+    results = {}
+
+    for resource_count in resource_counts:
+        resource_count_configuration = replace(configuration, resource_count=resource_count)
+        runs = [
+            run_in_fresh_interpreter(context, resource_count_configuration) for _ in range(max(repeat, 1))
+        ]
+        result = min(runs, key=lambda run: float(run["WallSeconds"]))
+
+        allocations_run = run_in_fresh_interpreter(
+            context, replace(resource_count_configuration, trace_allocations=True)
+        )
+        result["TracedPeakMb"] = allocations_run["TracedPeakMb"]
+
+        results[str(resource_count)] = result
+
+    return results
+
+
+def run_in_fresh_interpreter(context: SpawnContext, configuration: BenchmarkConfiguration) -> dict[str, Any]:
+    with context.Pool(processes=1) as pool:
+        result: dict[str, Any] = pool.apply(run_extraction_benchmark, (configuration,))
+        return result
+
+
+def print_results(results: dict[str, dict[str, Any]]) -> None:
+    print(
+        f"{'Resources':>10} {'Wall (s)':>9} {'Resources/s':>12} {'Page p50 (ms)':>14} {'Page p95 (ms)':>14} "
+        f"{'Peak RSS (MB)':>14} {'Extraction RSS (MB)':>20} {'Traced peak (MB)':>17}"
+    )
+    for result in results.values():
+        wall_seconds = max(result["WallSeconds"], 1e-9)
+        page_latency = result["PageLatencyMs"]
+        resources_per_second = result["ResourceCount"] / wall_seconds
+        print(
+            f"{result['ResourceCount']:>10} {wall_seconds:>9.3f} {resources_per_second:>12.0f} "
+            f"{page_latency.get('P50', 0):>14.3f} {page_latency.get('P95', 0):>14.3f} "
+            f"{result['PeakRssMb']:>14.1f} {result['ExtractionRssMb']:>20.1f} {result['TracedPeakMb']:>17.2f}"
+        )
+
+
+def write_baselines(
+    baselines_path: str, configuration: BenchmarkConfiguration, results: dict[str, dict[str, Any]]
+) -> None:
+    baselines = {
+        "Configuration": generate_configuration_key(configuration),
+        "Results": {
+            resource_count: {name: result[name] for name in GATED_RESULTS}
+            for resource_count, result in results.items()
+        },
+    }
+    with open(baselines_path, "w", encoding="utf-8") as baselines_file:
+        json.dump(baselines, baselines_file, indent=2)
+        baselines_file.write("\n")
+
+    print(f"Baselines written to {baselines_path}")
+
+
+def check_baselines(
+    baselines_path: str,
+    configuration: BenchmarkConfiguration,
+    results: dict[str, dict[str, Any]],
+    tolerance: float,
+) -> int:
+    """
+    Returns a non-zero exit status when a result regressed by more than `tolerance` from its baseline
+    """
+
+    with open(baselines_path, encoding="utf-8") as baselines_file:
+        baselines = json.load(baselines_file)
+
+    if baselines["Configuration"] != generate_configuration_key(configuration):
+        print(f"Baselines were recorded with another configuration: {baselines['Configuration']}")
+        return 2
+
+    regressions = find_regressions(results, baselines["Results"], tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print(f"{len(regressions)} regressions against {baselines_path}")
+
+    return 1 if regressions else 0
+
+
+def find_regressions(
+    results: dict[str, dict[str, Any]], baseline_results: dict[str, dict[str, float]], tolerance: float
+) -> list[str]:
+    return [
+        f"{resource_count} resources: {name} {result[name]} > {limit:.3f} (baseline {baseline[name]})"
+        for resource_count, result in results.items()
+        for name, baseline, limit in generate_limits(baseline_results.get(resource_count, {}), tolerance)
+        if result[name] > limit
+    ]
+
+
+def generate_limits(
+    baseline: dict[str, float], tolerance: float
+) -> list[tuple[str, dict[str, float], float]]:
+    return [
+        (name, baseline, baseline[name] * (1 + tolerance) + slack)
+        for name, slack in GATED_RESULTS.items()
+        if name in baseline
+    ]
+
+
+def generate_configuration_key(configuration: BenchmarkConfiguration) -> dict[str, Any]:
+    configuration_key = asdict(configuration)
+    for name in ("resource_count", "trace_allocations"):
+        configuration_key.pop(name)
+
+    return configuration_key
+
+
+if __name__ == "__main__":
+    sys.exit(main())
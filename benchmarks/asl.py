@@ -0,0 +1,305 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+In-process interpreter of the subset of the Amazon States Language used by the orchestration
+
+Supports the `Task`, `Choice`, `Wait`, `Pass`, `Succeed` and `Fail` states, with the `InputPath`,
+`Parameters`, `ResultSelector`, `ResultPath` and `OutputPath` fields and JSONPaths of the form `$.a.b`.
+`Wait` states advance a virtual clock instead of sleeping, and `Task` states are run by the task
+integration registered for their `Resource`.
+"""
+
+import copy
+import time
+from collections import Counter
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any, Callable
+
+# Output of a state whose `ResultPath` is `null`, which keeps the input as the output
+DISCARD_RESULT_PATH = None
+
+# A task integration receives the resolved `Parameters` of a `Task` state and returns its result
+type TaskIntegration = Callable[[dict[str, Any]], Any]  # type: ignore[valid-type]
+
+# (operator, rule value, variable value) comparisons of `Choice` rules, the `IsPresent` operator
+# is evaluated separately since it doesn't require the variable to be present
+CHOICE_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "StringEquals": lambda expected, value: isinstance(value, str) and value == expected,
+    "NumericEquals": lambda expected, value: is_number(value) and value == expected,
+    "NumericGreaterThan": lambda expected, value: is_number(value) and value > expected,
+    "NumericGreaterThanEquals": lambda expected, value: is_number(value) and value >= expected,
+    "NumericLessThan": lambda expected, value: is_number(value) and value < expected,
+    "NumericLessThanEquals": lambda expected, value: is_number(value) and value <= expected,
+    "BooleanEquals": lambda expected, value: isinstance(value, bool) and value == expected,
+}
+
+
+class StateMachineFailed(Exception):
+    pass
+
+
+class UnsupportedDefinition(ValueError):
+    """
+    A construct of the definition that the interpreter doesn't simulate
+    """
+
+
+class VirtualClock:
+    """
+    Simulated time of an execution in seconds, advanced by `Wait` states and by the measured duration
+    of the task integrations
+    """
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+
+    def now(self) -> float:
+        return self.seconds
+
+    def advance(self, seconds: float) -> None:
+        self.seconds += max(seconds, 0.0)
+
+
+@dataclass
+class ExecutionStatistics:
+    state_transitions: int = 0
+    waits: int = 0
+    wait_seconds: float = 0.0
+    task_seconds: float = 0.0
+    # Number of times every state was entered
+    states: Counter[str] = field(default_factory=Counter)
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "StateTransitions": self.state_transitions,
+            "Waits": self.waits,
+            "WaitSeconds": round(self.wait_seconds, 3),
+            "TaskSeconds": round(self.task_seconds, 3),
+            "States": dict(self.states),
+        }
+
+
+# pylint: disable=too-few-public-methods
+class StateMachineInterpreter:
+    """
+    Runs a state machine definition against `task_integrations`, keyed by the `Resource` of the `Task`
+    states, and calls `on_state_exit` with the name of every state once it's done
+    """
+
+    def __init__(
+        self,
+        definition: dict[str, Any],
+        task_integrations: dict[str, TaskIntegration],
+        clock: VirtualClock,
+        on_state_exit: Callable[[str], None] = lambda state_name: None,
+    ) -> None:
+        self.definition = definition
+        self.task_integrations = task_integrations
+        self.clock = clock
+        self.on_state_exit = on_state_exit
+        self.statistics = ExecutionStatistics()
+
+        self.state_runners: dict[str, Callable[[dict[str, Any], Any], tuple[Any, str | None]]] = {
+            "Task": self._run_task_state,
+            "Choice": self._run_choice_state,
+            "Wait": self._run_wait_state,
+            "Pass": self._run_pass_state,
+            "Succeed": lambda state, data: (data, None),
+            "Fail": self._run_fail_state,
+        }
+
+    def run(self, execution_input: Any, max_state_transitions: int = 10_000) -> Any:
+        """
+        Returns the output of the execution, raises `StateMachineFailed` when it reaches a `Fail` state
+        """
+
+        state_name: str | None = self.definition["StartAt"]
+        data = execution_input
+        while state_name is not None:
+            if self.statistics.state_transitions >= max_state_transitions:
+                raise StateMachineFailed(f"More than {max_state_transitions} state transitions")
+
+            state = self.definition["States"][state_name]
+            self.statistics.state_transitions += 1
+            self.statistics.states[state_name] += 1
+
+            data, next_state_name = self._run_state(state_name, state, data)
+            self.on_state_exit(state_name)
+            state_name = next_state_name
+
+        return data
+
+    def _run_state(self, state_name: str, state: dict[str, Any], data: Any) -> tuple[Any, str | None]:
+        runner = self.state_runners.get(state["Type"])
+        if runner is None:
+            raise UnsupportedDefinition(
+                f"{state['Type']} state {state_name} isn't supported by the simulator"
+            )
+
+        return runner(state, data)
+
+    def _run_task_state(self, state: dict[str, Any], data: Any) -> tuple[Any, str | None]:
+        task_integration = self.task_integrations.get(state["Resource"])
+        if task_integration is None:
+            raise UnsupportedDefinition(f"Task resource {state['Resource']} isn't supported by the simulator")
+
+        effective_input = read_path(data, state.get("InputPath", "$"))
+        parameters = resolve_parameters(state.get("Parameters"), effective_input)
+
+        start = time.perf_counter()
+        result = task_integration(parameters)
+        task_seconds = time.perf_counter() - start
+        self.statistics.task_seconds += task_seconds
+        self.clock.advance(task_seconds)
+
+        result = resolve_parameters(state.get("ResultSelector"), result)
+        return process_output(state, data, result), get_next_state_name(state)
+
+    def _run_choice_state(self, state: dict[str, Any], data: Any) -> tuple[Any, str | None]:
+        for choice in state.get("Choices", []):
+            if evaluate_choice_rule(choice, data):
+                return data, choice["Next"]
+
+        if "Default" not in state:
+            raise StateMachineFailed("States.NoChoiceMatched")
+
+        return data, state["Default"]
+
+    def _run_wait_state(self, state: dict[str, Any], data: Any) -> tuple[Any, str | None]:
+        wait_seconds = state["Seconds"] if "Seconds" in state else read_path(data, state["SecondsPath"])
+        self.statistics.waits += 1
+        self.statistics.wait_seconds += wait_seconds
+        self.clock.advance(wait_seconds)
+
+        return data, get_next_state_name(state)
+
+    def _run_pass_state(self, state: dict[str, Any], data: Any) -> tuple[Any, str | None]:
+        result = state["Result"] if "Result" in state else read_path(data, state.get("InputPath", "$"))
+        return process_output(state, data, copy.deepcopy(result)), get_next_state_name(state)
+
+    def _run_fail_state(self, state: dict[str, Any], data: Any) -> tuple[Any, str | None]:
+        raise StateMachineFailed(state.get("Error", "States.Fail"))
+
+
+def get_next_state_name(state: dict[str, Any]) -> str | None:
+    return None if state.get("End") else state["Next"]
+
+
+def process_output(state: dict[str, Any], data: Any, result: Any) -> Any:
+    output = write_path(data, state.get("ResultPath", "$"), result)
+    return read_path(output, state.get("OutputPath", "$"))
+
+
+def split_path(path: str) -> list[str]:
+    if path == "$":
+        return []
+    if not path.startswith("$."):
+        raise UnsupportedDefinition(f"JSONPath {path} isn't supported by the simulator")
+
+    return path[2:].split(".")
+
+
+def read_path(data: Any, path: str | None) -> Any:
+    if path is None:
+        return {}
+
+    value = data
+    for key in split_path(path):
+        value = value[key]
+
+    return value
+
+
+def has_path(data: Any, path: str) -> bool:
+    value = data
+    for key in split_path(path):
+        if not isinstance(value, dict) or key not in value:
+            return False
+        value = value[key]
+
+    return True
+
+
+def write_path(data: Any, path: str | None, value: Any) -> Any:
+    if path is DISCARD_RESULT_PATH:
+        return data
+
+    keys = split_path(path)
+    if not keys:
+        return value
+
+    output = copy.deepcopy(data)
+    parent = output
+    for key in keys[:-1]:
+        parent = parent.setdefault(key, {})
+    parent[keys[-1]] = value
+
+    return output
+
+
+def resolve_parameters(parameters: Any, data: Any) -> Any:
+    """
+    Returns `parameters` with the values of the keys ending with `.$` read from `data`,
+    or `data` itself without parameters
+    """
+
+    if parameters is None:
+        return data
+
+    return resolve_parameter_value(parameters, data)
+
+
+def resolve_parameter_value(value: Any, data: Any) -> Any:
+    if isinstance(value, list):
+        return [resolve_parameter_value(item, data) for item in value]
+
+    if not isinstance(value, dict):
+        return value
+
+    return dict(resolve_parameter_field(key, item, data) for key, item in value.items())
+
+
+def resolve_parameter_field(key: str, value: Any, data: Any) -> tuple[str, Any]:
+    if key.endswith(".$"):
+        return key.removesuffix(".$"), read_path(data, value)
+
+    return key, resolve_parameter_value(value, data)
+
+
+def evaluate_choice_rule(rule: dict[str, Any], data: Any) -> bool:
+    for combinator_name, combinator in CHOICE_COMBINATORS.items():
+        if combinator_name in rule:
+            return combinator(rule[combinator_name], data)
+
+    return evaluate_comparison(rule, data)
+
+
+# Rules of `Choice` states combining other rules
+CHOICE_COMBINATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "And": lambda rules, data: all(evaluate_choice_rule(rule, data) for rule in rules),
+    "Or": lambda rules, data: any(evaluate_choice_rule(rule, data) for rule in rules),
+    "Not": lambda rule, data: not evaluate_choice_rule(rule, data),
+}
+
+
+def evaluate_comparison(rule: dict[str, Any], data: Any) -> bool:
+    present = has_path(data, rule["Variable"])
+    if "IsPresent" in rule:
+        is_present: bool = rule["IsPresent"]
+        return present == is_present
+    # Step Functions fails the execution when a comparison reads a missing variable
+    if not present:
+        raise StateMachineFailed("States.Runtime")
+
+    value = read_path(data, rule["Variable"])
+    for operator_name, comparison in CHOICE_OPERATORS.items():
+        if operator_name in rule:
+            return comparison(rule[operator_name], value)
+
+    raise UnsupportedDefinition(f"Choice rule {rule} isn't supported by the simulator")
+
+
+def is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -0,0 +1,123 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import importlib
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any
+
+from benchmarks.fake_cloudformation import FakeCloudFormationClient
+
+RUNTIME_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "service", "runtime"
+)
+
+# Same focus and exclude lists as the default deployment, see cdk_constants.py
+RESOURCE_TYPE_FOCUS_LIST = [
+    "AWS::EC2::Instance",
+    "AWS::Lambda::Function",
+    "AWS::S3::Bucket",
+    "AWS::RDS::DBCluster",
+]
+RESOURCE_TYPE_EXCLUDE_LIST = [
+    "AWS::Logs::LogStream",
+    "AWS::Logs::LogGroup",
+    "AWS::IAM::ManagedPolicy",
+]
+
+RESOURCE_SCAN_ID = "arn:aws:cloudformation:us-east-1:123456789012:resourceScan/benchmark"
+
+BYTES_PER_MB = 1024 * 1024
+# `ru_maxrss` is reported in kilobytes on Linux
+RU_MAXRSS_BYTES = 1024
+
+
+@dataclass
+class BenchmarkConfiguration:
+    resource_count: int
+    concurrency: int = 1
+    prefetch_depth: int = 2
+    page_latency_seconds: float = 0.0
+    trace_allocations: bool = False
+
+
+def run_extraction_benchmark(configuration: BenchmarkConfiguration) -> dict[str, Any]:
+    """
+    Extracts the metrics of a synthetic resource scan with `extract_metrics_from_event`
+
+    Must run in a fresh interpreter, the runtime modules read their configuration when imported
+    and the peak RSS is the one of the whole process.
+    Tracing allocations slows the extraction down, so allocations and time are measured in separate runs.
+    """
+
+    extract_metrics = import_extract_metrics(configuration)
+    cloudformation_client = FakeCloudFormationClient(
+        configuration.resource_count, page_latency_seconds=configuration.page_latency_seconds
+    )
+    event = {"ResourcesScanned": configuration.resource_count}
+    rss_before_bytes = get_peak_rss_bytes()
+
+    if configuration.trace_allocations:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    extraction = extract_metrics.extract_metrics_from_event(
+        event, RESOURCE_SCAN_ID, cloudformation_client, extract_metrics.Extraction()
+    )
+    wall_seconds = time.perf_counter() - start
+
+    result = {
+        "ResourceCount": configuration.resource_count,
+        "ResourcesListed": extraction.resources_listed,
+        "WallSeconds": round(wall_seconds, 4),
+        "ExtractionStatistics": extraction.statistics.to_payload(),
+        "PageLatencyMs": summarize_page_latencies(cloudformation_client.page_latencies),
+        "PeakRssMb": round(get_peak_rss_bytes() / BYTES_PER_MB, 1),
+        "ExtractionRssMb": round((get_peak_rss_bytes() - rss_before_bytes) / BYTES_PER_MB, 1),
+    }
+
+    if configuration.trace_allocations:
+        _, traced_peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["TracedPeakMb"] = round(traced_peak_bytes / BYTES_PER_MB, 2)
+
+    return result
+
+
+def import_extract_metrics(configuration: BenchmarkConfiguration) -> Any:
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ["RESOURCE_TYPE_FOCUS_LIST_JSON"] = json.dumps(RESOURCE_TYPE_FOCUS_LIST)
+    os.environ["RESOURCE_TYPE_EXCLUDE_LIST_JSON"] = json.dumps(RESOURCE_TYPE_EXCLUDE_LIST)
+    os.environ["LIST_RESOURCES_CONCURRENCY"] = str(configuration.concurrency)
+    os.environ["PAGE_PREFETCH_DEPTH"] = str(configuration.prefetch_depth)
+
+    # The runtime modules import each other as top-level modules, like in the Lambda functions
+    if RUNTIME_PATH not in sys.path:
+        sys.path.insert(0, RUNTIME_PATH)
+
+    return importlib.import_module("extract_metrics")
+
+
+def summarize_page_latencies(page_latencies: list[float]) -> dict[str, float]:
+    if not page_latencies:
+        return {}
+
+    quantiles = (
+        statistics.quantiles(page_latencies, n=100) if len(page_latencies) > 1 else page_latencies * 99
+    )
+    return {
+        "Mean": round(statistics.fmean(page_latencies) * 1000, 3),
+        "P50": round(quantiles[49] * 1000, 3),
+        "P95": round(quantiles[94] * 1000, 3),
+        "Max": round(max(page_latencies) * 1000, 3),
+    }
+
+
+def get_peak_rss_bytes() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RU_MAXRSS_BYTES
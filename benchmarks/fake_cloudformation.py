@@ -0,0 +1,151 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import random
+import time
+from array import array
+from typing import Any
+
+# Maximum number of resources returned by a single `ListResourceScanResources` call
+PAGE_SIZE = 100
+
+GENERATION_CHUNK_SIZE = 10_000
+
+# (resource type, weight, ratio of resources managed by a stack) of a synthetic resource scan,
+# loosely modeled after accounts with many log streams, roles and functions
+RESOURCE_TYPE_DISTRIBUTION: list[tuple[str, float, float]] = [
+    ("AWS::Logs::LogStream", 30.0, 0.0),
+    ("AWS::Logs::LogGroup", 8.0, 0.3),
+    ("AWS::IAM::Role", 7.0, 0.6),
+    ("AWS::IAM::ManagedPolicy", 3.0, 0.5),
+    ("AWS::IAM::Policy", 2.0, 0.7),
+    ("AWS::Lambda::Function", 6.0, 0.7),
+    ("AWS::Lambda::Permission", 3.0, 0.8),
+    ("AWS::S3::Bucket", 3.0, 0.5),
+    ("AWS::S3::BucketPolicy", 1.5, 0.6),
+    ("AWS::EC2::Instance", 4.0, 0.3),
+    ("AWS::EC2::SecurityGroup", 4.0, 0.5),
+    ("AWS::EC2::Subnet", 2.0, 0.6),
+    ("AWS::EC2::RouteTable", 1.5, 0.6),
+    ("AWS::EC2::NetworkInterface", 5.0, 0.1),
+    ("AWS::EC2::Volume", 3.0, 0.2),
+    ("AWS::RDS::DBCluster", 0.5, 0.6),
+    ("AWS::RDS::DBInstance", 1.0, 0.5),
+    ("AWS::DynamoDB::Table", 2.0, 0.7),
+    ("AWS::SQS::Queue", 2.0, 0.7),
+    ("AWS::SNS::Topic", 2.0, 0.6),
+    ("AWS::KMS::Key", 1.5, 0.4),
+    ("AWS::CloudWatch::Alarm", 4.0, 0.5),
+    ("AWS::Events::Rule", 2.0, 0.7),
+    ("AWS::StepFunctions::StateMachine", 1.0, 0.8),
+    ("AWS::ECS::TaskDefinition", 2.5, 0.6),
+    ("AWS::ApiGateway::RestApi", 1.0, 0.8),
+]
+
+
+class FakeCloudFormationClient:
+    """
+    Stand-in for the `ListResourceScanResources` and `DescribeResourceScan` calls of a CloudFormation client,
+    serving a deterministic synthetic resource scan of `resource_count` resources
+
+    The resource scan is stored as one byte per resource and scanned resources are only created for the
+    page being listed, so resource scans of millions of resources fit in memory.
+    `page_latency_seconds` simulates the latency of every `ListResourceScanResources` call.
+    """
+
+    def __init__(self, resource_count: int, seed: int = 0, page_latency_seconds: float = 0.0) -> None:
+        self.resource_count = resource_count
+        self.page_latency_seconds = page_latency_seconds
+        self.page_latencies: list[float] = []
+
+        # Synthetic data only, not used for security purposes
+        random_generator = random.Random(seed)  # nosec B311
+        resource_types = [resource_type for resource_type, _, _ in RESOURCE_TYPE_DISTRIBUTION]
+        weights = [weight for _, weight, _ in RESOURCE_TYPE_DISTRIBUTION]
+
+        self.resource_types = resource_types
+        self.resource_type_indexes = array("B")
+        self.managed = bytearray()
+
+        # Generated in chunks, so generating the resource scan doesn't raise the peak RSS of the process
+        # above the one of the extraction being benchmarked
+        for chunk_start in range(0, resource_count, GENERATION_CHUNK_SIZE):
+            chunk_size = min(GENERATION_CHUNK_SIZE, resource_count - chunk_start)
+            resource_type_indexes = random_generator.choices(
+                range(len(resource_types)), weights, k=chunk_size
+            )
+            self.resource_type_indexes.extend(resource_type_indexes)
+            self.managed.extend(
+                random_generator.random() < RESOURCE_TYPE_DISTRIBUTION[resource_type_index][2]
+                for resource_type_index in resource_type_indexes
+            )
+        self.prefix_resource_indexes: dict[str, array[int]] = {}
+
+    def describe_resource_scan(self, ResourceScanId: str) -> dict[str, Any]:  # pylint: disable=invalid-name
+        return {
+            "ResourceScanId": ResourceScanId,
+            "Status": "COMPLETE",
+            "PercentageCompleted": 100.0,
+            "ResourcesScanned": self.resource_count,
+        }
+
+    # pylint: disable=invalid-name,unused-argument
+    def list_resource_scan_resources(
+        self,
+        ResourceScanId: str,
+        ResourceTypePrefix: str = "",
+        NextToken: str = "",
+        MaxResults: int = PAGE_SIZE,
+    ) -> dict[str, Any]:
+        start = time.perf_counter()
+        if self.page_latency_seconds:
+            time.sleep(self.page_latency_seconds)
+
+        resource_indexes = self._get_resource_indexes(ResourceTypePrefix)
+        offset = int(NextToken or 0)
+        next_offset = min(offset + min(MaxResults, PAGE_SIZE), len(resource_indexes))
+
+        response: dict[str, Any] = {
+            "Resources": [
+                self._create_scanned_resource(index) for index in resource_indexes[offset:next_offset]
+            ]
+        }
+        if next_offset < len(resource_indexes):
+            response["NextToken"] = str(next_offset)
+
+        self.page_latencies.append(time.perf_counter() - start)
+        return response
+
+    def _get_resource_indexes(self, resource_type_prefix: str) -> range | array[int]:
+        if not resource_type_prefix:
+            return range(self.resource_count)
+
+        if resource_type_prefix not in self.prefix_resource_indexes:
+            self.prefix_resource_indexes[resource_type_prefix] = self._index_resource_type_prefix(
+                resource_type_prefix
+            )
+
+        return self.prefix_resource_indexes[resource_type_prefix]
+
+    def _index_resource_type_prefix(self, resource_type_prefix: str) -> array[int]:
+        matching_resource_type_indexes = {
+            resource_type_index
+            for resource_type_index, resource_type in enumerate(self.resource_types)
+            if resource_type.startswith(resource_type_prefix)
+        }
+
+        return array(
+            "I",
+            (
+                index
+                for index, resource_type_index in enumerate(self.resource_type_indexes)
+                if resource_type_index in matching_resource_type_indexes
+            ),
+        )
+
+    def _create_scanned_resource(self, index: int) -> dict[str, Any]:
+        return {
+            "ResourceType": self.resource_types[self.resource_type_indexes[index]],
+            "ResourceIdentifier": {"Id": f"resource-{index:08d}"},
+            "ManagedByStack": bool(self.managed[index]),
+        }
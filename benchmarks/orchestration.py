@@ -0,0 +1,546 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Simulates the orchestration of a synthesized template end to end, see README.md
+
+    python3 -m benchmarks.orchestration [--template cdk.out/IacAdoptionMonitor.template.json]
+        [--resource-counts 1000 10000] [--scan-durations-minutes 5 30] [--environment NAME=VALUE ...]
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any, Callable
+
+from benchmarks.asl import StateMachineFailed
+from benchmarks.asl import StateMachineInterpreter
+from benchmarks.asl import UnsupportedDefinition
+from benchmarks.asl import VirtualClock
+from benchmarks.extraction import RESOURCE_SCAN_ID
+from benchmarks.extraction import RUNTIME_PATH
+from benchmarks.fake_cloudformation import FakeCloudFormationClient
+
+DEFAULT_TEMPLATE_PATH = os.path.join("cdk.out", "IacAdoptionMonitor.template.json")
+DEFAULT_RESOURCE_COUNTS = [1_000, 10_000, 100_000]
+DEFAULT_SCAN_DURATIONS_MINUTES = [5.0, 30.0]
+
+ACCOUNT_ID = "123456789012"
+REGION = "us-east-1"
+
+# Values of the pseudo parameters of the template, other references resolve to their logical ID
+PSEUDO_PARAMETERS = {
+    "AWS::AccountId": ACCOUNT_ID,
+    "AWS::Region": REGION,
+    "AWS::Partition": "aws",
+    "AWS::URLSuffix": "amazonaws.com",
+}
+
+LAMBDA_INVOKE_RESOURCE = "arn:aws:states:::lambda:invoke"
+AWS_SDK_RESOURCE_PREFIX = "arn:aws:states:::aws-sdk:"
+
+# Payload key of the publishing summary returned by the Lambda functions that publish the metrics themselves
+PUBLISHING_SUMMARY_PAYLOAD_KEY = "PublishingSummary"
+
+# Timeout of the Lambda functions without a `Timeout` property
+DEFAULT_LAMBDA_TIMEOUT_SECONDS = 3
+
+
+@dataclass
+class SimulationConfiguration:
+    template_path: str
+    resource_count: int
+    scan_duration_seconds: float
+    page_latency_seconds: float = 0.0
+    # Environment variables set in addition to the ones of the Lambda functions of the template
+    environment: dict[str, str] = field(default_factory=dict)
+
+
+class SimulatedCloudFormationClient(FakeCloudFormationClient):
+    """
+    Fake CloudFormation client whose resource scans take `scan_duration_seconds` of virtual time to complete
+
+    The `StartTime` of a resource scan is reported relative to the current wall clock time, so that the
+    elapsed time the Lambda functions derive from it is the virtual time elapsed since the resource scan
+    was started.
+    """
+
+    def __init__(
+        self,
+        resource_count: int,
+        clock: VirtualClock,
+        scan_duration_seconds: float,
+        page_latency_seconds: float,
+    ) -> None:
+        super().__init__(resource_count, page_latency_seconds=page_latency_seconds)
+        self.clock = clock
+        self.scan_duration_seconds = scan_duration_seconds
+        self.scan_started_at: float | None = None
+
+    def start_resource_scan(self, **kwargs: Any) -> dict[str, Any]:  # pylint: disable=unused-argument
+        self.scan_started_at = self.clock.now()
+        return {"ResourceScanId": RESOURCE_SCAN_ID}
+
+    def describe_resource_scan(self, ResourceScanId: str) -> dict[str, Any]:  # pylint: disable=invalid-name
+        elapsed_seconds = self.clock.now() - (self.scan_started_at or 0.0)
+        start_time = datetime.now(timezone.utc) - timedelta(seconds=elapsed_seconds)
+        if elapsed_seconds < self.scan_duration_seconds:
+            return {
+                "ResourceScanId": ResourceScanId,
+                "Status": "IN_PROGRESS",
+                "PercentageCompleted": round(100 * elapsed_seconds / self.scan_duration_seconds, 1),
+                "StartTime": start_time,
+            }
+
+        return {**super().describe_resource_scan(ResourceScanId), "StartTime": start_time}
+
+    def get_paginator(self, operation_name: str) -> "StubPaginator":
+        # No previous resource scan is reused, and no stack is listed when resources are attributed to stacks
+        if operation_name == "list_resource_scans":
+            return StubPaginator([{"ResourceScanSummaries": []}])
+        if operation_name == "describe_stacks":
+            return StubPaginator([{"Stacks": []}])
+
+        raise NotImplementedError(f"{operation_name} isn't supported by the simulator")
+
+
+# pylint: disable=too-few-public-methods
+class StubPaginator:
+    def __init__(self, pages: list[dict[str, Any]]) -> None:
+        self.pages = pages
+
+    def paginate(self, **kwargs: Any) -> list[dict[str, Any]]:  # pylint: disable=unused-argument
+        return self.pages
+
+
+# pylint: disable=too-few-public-methods
+class StubClientMeta:
+    region_name = REGION
+
+
+class StubCloudWatchClient:
+    meta = StubClientMeta()
+
+    def __init__(self) -> None:
+        self.metric_data: list[dict[str, Any]] = []
+
+    def put_metric_data(self, Namespace: str, MetricData: list[dict[str, Any]]) -> dict[str, Any]:
+        # pylint: disable=invalid-name,unused-argument
+        self.metric_data.extend(MetricData)
+        return {}
+
+    def put_dashboard(self, **kwargs: Any) -> dict[str, Any]:  # pylint: disable=unused-argument
+        return {}
+
+
+class StubS3Client:
+    """
+    In-memory bucket of the checkpoints and snapshots of the metric extraction
+    """
+
+    # pylint: disable=too-few-public-methods
+    class exceptions:  # pylint: disable=invalid-name
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+
+    # pylint: disable=invalid-name,unused-argument
+    def put_object(self, Bucket: str, Key: str, Body: bytes) -> dict[str, Any]:
+        self.objects[Key] = Body
+        return {}
+
+    def get_object(self, Bucket: str, Key: str) -> dict[str, Any]:
+        if Key not in self.objects:
+            raise self.exceptions.NoSuchKey(Key)
+
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def delete_object(self, Bucket: str, Key: str) -> dict[str, Any]:
+        self.objects.pop(Key, None)
+        return {}
+
+    def delete_objects(self, Bucket: str, Delete: dict[str, Any]) -> dict[str, Any]:
+        for deleted_object in Delete["Objects"]:
+            self.objects.pop(deleted_object["Key"], None)
+        return {}
+
+
+# pylint: disable=too-few-public-methods
+class StubTaggingClient:
+    """
+    Resource Groups Tagging API client of an account without tagged resources, so every scanned resource
+    counts as untagged when resources are grouped by tag value
+    """
+
+    meta = StubClientMeta()
+
+    def get_paginator(self, operation_name: str) -> StubPaginator:  # pylint: disable=unused-argument
+        return StubPaginator([{"ResourceTagMappingList": []}])
+
+
+class RecordingClient:
+    """
+    Counts the calls of every operation of a stub client, keyed by `<service>:<operation>`
+    """
+
+    def __init__(self, client: Any, service_name: str, api_calls: Counter[str]) -> None:
+        self.client = client
+        self.service_name = service_name
+        self.api_calls = api_calls
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.client, name)
+        if name in ("meta", "exceptions", "get_paginator") or not callable(attribute):
+            return attribute
+
+        def record_call(*args: Any, **kwargs: Any) -> Any:
+            self.api_calls[f"{self.service_name}:{name}"] += 1
+            return attribute(*args, **kwargs)
+
+        return record_call
+
+
+# pylint: disable=too-few-public-methods
+class SimulatedLambdaContext:
+    def __init__(self, function_name: str, timeout_seconds: int) -> None:
+        self.function_name = function_name
+        self.deadline = time.perf_counter() + timeout_seconds
+
+    def get_remaining_time_in_millis(self) -> int:
+        return int((self.deadline - time.perf_counter()) * 1000)
+
+
+@dataclass
+class LambdaFunction:
+    logical_id: str
+    handler: str
+    timeout_seconds: int
+    environment: dict[str, str]
+
+
+# pylint: disable=too-many-instance-attributes
+@dataclass
+class Simulation:
+    """
+    Clients and counters of a simulated execution, shared by the task integrations
+    """
+
+    clock: VirtualClock
+    cloudformation_client: SimulatedCloudFormationClient
+    cloudwatch_client: StubCloudWatchClient = field(default_factory=StubCloudWatchClient)
+    s3_client: StubS3Client = field(default_factory=StubS3Client)
+    tagging_client: StubTaggingClient = field(default_factory=StubTaggingClient)
+    api_calls: Counter[str] = field(default_factory=Counter)
+    lambda_invocations: Counter[str] = field(default_factory=Counter)
+    lambda_seconds: float = 0.0
+    time_to_metric_seconds: float | None = None
+    # Set by a task that published metrics, recorded as the time to metric once the state is done
+    metrics_published: bool = False
+
+    def get_client(self, service_name: str, config: Any = None) -> Any:  # pylint: disable=unused-argument
+        clients = {
+            "cloudformation": self.cloudformation_client,
+            "cloudwatch": self.cloudwatch_client,
+            "s3": self.s3_client,
+            "resourcegroupstaggingapi": self.tagging_client,
+        }
+        if service_name not in clients:
+            raise NotImplementedError(f"{service_name} client isn't supported by the simulator")
+
+        return RecordingClient(clients[service_name], service_name, self.api_calls)
+
+    def record_state_exit(self, state_name: str) -> None:  # pylint: disable=unused-argument
+        if self.metrics_published and self.time_to_metric_seconds is None:
+            self.time_to_metric_seconds = self.clock.now()
+
+
+def run_orchestration_simulation(configuration: SimulationConfiguration) -> dict[str, Any]:
+    """
+    Runs the state machine of the template once, from the start of a resource scan to the published metrics
+
+    Must run in a fresh interpreter, the runtime modules read their configuration when imported.
+    Lambda functions run in process with the environment variables of the template, and the duration
+    of a task is its measured wall time.
+    """
+
+    with open(configuration.template_path, encoding="utf-8") as template_file:
+        template = json.load(template_file)
+
+    definition = load_state_machine_definition(template)
+    lambda_functions = load_lambda_functions(template)
+    configure_runtime(lambda_functions, configuration.environment)
+
+    clock = VirtualClock()
+    simulation = Simulation(
+        clock=clock,
+        cloudformation_client=SimulatedCloudFormationClient(
+            configuration.resource_count,
+            clock,
+            configuration.scan_duration_seconds,
+            configuration.page_latency_seconds,
+        ),
+    )
+    clients: Any = importlib.import_module("clients")
+    clients.get_client = simulation.get_client
+
+    interpreter = StateMachineInterpreter(
+        definition,
+        create_task_integrations(simulation, lambda_functions),
+        clock,
+        on_state_exit=simulation.record_state_exit,
+    )
+
+    status = "SUCCEEDED"
+    try:
+        interpreter.run({})
+    except StateMachineFailed as error:
+        status = f"FAILED ({error})"
+
+    return {
+        "ResourceCount": configuration.resource_count,
+        "ScanDurationSeconds": configuration.scan_duration_seconds,
+        "Status": status,
+        "TimeToMetricSeconds": round_optional(simulation.time_to_metric_seconds),
+        "ExecutionSeconds": round(clock.now(), 3),
+        "LambdaInvocations": dict(simulation.lambda_invocations),
+        "LambdaSeconds": round(simulation.lambda_seconds, 3),
+        "ApiCalls": dict(simulation.api_calls),
+        "MetricsPublished": len(simulation.cloudwatch_client.metric_data),
+        **interpreter.statistics.to_payload(),
+    }
+
+
+def round_optional(value: float | None) -> float | None:
+    return None if value is None else round(value, 3)
+
+
+def load_state_machine_definition(template: dict[str, Any]) -> dict[str, Any]:
+    state_machines = [
+        resource
+        for resource in template["Resources"].values()
+        if resource["Type"] == "AWS::StepFunctions::StateMachine"
+    ]
+    if len(state_machines) != 1:
+        raise ValueError(f"Expected a single state machine in the template, found {len(state_machines)}")
+
+    definition: dict[str, Any] = json.loads(
+        resolve_intrinsic_value(state_machines[0]["Properties"]["DefinitionString"], template)
+    )
+    return definition
+
+
+def load_lambda_functions(template: dict[str, Any]) -> dict[str, LambdaFunction]:
+    """
+    Returns the Lambda functions of the template with a handler in the runtime directory, keyed by the ARN
+    the state machine definition resolves them to
+    """
+
+    return {
+        generate_lambda_function_arn(logical_id): LambdaFunction(
+            logical_id=logical_id,
+            handler=resource["Properties"]["Handler"],
+            timeout_seconds=resource["Properties"].get("Timeout", DEFAULT_LAMBDA_TIMEOUT_SECONDS),
+            environment={
+                name: str(resolve_intrinsic_value(value, template))
+                for name, value in resource["Properties"].get("Environment", {}).get("Variables", {}).items()
+            },
+        )
+        for logical_id, resource in template["Resources"].items()
+        if resource["Type"] == "AWS::Lambda::Function" and is_runtime_handler(resource["Properties"])
+    }
+
+
+def is_runtime_handler(properties: dict[str, Any]) -> bool:
+    module_name = properties.get("Handler", "").rsplit(".", maxsplit=1)[0]
+    return os.path.isfile(os.path.join(RUNTIME_PATH, f"{module_name}.py"))
+
+
+def generate_lambda_function_arn(logical_id: str) -> str:
+    return f"arn:aws:lambda:{REGION}:{ACCOUNT_ID}:function:{logical_id}"
+
+
+def resolve_intrinsic_value(value: Any, template: dict[str, Any]) -> Any:
+    """
+    Resolves the `Ref`, `Fn::GetAtt` and `Fn::Join` intrinsic functions of the template
+    Lambda function ARNs resolve to `generate_lambda_function_arn`, other resources to their logical ID.
+    """
+
+    if not isinstance(value, dict):
+        return value
+
+    for function_name, resolver in INTRINSIC_FUNCTION_RESOLVERS.items():
+        if function_name in value:
+            return resolver(value[function_name], template)
+
+    raise UnsupportedDefinition(f"Intrinsic function {list(value)} isn't supported by the simulator")
+
+
+def resolve_get_att(arguments: list[str], template: dict[str, Any]) -> str:
+    logical_id, attribute = arguments
+    if template["Resources"].get(logical_id, {}).get("Type") == "AWS::Lambda::Function":
+        return generate_lambda_function_arn(logical_id)
+
+    return f"{logical_id}.{attribute}"
+
+
+def resolve_join(arguments: list[Any], template: dict[str, Any]) -> str:
+    delimiter, parts = arguments
+    return str(delimiter).join(str(resolve_intrinsic_value(part, template)) for part in parts)
+
+
+INTRINSIC_FUNCTION_RESOLVERS: dict[str, Callable[[Any, dict[str, Any]], Any]] = {
+    "Ref": lambda logical_id, template: PSEUDO_PARAMETERS.get(logical_id, logical_id),
+    "Fn::GetAtt": resolve_get_att,
+    "Fn::Join": resolve_join,
+}
+
+
+def configure_runtime(lambda_functions: dict[str, LambdaFunction], environment: dict[str, str]) -> None:
+    """
+    Sets the environment variables of every Lambda function before the runtime modules are imported
+
+    The Lambda functions share the runtime modules in a single interpreter, so they share a single
+    environment, which works as long as their common variables have the same values.
+    """
+
+    os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+    for lambda_function in lambda_functions.values():
+        os.environ.update(lambda_function.environment)
+    os.environ.update(environment)
+
+    # The runtime modules import each other as top-level modules, like in the Lambda functions
+    if RUNTIME_PATH not in sys.path:
+        sys.path.insert(0, RUNTIME_PATH)
+
+
+def create_task_integrations(
+    simulation: Simulation, lambda_functions: dict[str, LambdaFunction]
+) -> dict[str, Callable[[dict[str, Any]], Any]]:
+    def invoke_lambda_function(parameters: dict[str, Any]) -> dict[str, Any]:
+        return invoke_simulated_lambda_function(
+            simulation, lambda_functions[parameters["FunctionName"]], parameters.get("Payload", {})
+        )
+
+    def put_metric_data(parameters: dict[str, Any]) -> dict[str, Any]:
+        simulation.metrics_published = True
+        return simulation.get_client("cloudwatch").put_metric_data(**parameters)  # type: ignore
+
+    return {
+        LAMBDA_INVOKE_RESOURCE: invoke_lambda_function,
+        f"{AWS_SDK_RESOURCE_PREFIX}cloudwatch:putMetricData": put_metric_data,
+    }
+
+
+def invoke_simulated_lambda_function(
+    simulation: Simulation, lambda_function: LambdaFunction, payload: Any
+) -> dict[str, Any]:
+    module_name, handler_name = lambda_function.handler.rsplit(".", maxsplit=1)
+    handler = getattr(importlib.import_module(module_name), handler_name)
+    context = SimulatedLambdaContext(lambda_function.logical_id, lambda_function.timeout_seconds)
+
+    start = time.perf_counter()
+    # Metrics published with the Embedded Metric Format are printed to the logs
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = json.loads(json.dumps(handler(payload, context), default=str))
+    simulation.lambda_seconds += time.perf_counter() - start
+    simulation.lambda_invocations[lambda_function.handler] += 1
+
+    if isinstance(result, dict) and PUBLISHING_SUMMARY_PAYLOAD_KEY in result:
+        simulation.metrics_published = True
+
+    return {"ExecutedVersion": "$LATEST", "Payload": result, "StatusCode": 200}
+
+
+def main(argv: list[str] | None = None) -> int:
+    arguments = parse_arguments(argv)
+    if not os.path.isfile(arguments.template):
+        print(f"Template {arguments.template} not found, run cdk synth first", file=sys.stderr)
+        return 1
+
+    results = run_orchestration_simulations(generate_simulation_configurations(arguments))
+    print_results(results)
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    return 0 if all(result["Status"] == "SUCCEEDED" for result in results) else 1
+
+
+def run_orchestration_simulations(configurations: list[SimulationConfiguration]) -> list[dict[str, Any]]:
+    context = multiprocessing.get_context("spawn")
+
+    results = []
+    for configuration in configurations:
+        with context.Pool(processes=1) as pool:
+            results.append(pool.apply(run_orchestration_simulation, (configuration,)))
+
+    return results
+
+
+def generate_simulation_configurations(arguments: argparse.Namespace) -> list[SimulationConfiguration]:
+    environment = dict(assignment.split("=", maxsplit=1) for assignment in arguments.environment)
+    return [
+        SimulationConfiguration(
+            template_path=arguments.template,
+            resource_count=resource_count,
+            scan_duration_seconds=scan_duration_minutes * 60,
+            page_latency_seconds=arguments.page_latency_ms / 1000,
+            environment=environment,
+        )
+        for scan_duration_minutes in arguments.scan_durations_minutes
+        for resource_count in arguments.resource_counts
+    ]
+
+
+def parse_arguments(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks.orchestration", description=__doc__)
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE_PATH, help="Template synthesized by cdk synth")
+    parser.add_argument("--resource-counts", type=int, nargs="+", default=DEFAULT_RESOURCE_COUNTS)
+    parser.add_argument(
+        "--scan-durations-minutes", type=float, nargs="+", default=DEFAULT_SCAN_DURATIONS_MINUTES
+    )
+    parser.add_argument("--page-latency-ms", type=float, default=0.0, help="Simulated latency of every page")
+    parser.add_argument(
+        "--environment",
+        nargs="*",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Overrides an environment variable of the Lambda functions, such as LIST_RESOURCES_CONCURRENCY",
+    )
+    parser.add_argument("--output", help="Writes the results of every run to this JSON file")
+
+    return parser.parse_args(argv)
+
+
+def print_results(results: list[dict[str, Any]]) -> None:
+    print(
+        f"{'Resources':>10} {'Scan (s)':>9} {'Time to metric (s)':>19} {'Invocations':>12} "
+        f"{'Transitions':>12} {'Waits':>6} {'API calls':>10} {'Lambda (s)':>11}  Status"
+    )
+    for result in results:
+        time_to_metric = result["TimeToMetricSeconds"]
+        print(
+            f"{result['ResourceCount']:>10} {result['ScanDurationSeconds']:>9.0f} "
+            f"{'-' if time_to_metric is None else f'{time_to_metric:.1f}':>19} "
+            f"{sum(result['LambdaInvocations'].values()):>12} {result['StateTransitions']:>12} "
+            f"{result['Waits']:>6} {sum(result['ApiCalls'].values()):>10} "
+            f"{result['LambdaSeconds']:>11.3f}  {result['Status']}"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
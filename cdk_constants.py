@@ -29,3 +29,132 @@ RESOURCE_TYPE_EXCLUDE_LIST = [
 RESOURCE_TYPE_DELIMETER = "::"
 
 CLOUDWATCH_METRICS_NAMESPACE = "IacAdoption"
+
+# How the extracted metrics are published to CloudWatch, "LAMBDA" publishes them from the Lambda functions
+# with batched PutMetricData requests that fit the CloudWatch request limits, "EMF" writes them to the logs of
+# the Lambda functions in Embedded Metric Format, "STATE_MACHINE" publishes them from the state machine
+# with a single PutMetricData request
+METRICS_PUBLISHING_MODE = "LAMBDA"
+
+# Configuration of the AWS SDK clients of the Lambda functions. The "adaptive" retry mode retries throttled
+# requests and slows down the request rate of a client. The connection pool of the CloudFormation client
+# of the metric extraction is never smaller than LIST_RESOURCES_CONCURRENCY
+CLIENT_RETRY_MODE = "adaptive"
+CLIENT_MAX_ATTEMPTS = 10
+CLIENT_MAX_POOL_CONNECTIONS = 10
+CLIENT_CONNECT_TIMEOUT_SECONDS = 5
+CLIENT_READ_TIMEOUT_SECONDS = 60
+CLIENT_TCP_KEEPALIVE = True
+
+# Number of resource type prefix slices of a resource scan listed concurrently by the metric extraction,
+# a value of 1 lists the entire resource scan sequentially
+LIST_RESOURCES_CONCURRENCY = 1
+
+# Number of resource scan pages listed ahead of the page being classified by the metric extraction,
+# a value of 0 disables prefetching
+PAGE_PREFETCH_DEPTH = 2
+
+# Number of seconds before the metric extraction Lambda function times out at which it stops listing the
+# resource scan, saves its progress to the scan data bucket and is invoked again by the state machine
+# to resume from the saved pagination tokens, so resource scans of any size are extracted in invocations
+# of bounded duration. A value of 0 disables checkpoints, the metric extraction then fails when it times out
+EXTRACTION_CHECKPOINT_MARGIN_SECONDS = 120
+
+# Compare every resource scan with a snapshot of the previous one, stored in the scan data bucket,
+# to extract drift metrics such as the number of resources that became unmanaged
+SCAN_SNAPSHOTS_ENABLED = False
+
+# Export the scanned resources of every full resource scan to the scan data bucket as gzip-compressed
+# newline-delimited JSON, partitioned by account, region and date, and create an AWS Glue table to query them
+# with Amazon Athena
+RESOURCE_EXPORT_ENABLED = False
+
+# Extract total and managed metrics for every resource type found by the resource scans, not only the focused
+# resource types, and keep a dashboard of the RESOURCE_TYPES_DASHBOARD_SIZE resource types with the most
+# unmanaged resources up to date. Every resource type adds 2 custom metrics per monitored account and region,
+# which can't be published from the state machine with a single PutMetricData request
+ALL_RESOURCE_TYPES_ENABLED = False
+RESOURCE_TYPES_DASHBOARD_SIZE = 12
+
+# Publish the total and managed resources of every service and resource type found by the full resource scans
+# as the TotalResources and ManagedResources metrics with the additional Service and ResourceType dimensions,
+# which CloudWatch SEARCH expressions can slice without a metric per resource type in the dashboard.
+# Every service and resource type adds 2 custom metrics per monitored account and region
+HIERARCHICAL_METRICS_ENABLED = False
+
+# How the dashboard charts the resource types, "STATIC" creates a panel of metric queries and math expressions
+# per focused resource type, "SEARCH" charts the precomputed ManagedPercent metric of every service and
+# resource type found by the full resource scans with a single SEARCH expression each, so the dashboard
+# doesn't need a redeploy when the focused resource types change. "SEARCH" requires
+# HIERARCHICAL_METRICS_ENABLED, and the ManagedPercent metric adds 1 custom metric per service and resource
+# type. The dashboard is split into pages automatically
+DASHBOARD_MODE = "STATIC"
+
+# Attribute the managed resources of every full resource scan to the root stack and the IaC tool (CDK, SAM or
+# CloudFormation) that deployed them, published as the ManagedResources metric with the additional Stack or
+# IaCTool dimension. Only the STACK_ATTRIBUTION_TOP_STACKS stacks with the most managed resources get a metric
+# of their own, the other stacks are combined under "(Other)", so the number of metrics doesn't grow with the
+# number of stacks. The resources of every stack are listed with ListStackResources before the resource scan
+STACK_ATTRIBUTION_ENABLED = False
+STACK_ATTRIBUTION_TOP_STACKS = 10
+
+# Tag keys, for example "team" or "cost-center", whose values group the total and managed resources of every
+# full resource scan, published as the TotalResources and ManagedResources metrics with the additional TagKey
+# and TagValue dimensions. Only the TAG_GROUPING_TOP_VALUES values of every tag key with the most resources
+# get a metric of their own, the other values are combined under "(Other)" and the resources without the tag
+# key under "(Untagged)", so the number of metrics doesn't grow with the number of tag values. The tags of
+# the resources are listed with the Resource Groups Tagging API before the resource scan
+TAG_GROUPING_KEYS: list[str] = []
+TAG_GROUPING_TOP_VALUES = 10
+
+# Append the total and managed resources of every resource type of every full resource scan to a compact
+# columnar history in a history bucket that is retained when the stack is deleted, one object per account,
+# region and year, which the query API of service/runtime/history.py answers rolling averages, week-over-week
+# changes and the most regressed resource types from without querying CloudWatch
+HISTORY_ENABLED = False
+
+# Count the resources of global resource types once per monitored account in the organization metrics of the
+# fan-out orchestration, as the TotalUniqueResources and ManagedUniqueResources metrics, although the resource
+# scan of every monitored region lists them. The resource types are matched by the prefixes of
+# GLOBAL_RESOURCE_TYPE_PREFIXES. Up to GLOBAL_RESOURCES_MAX_EXACT_KEYS distinct global resources per monitored
+# account and region, and across the organization, are counted exactly with 8 bytes each, beyond that they're
+# estimated with HyperLogLog sketches of 16 KiB with a relative standard error of about 0.8%, published as the
+# UniqueResourcesStandardError metric. The exact keys of every monitored account and region are returned
+# to the state machine, whose payloads are limited to 256 KiB
+GLOBAL_RESOURCE_DEDUPLICATION_ENABLED = False
+GLOBAL_RESOURCE_TYPE_PREFIXES = [
+    "AWS::IAM::",
+    "AWS::CloudFront::",
+    "AWS::Route53::",
+    "AWS::Organizations::",
+]
+GLOBAL_RESOURCES_MAX_EXACT_KEYS = 4096
+
+# Schedule expression of partial resource scans that only scan the focused resource types and only refresh
+# their metrics, for example "rate(1 hour)", keep in mind the IaC Generator quotas on the number of
+# resource scans per day. None disables partial resource scans
+PARTIAL_SCAN_SCHEDULE_EXPRESSION: str | None = None
+
+# A COMPLETE full resource scan started within this number of minutes, for example by another team or tool,
+# is reused instead of starting a new resource scan, which skips waiting for the resource scan to complete.
+# A value of 0 always starts a new resource scan
+REUSE_RESOURCE_SCAN_MAX_AGE_MINUTES = 0
+
+# Accounts monitored by a single deployment through a fan-out orchestration, which assumes TARGET_ROLE_NAME
+# in every account and runs the resource scan of every monitored account and region concurrently.
+# An empty list only monitors the account and region the solution is deployed to
+MONITORED_ACCOUNT_IDS: list[str] = []
+
+# Regions monitored in every monitored account, an empty list only monitors the region the solution
+# is deployed to
+MONITORED_REGIONS: list[str] = []
+
+# Name of the IAM role assumed in every monitored account, which must be deployed to the monitored accounts,
+# for example with CloudFormation StackSets, and trust the account the solution is deployed to
+TARGET_ROLE_NAME = "IacAdoptionMonitorTargetRole"
+
+# Maximum number of monitored accounts and regions scanned concurrently by the fan-out orchestration
+FAN_OUT_MAX_CONCURRENCY = 40
+
+# Percentage of monitored accounts and regions that may fail without failing the fan-out orchestration
+FAN_OUT_TOLERATED_FAILURE_PERCENTAGE = 10
@@ -14,4 +14,6 @@ python3 -m pip install -r service/runtime/requirements.txt -r requirements.txt -
 
 # Install runtime dependencies for lambda layer creation
 rm -rf service/runtime/python_packages
-python3 -m pip install -r service/runtime/requirements.txt --target service/runtime/python_packages/python/
\ No newline at end of file
+python3 -m pip install -r service/runtime/requirements.txt --target service/runtime/python_packages/python/
+# Report the import time of the Lambda function handlers, which is part of every cold start
+./scripts/profile-imports.sh
@@ -0,0 +1,37 @@
+#!/bin/bash
+
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Reports how long importing every Lambda function handler takes with the packages of the Lambda layer,
+# which is the part of a cold start the handlers control, and the slowest imports of every handler
+
+set -o errexit
+set -o pipefail
+
+RUNTIME_PATH=service/runtime
+LAYER_PACKAGES_PATH=service/runtime/python_packages/python
+HANDLERS=(start_scan describe_scan extract_metrics rollup_metrics)
+SLOWEST_IMPORTS=${SLOWEST_IMPORTS:-10}
+
+for handler in "${HANDLERS[@]}"; do
+    # `-X importtime` reports the self and cumulative microseconds of every import on stderr
+    if ! import_output=$(
+        PYTHONPATH="${LAYER_PACKAGES_PATH}:${RUNTIME_PATH}" PYTHONDONTWRITEBYTECODE=1 \
+            python3 -X importtime -c "import ${handler}" 2>&1 >/dev/null
+    ); then
+        # Import times of a failed import would be reported as the import time of the handler
+        echo "Importing ${handler} failed:" >&2
+        echo "${import_output}" | grep -v "^import time:" >&2
+        exit 1
+    fi
+    import_times=$(echo "${import_output}" | grep "^import time:" | tail -n +2)
+
+    total_us=$(echo "${import_times}" | grep -E "\| ${handler}$" | awk -F '|' '{ gsub(/ /, "", $2); print $2 }')
+    echo "${handler}: $((total_us / 1000)) ms"
+
+    echo "${import_times}" |
+        sort --field-separator '|' --key 2 --numeric-sort --reverse |
+        awk -F '|' -v limit="${SLOWEST_IMPORTS}" \
+            'NR <= limit { gsub(/ /, "", $2); printf "    %8.1f ms %s\n", $2 / 1000, $3 }'
+done
@@ -0,0 +1,11 @@
+#!/bin/bash
+
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+set -o errexit
+set -o verbose
+
+# Benchmark the metric extraction and fail when it regressed from the stored baselines (benchmarks/baselines.json)
+# Record new baselines on the machine running this script with: python3 -m benchmarks --update-baselines
+python3 -m benchmarks --check-baselines "$@"
@@ -6,7 +6,7 @@
 set -o errexit
 set -o verbose
 
-targets=(service cdk_constants.py app.py)
+targets=(service benchmarks cdk_constants.py app.py)
 
 # Find common security issues (https://bandit.readthedocs.io)
 bandit --ini .bandit --recursive "${targets[@]}"
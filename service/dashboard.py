@@ -1,13 +1,17 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
-from typing import Any
+import itertools
+from typing import Any, Sequence
 
 import aws_cdk as cdk
 from aws_cdk import aws_cloudwatch as cloudwatch
 from constructs import Construct
 
 import cdk_constants as constants
+from service.runtime.constants import DashboardModes
+from service.runtime.metrics import MANAGED_PERCENT_METRIC_NAME
+from service.runtime.metrics import get_resource_type
 
 DEFAULT_DASHBOARD_INTERVAL = cdk.Duration.days(7)
 DEFAULT_PERIOD = cdk.Duration.days(1)
@@ -18,34 +22,75 @@ DIMENSIONS_MAP = dimensions_map = {
 }
 
 DASHBOARD_NAME = "iac-adoption"
+# Dashboard of the resource types with the most unmanaged resources. The resource types are only known once
+# resources were scanned, so the dashboard isn't part of the stack: the metric extraction creates it and
+# replaces its widgets after every full resource scan, which a stack resource would drift from.
+RESOURCE_TYPES_DASHBOARD_NAME = "iac-adoption-resource-types"
 
 TOTAL = "total"
 MANAGED = "managed"
 MATH_EXPRESSION_PERCENTAGE = f"IF(total==0,100,100*({MANAGED}/{TOTAL}))"
 
+SERVICE_DIMENSION_NAMES = ("Service",)
+RESOURCE_TYPE_DIMENSION_NAMES = ("Service", "ResourceType")
+
 SUMMARY_PANEL_WIDTH = 16
 SUMMARY_PANEL_WIDGET_HEIGHT = 6
 
 RESOURCE_PANEL_WIDTH = 4
 RESOURCE_PANEL_WIDGET_HEIGHT = 5
 
+DASHBOARD_WIDTH = 24
+RESOURCE_PANELS_PER_ROW = DASHBOARD_WIDTH // RESOURCE_PANEL_WIDTH
+
+# The dashboard is split into pages well below the CloudWatch quotas of 500 widgets and 2500 metrics
+# per dashboard, since dashboards with many widgets load slowly. Every page but the first is named
+# `<DASHBOARD_NAME>-<page number>`
+MAX_WIDGETS_PER_PAGE = 100
+MAX_METRICS_PER_PAGE = 500
+
 
 class Dashboard(Construct):
     def __init__(self, scope: Construct, _id: str, **kwargs: Any) -> None:
         super().__init__(scope, _id, **kwargs)
 
-        self.dashboard = cloudwatch.Dashboard(
+        validate_dashboard_mode()
+
+        rows = [Dashboard._create_summary_panel_row()]
+        if constants.DASHBOARD_MODE == DashboardModes.SEARCH:
+            rows.append(Dashboard._create_resource_type_search_row())
+        else:
+            rows.extend(Dashboard._create_resource_panels_rows())
+
+        if constants.HIERARCHICAL_METRICS_ENABLED:
+            rows.append(Dashboard._create_service_panel_row())
+
+        pages = paginate_rows(rows)
+        self.dashboards = [
+            self._create_dashboard_page(page_number, page_rows, len(pages))
+            for page_number, page_rows in enumerate(pages, start=1)
+        ]
+        self.dashboard = self.dashboards[0]
+
+    def _create_dashboard_page(
+        self, page_number: int, rows: list[cloudwatch.Row], page_count: int
+    ) -> cloudwatch.Dashboard:
+        # The first page keeps the construct ID of the dashboard, so it isn't replaced when pages are added
+        dashboard = cloudwatch.Dashboard(
             self,
-            "Dashboard",
-            dashboard_name=DASHBOARD_NAME,
+            "Dashboard" if page_number == 1 else f"Dashboard{page_number}",
+            dashboard_name=generate_dashboard_page_name(page_number),
             default_interval=DEFAULT_DASHBOARD_INTERVAL,
             period_override=cloudwatch.PeriodOverride.AUTO,
         )
 
-        summary_panel = Dashboard._create_summary_panel_row()
-        resource_panels = Dashboard._create_resource_panels_row()
+        if page_count > 1:
+            dashboard.add_widgets(create_page_navigation_widget(page_number, page_count))
 
-        self.dashboard.add_widgets(summary_panel, resource_panels)  # type: ignore
+        for row in rows:
+            dashboard.add_widgets(row)  # type: ignore
+
+        return dashboard
 
     @staticmethod
     def _create_summary_panel_row() -> cloudwatch.Row:
@@ -74,15 +119,7 @@ class Dashboard(Construct):
             dimensions_map=DIMENSIONS_MAP,
         )
 
-        percentage_math_expression = cloudwatch.MathExpression(
-            expression=MATH_EXPRESSION_PERCENTAGE,
-            label="Managed resources (%)",
-            period=DEFAULT_PERIOD,
-            using_metrics={
-                TOTAL: total_metric,
-                MANAGED: managed_metric,
-            },
-        )
+        percentage_math_expression = Dashboard._create_summary_percentage_metric(total_metric, managed_metric)
 
         gauge = cloudwatch.GaugeWidget(
             title="",
@@ -136,23 +173,146 @@ class Dashboard(Construct):
         return row
 
     @staticmethod
-    def _create_resource_panels_row() -> cloudwatch.Row:
+    def _create_summary_percentage_metric(
+        total_metric: cloudwatch.Metric, managed_metric: cloudwatch.Metric
+    ) -> cloudwatch.IMetric:
+        # The SEARCH dashboard charts the precomputed percentage
+        if constants.DASHBOARD_MODE == DashboardModes.SEARCH:
+            return cloudwatch.Metric(
+                namespace=constants.CLOUDWATCH_METRICS_NAMESPACE,
+                metric_name=MANAGED_PERCENT_METRIC_NAME,
+                statistic="Max",
+                label="Managed resources (%)",
+                period=DEFAULT_PERIOD,
+                dimensions_map=DIMENSIONS_MAP,
+            )
+
+        return cloudwatch.MathExpression(
+            expression=MATH_EXPRESSION_PERCENTAGE,
+            label="Managed resources (%)",
+            period=DEFAULT_PERIOD,
+            using_metrics={
+                TOTAL: total_metric,
+                MANAGED: managed_metric,
+            },
+        )
+
+    @staticmethod
+    def _create_service_panel_row() -> cloudwatch.Row:
+        header = cloudwatch.TextWidget(
+            markdown="## AWS resources by service",
+            height=1,
+            width=SUMMARY_PANEL_WIDTH,
+            background=cloudwatch.TextWidgetBackground.TRANSPARENT,
+        )
+
+        # A single SEARCH expression per metric covers every service found by the resource scans
+        total_search_expression = cloudwatch.MathExpression(
+            expression=generate_search_expression("TotalResources", SERVICE_DIMENSION_NAMES),
+            label="Total",
+            period=DEFAULT_PERIOD,
+            using_metrics={},
+        )
+
+        managed_search_expression = cloudwatch.MathExpression(
+            expression=generate_search_expression("ManagedResources", SERVICE_DIMENSION_NAMES),
+            label="Managed",
+            period=DEFAULT_PERIOD,
+            using_metrics={},
+        )
+
+        total_bars = cloudwatch.GraphWidget(
+            title="Total resources by service",
+            width=SUMMARY_PANEL_WIDTH / 2,
+            height=SUMMARY_PANEL_WIDGET_HEIGHT,
+            left=[total_search_expression],
+            view=cloudwatch.GraphWidgetView.BAR,
+            period=DEFAULT_PERIOD,
+            legend_position=cloudwatch.LegendPosition.RIGHT,
+        )
+
+        managed_bars = cloudwatch.GraphWidget(
+            title="Managed resources by service",
+            width=SUMMARY_PANEL_WIDTH / 2,
+            height=SUMMARY_PANEL_WIDGET_HEIGHT,
+            left=[managed_search_expression],
+            view=cloudwatch.GraphWidgetView.BAR,
+            period=DEFAULT_PERIOD,
+            legend_position=cloudwatch.LegendPosition.RIGHT,
+        )
+
+        column = cloudwatch.Column(header, cloudwatch.Row(total_bars, managed_bars))  # type: ignore
+
+        row = cloudwatch.Row(column)  # type: ignore
+        return row
+
+    @staticmethod
+    def _create_resource_type_search_row() -> cloudwatch.Row:
+        header = cloudwatch.TextWidget(
+            markdown="## Managed AWS resources (%)",
+            height=1,
+            width=SUMMARY_PANEL_WIDTH,
+            background=cloudwatch.TextWidgetBackground.TRANSPARENT,
+        )
+
+        # A single SEARCH expression covers every service or resource type found by the resource scans,
+        # so the dashboard doesn't change with the focused resource types
+        service_bars = Dashboard._create_managed_percent_search_widget(
+            "Managed resources (%) by service", SERVICE_DIMENSION_NAMES
+        )
+        resource_type_bars = Dashboard._create_managed_percent_search_widget(
+            "Managed resources (%) by resource type", RESOURCE_TYPE_DIMENSION_NAMES
+        )
+
+        column = cloudwatch.Column(header, cloudwatch.Row(service_bars, resource_type_bars))  # type: ignore
+
+        row = cloudwatch.Row(column)  # type: ignore
+        return row
+
+    @staticmethod
+    def _create_managed_percent_search_widget(
+        title: str, dimension_names: Sequence[str]
+    ) -> cloudwatch.GraphWidget:
+        search_expression = cloudwatch.MathExpression(
+            expression=generate_search_expression(MANAGED_PERCENT_METRIC_NAME, dimension_names),
+            label="Managed (%)",
+            period=DEFAULT_PERIOD,
+            using_metrics={},
+        )
+
+        return cloudwatch.GraphWidget(
+            title=title,
+            width=SUMMARY_PANEL_WIDTH / 2,
+            height=SUMMARY_PANEL_WIDGET_HEIGHT,
+            left=[search_expression],
+            left_y_axis=cloudwatch.YAxisProps(show_units=False, min=0, max=100),
+            view=cloudwatch.GraphWidgetView.BAR,
+            period=DEFAULT_PERIOD,
+            legend_position=cloudwatch.LegendPosition.RIGHT,
+        )
+
+    @staticmethod
+    def _create_resource_panels_rows() -> list[cloudwatch.Row]:
         resource_panel_columns = list(
             map(
                 Dashboard._create_resource_panel,
                 constants.RESOURCE_TYPE_FOCUS_LIST,
             )
         )
-        row = cloudwatch.Row(*resource_panel_columns)  # type: ignore
-        return row
+        # Rows of a single line of panels, so the panels can be split into pages
+        return [
+            cloudwatch.Row(*columns)  # type: ignore
+            for columns in itertools.batched(resource_panel_columns, RESOURCE_PANELS_PER_ROW)
+        ]
 
     @staticmethod
     def _create_resource_panel(resource_type: str) -> cloudwatch.Column:
-        _, service, resource = resource_type.split(constants.RESOURCE_TYPE_DELIMETER)
+        parsed_resource_type = get_resource_type(resource_type)
+        service, resource = parsed_resource_type.service, parsed_resource_type.resource
 
         total_metric = cloudwatch.Metric(
             namespace=constants.CLOUDWATCH_METRICS_NAMESPACE,
-            metric_name=f"Total{service}{resource}s",
+            metric_name=parsed_resource_type.total_metric_name,
             statistic="Max",
             label=f"Total {service} {resource}s",
             period=DEFAULT_PERIOD,
@@ -161,7 +321,7 @@ class Dashboard(Construct):
 
         managed_metric = cloudwatch.Metric(
             namespace=constants.CLOUDWATCH_METRICS_NAMESPACE,
-            metric_name=f"Managed{service}{resource}s",
+            metric_name=parsed_resource_type.managed_metric_name,
             statistic="Max",
             label=f"Managed {service} {resource}s",
             period=DEFAULT_PERIOD,
@@ -207,3 +367,74 @@ class Dashboard(Construct):
 
         column = cloudwatch.Column(header, gauge, bars)
         return column
+
+
+def generate_search_expression(metric_name: str, dimension_names: Sequence[str]) -> str:
+    # A dimension set such as `{AccountID, Region, Service}` only matches a single level of the hierarchy
+    schema = ",".join([constants.CLOUDWATCH_METRICS_NAMESPACE, "AccountID", "Region", *dimension_names])
+    search = (
+        f'{{{schema}}} MetricName="{metric_name}" '
+        f'AccountID="{DIMENSIONS_MAP["AccountID"]}" Region="{DIMENSIONS_MAP["Region"]}"'
+    )
+    return f"SEARCH('{search}', 'Maximum', {int(DEFAULT_PERIOD.to_seconds())})"
+
+
+def validate_dashboard_mode() -> None:
+    if constants.DASHBOARD_MODE not in (DashboardModes.STATIC, DashboardModes.SEARCH):
+        raise ValueError(f"Unknown DASHBOARD_MODE: {constants.DASHBOARD_MODE}")
+
+    # The SEARCH expressions chart the metrics of every service and resource type
+    if constants.DASHBOARD_MODE == DashboardModes.SEARCH and not constants.HIERARCHICAL_METRICS_ENABLED:
+        raise ValueError("The SEARCH dashboard mode requires HIERARCHICAL_METRICS_ENABLED")
+
+
+def paginate_rows(rows: list[cloudwatch.Row]) -> list[list[cloudwatch.Row]]:
+    """
+    Splits the rows of the dashboard into pages of at most `MAX_WIDGETS_PER_PAGE` widgets and
+    `MAX_METRICS_PER_PAGE` metrics, keeping the order of the rows. A row is never split, and the page
+    navigation widget of every page is accounted for.
+    """
+
+    pages: list[list[cloudwatch.Row]] = [[]]
+    widgets, metrics = 1, 0
+    for row in rows:
+        row_widgets, row_metrics = count_widgets_and_metrics(row)
+        if pages[-1] and (
+            widgets + row_widgets > MAX_WIDGETS_PER_PAGE or metrics + row_metrics > MAX_METRICS_PER_PAGE
+        ):
+            pages.append([])
+            widgets, metrics = 1, 0
+
+        pages[-1].append(row)
+        widgets += row_widgets
+        metrics += row_metrics
+
+    return pages
+
+
+def count_widgets_and_metrics(row: cloudwatch.Row) -> tuple[int, int]:
+    rendered_widgets = row.to_json()
+    metrics = sum(len(widget.get("properties", {}).get("metrics", [])) for widget in rendered_widgets)
+    return len(rendered_widgets), metrics
+
+
+def generate_dashboard_page_name(page_number: int) -> str:
+    return DASHBOARD_NAME if page_number == 1 else f"{DASHBOARD_NAME}-{page_number}"
+
+
+def create_page_navigation_widget(page_number: int, page_count: int) -> cloudwatch.TextWidget:
+    links = [
+        (
+            f"**Page {number}**"
+            if number == page_number
+            else f"[button:Page {number}](#dashboards:name={generate_dashboard_page_name(number)})"
+        )
+        for number in range(1, page_count + 1)
+    ]
+
+    return cloudwatch.TextWidget(
+        markdown=" ".join(links),
+        height=1,
+        width=DASHBOARD_WIDTH,
+        background=cloudwatch.TextWidgetBackground.TRANSPARENT,
+    )
@@ -8,10 +8,15 @@ from typing import Any
 import aws_cdk as cdk
 from aws_cdk import aws_iam as iam
 from aws_cdk import aws_lambda as _lambda
+from aws_cdk import aws_s3 as s3
 from constructs import Construct
 
 import cdk_constants as constants
+from service.dashboard import RESOURCE_TYPES_DASHBOARD_NAME
+from service.runtime.constants import CHECKPOINTS_PREFIX
+from service.runtime.constants import DashboardModes
 from service.runtime.constants import EnvVarsNames
+from service.runtime.constants import MetricsPublishingModes
 
 RUNTIME_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "runtime")
 LAMBDA_FUNCTION_CODE_ASSET = _lambda.Code.from_asset(RUNTIME_PATH)
@@ -22,10 +27,94 @@ PYTHON_REQUIREMENTS_LAYER_CODE_ASSET = _lambda.Code.from_asset(PYTHON_REQUIREMEN
 EXTRACT_METRICS_LAMBDA_FUNCTION_HANDLER = "extract_metrics.lambda_handler"
 
 
+def generate_target_role_arn(account_id: str) -> str:
+    return f"arn:{cdk.Aws.PARTITION}:iam::{account_id}:role/{constants.TARGET_ROLE_NAME}"
+
+
+def generate_client_environment() -> dict[str, str]:
+    """
+    Environment variables of the AWS SDK client configuration shared by every Lambda function
+    """
+
+    return {
+        EnvVarsNames.CLIENT_RETRY_MODE: constants.CLIENT_RETRY_MODE,
+        EnvVarsNames.CLIENT_MAX_ATTEMPTS: str(constants.CLIENT_MAX_ATTEMPTS),
+        EnvVarsNames.CLIENT_MAX_POOL_CONNECTIONS: str(constants.CLIENT_MAX_POOL_CONNECTIONS),
+        EnvVarsNames.CLIENT_CONNECT_TIMEOUT_SECONDS: str(constants.CLIENT_CONNECT_TIMEOUT_SECONDS),
+        EnvVarsNames.CLIENT_READ_TIMEOUT_SECONDS: str(constants.CLIENT_READ_TIMEOUT_SECONDS),
+        EnvVarsNames.CLIENT_TCP_KEEPALIVE: str(constants.CLIENT_TCP_KEEPALIVE).lower(),
+    }
+
+
+def generate_dashboard_environment() -> dict[str, str]:
+    """
+    Environment variables of the metrics charted by the dashboard
+    """
+
+    return {
+        EnvVarsNames.MANAGED_PERCENT_METRICS_ENABLED: str(
+            constants.DASHBOARD_MODE == DashboardModes.SEARCH
+        ).lower(),
+    }
+
+
+def generate_global_resources_environment() -> dict[str, str]:
+    """
+    Environment variables of the deduplication of global resources, which only the fan-out orchestration
+    rolls up across regions
+    """
+
+    return {
+        EnvVarsNames.GLOBAL_RESOURCE_DEDUPLICATION_ENABLED: str(
+            constants.GLOBAL_RESOURCE_DEDUPLICATION_ENABLED and bool(constants.MONITORED_ACCOUNT_IDS)
+        ).lower(),
+        EnvVarsNames.GLOBAL_RESOURCE_TYPE_PREFIXES: json.dumps(constants.GLOBAL_RESOURCE_TYPE_PREFIXES),
+        EnvVarsNames.GLOBAL_RESOURCES_MAX_EXACT_KEYS: str(constants.GLOBAL_RESOURCES_MAX_EXACT_KEYS),
+    }
+
+
+def generate_tag_grouping_environment() -> dict[str, str]:
+    """
+    Environment variables of the grouping of the resources by tag value, no resources are grouped without
+    tag keys
+    """
+
+    return {
+        EnvVarsNames.TAG_GROUPING_KEYS: json.dumps(constants.TAG_GROUPING_KEYS),
+        EnvVarsNames.TAG_GROUPING_TOP_VALUES: str(constants.TAG_GROUPING_TOP_VALUES),
+    }
+
+
+def generate_resource_types_environment() -> dict[str, str]:
+    """
+    Environment variables of the metrics of every resource type, no dashboard is updated when disabled
+    """
+
+    return {
+        EnvVarsNames.ALL_RESOURCE_TYPES_ENABLED: str(constants.ALL_RESOURCE_TYPES_ENABLED).lower(),
+        EnvVarsNames.RESOURCE_TYPES_DASHBOARD_NAME: (
+            RESOURCE_TYPES_DASHBOARD_NAME if constants.ALL_RESOURCE_TYPES_ENABLED else ""
+        ),
+        EnvVarsNames.RESOURCE_TYPES_DASHBOARD_SIZE: str(constants.RESOURCE_TYPES_DASHBOARD_SIZE),
+    }
+
+
+# Dashboards are global, so their ARNs have no region
+RESOURCE_TYPES_DASHBOARD_ARN = (
+    f"arn:{cdk.Aws.PARTITION}:cloudwatch::{cdk.Aws.ACCOUNT_ID}:dashboard/{RESOURCE_TYPES_DASHBOARD_NAME}"
+)
+
+# ARN of the role assumed in the monitored accounts, the runtime replaces `{AccountId}` with the account ID
+TARGET_ROLE_ARN_TEMPLATE = generate_target_role_arn("{AccountId}")
+TARGET_ROLE_ARN_PATTERN = generate_target_role_arn("*")
+
+
 class MetricsExtraction(Construct):
     def __init__(self, scope: Construct, _id: str, **kwargs: Any):
         super().__init__(scope, _id, **kwargs)
 
+        validate_metrics_publishing_mode()
+
         self.python_requirements_layer = _lambda.LayerVersion(
             self,
             "PythonRequirementsLayer",
@@ -34,6 +123,37 @@ class MetricsExtraction(Construct):
             removal_policy=cdk.RemovalPolicy.DESTROY,
         )
 
+        # Stores data kept between resource scans, such as the snapshot of the previous resource scan
+        # and the exported scanned resources
+        self.scan_data_bucket = s3.Bucket(
+            self,
+            "ScanDataBucket",
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            removal_policy=cdk.RemovalPolicy.DESTROY,
+            auto_delete_objects=True,
+            lifecycle_rules=[
+                # Multipart uploads of resource exports are left incomplete when the metric extraction fails
+                s3.LifecycleRule(abort_incomplete_multipart_upload_after=cdk.Duration.days(1)),
+                # Checkpoints are deleted by the last invocation, unless the execution fails or is stopped
+                s3.LifecycleRule(prefix=f"{CHECKPOINTS_PREFIX}/", expiration=cdk.Duration.days(7)),
+            ],
+        )
+
+        # Stores the adoption history, which is kept for years, so unlike the scan data bucket it's retained
+        # when the stack is deleted or the bucket replaced
+        self.history_bucket: s3.Bucket | None = None
+        if constants.HISTORY_ENABLED:
+            self.history_bucket = s3.Bucket(
+                self,
+                "HistoryBucket",
+                encryption=s3.BucketEncryption.S3_MANAGED,
+                block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+                enforce_ssl=True,
+                removal_policy=cdk.RemovalPolicy.RETAIN,
+            )
+
         self.extract_metrics_lambda_function = _lambda.Function(
             self,
             "ExtractMetricsLambdaFunction",
@@ -50,9 +170,40 @@ class MetricsExtraction(Construct):
                 EnvVarsNames.CLOUDWATCH_METRICS_NAMESPACE: constants.CLOUDWATCH_METRICS_NAMESPACE,
                 EnvVarsNames.ACCOUNT_ID: cdk.Aws.ACCOUNT_ID,
                 EnvVarsNames.REGION: cdk.Aws.REGION,
+                EnvVarsNames.LIST_RESOURCES_CONCURRENCY: str(constants.LIST_RESOURCES_CONCURRENCY),
+                EnvVarsNames.PAGE_PREFETCH_DEPTH: str(constants.PAGE_PREFETCH_DEPTH),
+                EnvVarsNames.SCAN_DATA_BUCKET_NAME: self.scan_data_bucket.bucket_name,
+                EnvVarsNames.SCAN_SNAPSHOTS_ENABLED: str(constants.SCAN_SNAPSHOTS_ENABLED).lower(),
+                EnvVarsNames.RESOURCE_EXPORT_ENABLED: str(constants.RESOURCE_EXPORT_ENABLED).lower(),
+                EnvVarsNames.HIERARCHICAL_METRICS_ENABLED: str(
+                    constants.HIERARCHICAL_METRICS_ENABLED
+                ).lower(),
+                EnvVarsNames.HISTORY_ENABLED: str(constants.HISTORY_ENABLED).lower(),
+                EnvVarsNames.HISTORY_BUCKET_NAME: (
+                    self.history_bucket.bucket_name if self.history_bucket is not None else ""
+                ),
+                EnvVarsNames.EXTRACTION_CHECKPOINT_MARGIN_SECONDS: str(
+                    constants.EXTRACTION_CHECKPOINT_MARGIN_SECONDS
+                ),
+                EnvVarsNames.STACK_ATTRIBUTION_ENABLED: str(constants.STACK_ATTRIBUTION_ENABLED).lower(),
+                EnvVarsNames.STACK_ATTRIBUTION_TOP_STACKS: str(constants.STACK_ATTRIBUTION_TOP_STACKS),
+                **generate_global_resources_environment(),
+                **generate_tag_grouping_environment(),
+                EnvVarsNames.TARGET_ROLE_ARN_TEMPLATE: TARGET_ROLE_ARN_TEMPLATE,
+                EnvVarsNames.METRICS_PUBLISHING_MODE: constants.METRICS_PUBLISHING_MODE,
+                **generate_client_environment(),
+                **generate_resource_types_environment(),
+                **generate_dashboard_environment(),
             },
         )
+        self.scan_data_bucket.grant_read_write(self.extract_metrics_lambda_function)
+        if self.history_bucket is not None:
+            self.history_bucket.grant_read_write(self.extract_metrics_lambda_function)
         self.allow_role_to_list_resource_scan_resources(self.extract_metrics_lambda_function.role)
+        allow_role_to_put_metric_data(self.extract_metrics_lambda_function)
+        allow_role_to_put_resource_types_dashboard(self.extract_metrics_lambda_function)
+        allow_role_to_list_stack_resources(self.extract_metrics_lambda_function)
+        allow_role_to_get_resource_tags(self.extract_metrics_lambda_function)
 
     def allow_role_to_list_resource_scan_resources(self, lambda_role: iam.IRole | None) -> None:
         if lambda_role is None:
@@ -65,7 +216,10 @@ class MetricsExtraction(Construct):
                 document=iam.PolicyDocument(
                     statements=[
                         iam.PolicyStatement(
-                            actions=["CloudFormation:ListResourceScanResources"],
+                            actions=[
+                                "CloudFormation:ListResourceScanResources",
+                                "CloudFormation:DescribeResourceScan",
+                            ],
                             effect=iam.Effect.ALLOW,
                             resources=["*"],
                         )
@@ -73,3 +227,83 @@ class MetricsExtraction(Construct):
                 ),
             )
         )
+
+
+def validate_metrics_publishing_mode() -> None:
+    # The metrics of hundreds of resource types don't fit in a single PutMetricData request
+    if constants.METRICS_PUBLISHING_MODE != MetricsPublishingModes.STATE_MACHINE:
+        return
+
+    if constants.ALL_RESOURCE_TYPES_ENABLED or constants.HIERARCHICAL_METRICS_ENABLED:
+        raise ValueError(
+            "ALL_RESOURCE_TYPES_ENABLED and HIERARCHICAL_METRICS_ENABLED require the LAMBDA or EMF "
+            "metrics publishing mode"
+        )
+
+
+def allow_role_to_assume_target_role(lambda_function: _lambda.Function) -> None:
+    lambda_function.add_to_role_policy(
+        iam.PolicyStatement(
+            actions=["sts:AssumeRole"],
+            effect=iam.Effect.ALLOW,
+            resources=[TARGET_ROLE_ARN_PATTERN],
+        )
+    )
+
+
+def allow_role_to_put_metric_data(lambda_function: _lambda.Function) -> None:
+    # Only required when the Lambda functions publish the metrics themselves
+    if constants.METRICS_PUBLISHING_MODE != MetricsPublishingModes.LAMBDA:
+        return
+
+    lambda_function.add_to_role_policy(
+        iam.PolicyStatement(
+            actions=["cloudwatch:PutMetricData"],
+            effect=iam.Effect.ALLOW,
+            resources=["*"],
+            conditions={"StringEquals": {"cloudwatch:namespace": constants.CLOUDWATCH_METRICS_NAMESPACE}},
+        )
+    )
+
+
+def allow_role_to_put_resource_types_dashboard(lambda_function: _lambda.Function) -> None:
+    if not constants.ALL_RESOURCE_TYPES_ENABLED:
+        return
+
+    lambda_function.add_to_role_policy(
+        iam.PolicyStatement(
+            actions=["cloudwatch:PutDashboard"],
+            effect=iam.Effect.ALLOW,
+            resources=[RESOURCE_TYPES_DASHBOARD_ARN],
+        )
+    )
+
+
+def allow_role_to_list_stack_resources(lambda_function: _lambda.Function) -> None:
+    if not constants.STACK_ATTRIBUTION_ENABLED:
+        return
+
+    lambda_function.add_to_role_policy(
+        iam.PolicyStatement(
+            actions=[
+                "cloudformation:DescribeStacks",
+                "cloudformation:ListStackResources",
+                "cloudformation:GetTemplateSummary",
+            ],
+            effect=iam.Effect.ALLOW,
+            resources=["*"],
+        )
+    )
+
+
+def allow_role_to_get_resource_tags(lambda_function: _lambda.Function) -> None:
+    if not constants.TAG_GROUPING_KEYS:
+        return
+
+    lambda_function.add_to_role_policy(
+        iam.PolicyStatement(
+            actions=["tag:GetResources"],
+            effect=iam.Effect.ALLOW,
+            resources=["*"],
+        )
+    )
@@ -1,6 +1,7 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import json
 from typing import Any
 
 import aws_cdk as cdk
@@ -11,14 +12,39 @@ from aws_cdk import aws_stepfunctions as stepfunctions
 from aws_cdk import aws_stepfunctions_tasks as stepfunctions_tasks
 from constructs import Construct
 
+import cdk_constants as constants
 from service.metric_extraction import LAMBDA_FUNCTION_CODE_ASSET
+from service.metric_extraction import TARGET_ROLE_ARN_TEMPLATE
 from service.metric_extraction import MetricsExtraction
+from service.metric_extraction import allow_role_to_assume_target_role
+from service.metric_extraction import allow_role_to_put_metric_data
+from service.metric_extraction import allow_role_to_put_resource_types_dashboard
+from service.metric_extraction import generate_client_environment
+from service.metric_extraction import generate_dashboard_environment
+from service.metric_extraction import generate_global_resources_environment
+from service.metric_extraction import generate_resource_types_environment
+from service.metric_extraction import generate_tag_grouping_environment
+from service.runtime.constants import CHECKPOINT_EVENT_KEY
+from service.runtime.constants import SCAN_TYPE_EVENT_KEY
+from service.runtime.constants import TARGET_ACCOUNT_ID_EVENT_KEY
+from service.runtime.constants import TARGET_REGION_EVENT_KEY
+from service.runtime.constants import TARGETS_EVENT_KEY
+from service.runtime.constants import WAIT_SECONDS_EVENT_KEY
+from service.runtime.constants import EnvVarsNames
+from service.runtime.constants import MetricsPublishingModes
 
 DESCRIBE_RESOURCE_SCAN_STATUS_JSON_PATH = "$.Payload.Status"
-TIME_TO_WAIT_BETWEEN_POLLING_MINUTES = 10
+
+# Number of seconds to wait before the next status check of a resource scan, calculated by the start and
+# describe resource scan Lambda functions from the progress of the resource scan
+WAIT_SECONDS_JSON_PATH = f"$.Payload.{WAIT_SECONDS_EVENT_KEY}"
 
 START_SCAN_LAMBDA_FUNCTION_HANDLER = "start_scan.lambda_handler"
 DESCRIBE_SCAN_LAMBDA_FUNCTION_HANDLER = "describe_scan.lambda_handler"
+ROLLUP_METRICS_LAMBDA_FUNCTION_HANDLER = "rollup_metrics.lambda_handler"
+
+# Prefix of the results of the fan-out orchestration in the scan data bucket
+FAN_OUT_RESULTS_PREFIX = "fan-out-results"
 
 
 # pylint: disable=too-few-public-methods
@@ -37,6 +63,13 @@ class ScanConditions:
     COMPLETE = stepfunctions.Condition.string_equals(
         DESCRIBE_RESOURCE_SCAN_STATUS_JSON_PATH, ResourceScanStatus.COMPLETE
     )
+    # Only a reused resource scan has a status when it is returned by `StartResourceScan`
+    REUSED = stepfunctions.Condition.and_(
+        stepfunctions.Condition.is_present(DESCRIBE_RESOURCE_SCAN_STATUS_JSON_PATH),
+        stepfunctions.Condition.string_equals(
+            DESCRIBE_RESOURCE_SCAN_STATUS_JSON_PATH, ResourceScanStatus.COMPLETE
+        ),
+    )
     FAILED = stepfunctions.Condition.or_(
         stepfunctions.Condition.string_equals(
             DESCRIBE_RESOURCE_SCAN_STATUS_JSON_PATH, ResourceScanStatus.FAILED
@@ -47,6 +80,12 @@ class ScanConditions:
     )
 
 
+# pylint: disable=too-few-public-methods
+class ExtractionConditions:
+    # Only a metric extraction that stopped before listing the entire resource scan returns a checkpoint
+    CHECKPOINTED = stepfunctions.Condition.is_present(f"$.Payload.{CHECKPOINT_EVENT_KEY}")
+
+
 class Orchestration(Construct):
     def __init__(self, scope: Construct, _id: str, metric_extraction: MetricsExtraction, **kwargs: Any):
         super().__init__(scope, _id, **kwargs)
@@ -74,24 +113,75 @@ class Orchestration(Construct):
 
     def _create_state_machine_definition(self, metric_extraction: MetricsExtraction) -> stepfunctions.Chain:
         states = States(self, "States", metric_extraction)
+        target_definition = self._create_target_state_machine_definition(states)
+
+        # Without monitored accounts, only the account and region the solution is deployed to are monitored
+        if not constants.MONITORED_ACCOUNT_IDS:
+            return target_definition
+
+        fan_out_states = FanOutStates(self, "FanOutStates", metric_extraction, states)
+
+        # fmt: off
+
+        state_machine_definition = (
+            fan_out_states.list_targets
+            .next(fan_out_states.monitor_targets.item_processor(target_definition))
+            .next(fan_out_states.rollup_organization_metrics)
+        )
+        # fmt: on
+
+        if constants.METRICS_PUBLISHING_MODE == MetricsPublishingModes.STATE_MACHINE:
+            return state_machine_definition.next(fan_out_states.put_organization_metric_data)
+
+        # The rollup Lambda function publishes the organization metrics itself
+        return state_machine_definition
+
+    def _create_metrics_extraction_definition(self, states: "States") -> stepfunctions.Chain:
+        if constants.METRICS_PUBLISHING_MODE == MetricsPublishingModes.STATE_MACHINE:
+            metrics_publishing = states.put_metric_data.next(states.success)
+        else:
+            # The extract metrics Lambda function publishes the metrics itself
+            metrics_publishing = stepfunctions.Chain.start(states.success)
+
+        if constants.EXTRACTION_CHECKPOINT_MARGIN_SECONDS <= 0:
+            return states.extract_managed_resources_metrics.next(metrics_publishing)
+
+        # fmt: off
+
+        # A checkpointed metric extraction is invoked again with its own output until it lists the last page
+        return states.extract_managed_resources_metrics.next(
+            states.is_extraction_complete_choice
+            .when(ExtractionConditions.CHECKPOINTED, states.extract_managed_resources_metrics)
+            .otherwise(metrics_publishing)
+        )
+        # fmt: on
+
+    def _create_target_state_machine_definition(self, states: "States") -> stepfunctions.Chain:
+        """
+        Creates the definition that scans a single account and region and extracts its metrics
+        """
 
         # Tell black formatter not to format these expressions using "fmt: off/on"
         # fmt: off
 
+        metrics_extraction = self._create_metrics_extraction_definition(states)
+
         state_machine_definition = (
             states.start_resource_scan
-            .next(states.wait)
-            .next(states.describe_resource_scan)
             .next(
-                states.is_scan_complete_choice
-                .when(ScanConditions.FAILED, states.scan_failed)
-                .when(ScanConditions.IN_PROGRESS, states.wait)
-                .when(ScanConditions.COMPLETE, (
-                    states.extract_managed_resources_metrics
-                    .next(states.put_metric_data)
-                    .next(states.success)
-                ))
-                .otherwise(states.scan_failed)
+                states.is_scan_reused_choice
+                .when(ScanConditions.REUSED, metrics_extraction)
+                .otherwise(
+                    states.wait
+                    .next(states.describe_resource_scan)
+                    .next(
+                        states.is_scan_complete_choice
+                        .when(ScanConditions.FAILED, states.scan_failed)
+                        .when(ScanConditions.IN_PROGRESS, states.wait)
+                        .when(ScanConditions.COMPLETE, metrics_extraction)
+                        .otherwise(states.scan_failed)
+                    )
+                )
             )
         )
         # fmt: on
@@ -105,31 +195,33 @@ class States(Construct):
         super().__init__(scope, _id, **kwargs)
 
         # Temporary Lambda function, delete when StepFunctions introduce StartResourceScan action
-        start_scan_lambda_function = self._create_start_resource_scan_lambda_function(
+        self.start_scan_lambda_function = self._create_start_resource_scan_lambda_function(
             metric_extraction.python_requirements_layer
         )
 
         # Temporary Lambda function, delete when StepFunctions introduce DescribeResourceScan action
-        describe_scan_lambda_function = self._create_describe_resource_scan_lambda_function(
+        self.describe_scan_lambda_function = self._create_describe_resource_scan_lambda_function(
             metric_extraction.python_requirements_layer
         )
 
         self.start_resource_scan = stepfunctions_tasks.LambdaInvoke(
             self,
             "StartResourceScan",
-            lambda_function=start_scan_lambda_function,
+            lambda_function=self.start_scan_lambda_function,
         )
 
+        self.is_scan_reused_choice = stepfunctions.Choice(self, "IsScanReusedChoice")
+
         self.wait = stepfunctions.Wait(
             self,
-            f"Wait{int(TIME_TO_WAIT_BETWEEN_POLLING_MINUTES)}Minutes",
-            time=stepfunctions.WaitTime.duration(cdk.Duration.minutes(TIME_TO_WAIT_BETWEEN_POLLING_MINUTES)),
+            "WaitForResourceScan",
+            time=stepfunctions.WaitTime.seconds_path(WAIT_SECONDS_JSON_PATH),
         )
 
         self.describe_resource_scan = stepfunctions_tasks.LambdaInvoke(
             self,
             "DescribeResourceScan",
-            lambda_function=describe_scan_lambda_function,
+            lambda_function=self.describe_scan_lambda_function,
             payload=stepfunctions.TaskInput.from_json_path_at("$.Payload"),
         )
 
@@ -144,6 +236,8 @@ class States(Construct):
             payload=stepfunctions.TaskInput.from_json_path_at("$.Payload"),
         )
 
+        self.is_extraction_complete_choice = stepfunctions.Choice(self, "IsExtractionCompleteChoice")
+
         self.put_metric_data = stepfunctions_tasks.CallAwsService(
             self,
             "PutMetricData",
@@ -154,6 +248,8 @@ class States(Construct):
                 "MetricData": stepfunctions.JsonPath.string_at("$.Payload.MetricData"),
                 "Namespace": stepfunctions.JsonPath.string_at("$.Payload.Namespace"),
             },
+            # Keeps the extracted metrics as the output, the fan-out orchestration rolls them up
+            result_path=stepfunctions.JsonPath.DISCARD,
         )
 
         self.success = stepfunctions.Succeed(self, "Success")
@@ -169,6 +265,14 @@ class States(Construct):
             handler=START_SCAN_LAMBDA_FUNCTION_HANDLER,
             timeout=cdk.Duration.minutes(10),
             layers=[python_requirements_layer],
+            environment={
+                EnvVarsNames.RESOURCE_TYPE_FOCUS_LIST_JSON: json.dumps(constants.RESOURCE_TYPE_FOCUS_LIST),
+                EnvVarsNames.REUSE_RESOURCE_SCAN_MAX_AGE_MINUTES: str(
+                    constants.REUSE_RESOURCE_SCAN_MAX_AGE_MINUTES
+                ),
+                EnvVarsNames.TARGET_ROLE_ARN_TEMPLATE: TARGET_ROLE_ARN_TEMPLATE,
+                **generate_client_environment(),
+            },
         )
 
         lambda_role = start_scan_lambda_function.role
@@ -204,6 +308,10 @@ class States(Construct):
             handler=DESCRIBE_SCAN_LAMBDA_FUNCTION_HANDLER,
             timeout=cdk.Duration.minutes(10),
             layers=[python_requirements_layer],
+            environment={
+                EnvVarsNames.TARGET_ROLE_ARN_TEMPLATE: TARGET_ROLE_ARN_TEMPLATE,
+                **generate_client_environment(),
+            },
         )
 
         lambda_role = describe_scan_lambda_function.role
@@ -227,3 +335,115 @@ class States(Construct):
         )
 
         return describe_scan_lambda_function
+
+
+class FanOutStates(Construct):
+    """
+    States of the fan-out orchestration, which runs the states of a single account and region for every
+    monitored account and region in a distributed map, and rolls up their metrics into organization metrics
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        _id: str,
+        metric_extraction: MetricsExtraction,
+        states: States,
+        **kwargs: Any,
+    ):
+        super().__init__(scope, _id, **kwargs)
+
+        for lambda_function in [
+            states.start_scan_lambda_function,
+            states.describe_scan_lambda_function,
+            metric_extraction.extract_metrics_lambda_function,
+        ]:
+            allow_role_to_assume_target_role(lambda_function)
+
+        rollup_metrics_lambda_function = self._create_rollup_metrics_lambda_function(metric_extraction)
+
+        # Targets are part of the definition, since they don't fit the input of an EventBridge schedule
+        self.list_targets = stepfunctions.Pass(
+            self,
+            "ListTargets",
+            result=stepfunctions.Result.from_array(generate_targets()),
+            result_path=f"$.{TARGETS_EVENT_KEY}",
+        )
+
+        self.monitor_targets = stepfunctions.DistributedMap(
+            self,
+            "MonitorTargets",
+            items_path=f"$.{TARGETS_EVENT_KEY}",
+            item_selector={
+                TARGET_ACCOUNT_ID_EVENT_KEY: stepfunctions.JsonPath.string_at(
+                    f"$$.Map.Item.Value.{TARGET_ACCOUNT_ID_EVENT_KEY}"
+                ),
+                TARGET_REGION_EVENT_KEY: stepfunctions.JsonPath.string_at(
+                    f"$$.Map.Item.Value.{TARGET_REGION_EVENT_KEY}"
+                ),
+                SCAN_TYPE_EVENT_KEY: stepfunctions.JsonPath.string_at(f"$.{SCAN_TYPE_EVENT_KEY}"),
+            },
+            max_concurrency=constants.FAN_OUT_MAX_CONCURRENCY,
+            tolerated_failure_percentage=constants.FAN_OUT_TOLERATED_FAILURE_PERCENTAGE,
+            # The results of hundreds of targets exceed the size limit of a state output
+            result_writer=stepfunctions.ResultWriter(
+                bucket=metric_extraction.scan_data_bucket,
+                prefix=FAN_OUT_RESULTS_PREFIX,
+            ),
+        )
+
+        self.rollup_organization_metrics = stepfunctions_tasks.LambdaInvoke(
+            self,
+            "RollupOrganizationMetrics",
+            lambda_function=rollup_metrics_lambda_function,
+        )
+
+        self.put_organization_metric_data = stepfunctions_tasks.CallAwsService(
+            self,
+            "PutOrganizationMetricData",
+            service="cloudwatch",
+            action="putMetricData",
+            iam_resources=["*"],
+            parameters={
+                "MetricData": stepfunctions.JsonPath.string_at("$.Payload.MetricData"),
+                "Namespace": stepfunctions.JsonPath.string_at("$.Payload.Namespace"),
+            },
+        )
+
+    def _create_rollup_metrics_lambda_function(
+        self, metric_extraction: MetricsExtraction
+    ) -> _lambda.Function:
+        rollup_metrics_lambda_function = _lambda.Function(
+            self,
+            "RollupMetricsLambdaFunction",
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            code=LAMBDA_FUNCTION_CODE_ASSET,
+            handler=ROLLUP_METRICS_LAMBDA_FUNCTION_HANDLER,
+            timeout=cdk.Duration.minutes(10),
+            layers=[metric_extraction.python_requirements_layer],
+            environment={
+                EnvVarsNames.CLOUDWATCH_METRICS_NAMESPACE: constants.CLOUDWATCH_METRICS_NAMESPACE,
+                EnvVarsNames.METRICS_PUBLISHING_MODE: constants.METRICS_PUBLISHING_MODE,
+                **generate_client_environment(),
+                **generate_resource_types_environment(),
+                **generate_dashboard_environment(),
+                **generate_global_resources_environment(),
+                **generate_tag_grouping_environment(),
+            },
+        )
+        metric_extraction.scan_data_bucket.grant_read(rollup_metrics_lambda_function)
+        allow_role_to_put_metric_data(rollup_metrics_lambda_function)
+        allow_role_to_put_resource_types_dashboard(rollup_metrics_lambda_function)
+
+        return rollup_metrics_lambda_function
+
+
+def generate_targets() -> list[dict[str, str]]:
+    # Without monitored regions, the region the solution is deployed to is monitored in every account
+    regions = constants.MONITORED_REGIONS or [cdk.Aws.REGION]
+
+    return [
+        {TARGET_ACCOUNT_ID_EVENT_KEY: account_id, TARGET_REGION_EVENT_KEY: region}
+        for account_id in constants.MONITORED_ACCOUNT_IDS
+        for region in regions
+    ]
@@ -0,0 +1,102 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from typing import Any
+
+import aws_cdk as cdk
+from aws_cdk import aws_glue as glue
+from constructs import Construct
+
+import cdk_constants as constants
+from service.metric_extraction import MetricsExtraction
+from service.runtime.constants import RESOURCE_EXPORT_PREFIX
+
+RESOURCE_EXPORT_DATABASE_NAME = "iac_adoption"
+RESOURCE_EXPORT_TABLE_NAME = "resources"
+
+# Columns of the newline-delimited JSON records written by `export.py`
+RESOURCE_EXPORT_COLUMNS = [
+    glue.CfnTable.ColumnProperty(name="resource_type", type="string"),
+    glue.CfnTable.ColumnProperty(name="resource_identifier", type="map<string,string>"),
+    glue.CfnTable.ColumnProperty(name="managed_by_stack", type="boolean"),
+    glue.CfnTable.ColumnProperty(name="resource_scan_id", type="string"),
+]
+
+RESOURCE_EXPORT_PARTITION_KEYS = [
+    glue.CfnTable.ColumnProperty(name="account_id", type="string"),
+    glue.CfnTable.ColumnProperty(name="region", type="string"),
+    glue.CfnTable.ColumnProperty(name="scan_date", type="string"),
+]
+
+SCAN_DATE_FORMAT = "yyyy-MM-dd"
+SCAN_DATE_PROJECTION_START = "2024-01-01"
+
+
+class ResourceExport(Construct):
+    """
+    AWS Glue table of the scanned resources exported by the metric extraction, queryable with Amazon Athena
+
+    Partitions are resolved with partition projection, so no crawler or `MSCK REPAIR TABLE` is needed
+    for the partitions of new resource scans.
+    """
+
+    def __init__(
+        self, scope: Construct, _id: str, metric_extraction: MetricsExtraction, **kwargs: Any
+    ) -> None:
+        super().__init__(scope, _id, **kwargs)
+
+        location = f"s3://{metric_extraction.scan_data_bucket.bucket_name}/{RESOURCE_EXPORT_PREFIX}"
+
+        self.database = glue.CfnDatabase(
+            self,
+            "ResourceExportDatabase",
+            catalog_id=cdk.Aws.ACCOUNT_ID,
+            database_input=glue.CfnDatabase.DatabaseInputProperty(name=RESOURCE_EXPORT_DATABASE_NAME),
+        )
+
+        self.table = glue.CfnTable(
+            self,
+            "ResourceExportTable",
+            catalog_id=cdk.Aws.ACCOUNT_ID,
+            database_name=RESOURCE_EXPORT_DATABASE_NAME,
+            table_input=glue.CfnTable.TableInputProperty(
+                name=RESOURCE_EXPORT_TABLE_NAME,
+                table_type="EXTERNAL_TABLE",
+                partition_keys=RESOURCE_EXPORT_PARTITION_KEYS,
+                parameters=generate_partition_projection_parameters(location),
+                storage_descriptor=glue.CfnTable.StorageDescriptorProperty(
+                    columns=RESOURCE_EXPORT_COLUMNS,
+                    location=location,
+                    input_format="org.apache.hadoop.mapred.TextInputFormat",
+                    output_format="org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
+                    serde_info=glue.CfnTable.SerdeInfoProperty(
+                        serialization_library="org.openx.data.jsonserde.JsonSerDe"
+                    ),
+                ),
+            ),
+        )
+        self.table.add_dependency(self.database)
+
+
+def generate_partition_projection_parameters(location: str) -> dict[str, str]:
+    # Without monitored accounts, only the account and region the solution is deployed to are exported
+    account_ids = constants.MONITORED_ACCOUNT_IDS or [cdk.Aws.ACCOUNT_ID]
+    regions = constants.MONITORED_REGIONS or [cdk.Aws.REGION]
+
+    return {
+        "classification": "json",
+        "compressionType": "gzip",
+        "projection.enabled": "true",
+        "projection.account_id.type": "enum",
+        "projection.account_id.values": ",".join(account_ids),
+        "projection.region.type": "enum",
+        "projection.region.values": ",".join(regions),
+        "projection.scan_date.type": "date",
+        "projection.scan_date.format": SCAN_DATE_FORMAT,
+        "projection.scan_date.range": f"{SCAN_DATE_PROJECTION_START},NOW",
+        "projection.scan_date.interval": "1",
+        "projection.scan_date.interval.unit": "DAYS",
+        "storage.location.template": (
+            f"{location}/account_id=${{account_id}}/region=${{region}}/scan_date=${{scan_date}}"
+        ),
+    }
@@ -0,0 +1,228 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING, Any, Iterable, Mapping, Self
+
+from metrics import ALL_RESOURCES_METRIC_NAME
+from metrics import generate_managed_metric_name
+
+if TYPE_CHECKING:
+    from mypy_boto3_cloudformation.client import CloudFormationClient
+    from mypy_boto3_cloudformation.type_defs import StackTypeDef
+
+STACK_DIMENSION_NAME = "Stack"
+IAC_TOOL_DIMENSION_NAME = "IaCTool"
+
+# Dimension value of the managed resources of the stacks that aren't among the top stacks,
+# stack names start with a letter so it can't be the name of a stack
+OTHER_STACKS_DIMENSION_VALUE = "(Other)"
+
+MANAGED_RESOURCES_METRIC_NAME = generate_managed_metric_name(ALL_RESOURCES_METRIC_NAME)
+
+# Stacks deployed by the CDK with the default synthesizer have this parameter, and the ones with metadata
+# enabled have a resource of this type
+CDK_BOOTSTRAP_VERSION_PARAMETER_KEY = "BootstrapVersion"
+CDK_METADATA_RESOURCE_TYPE = "AWS::CDK::Metadata"
+SAM_TRANSFORM = "AWS::Serverless-2016-10-31"
+
+# Resources of a stack that aren't resources managed by the stack: nested stacks are attributed through
+# their own resources, and custom resources and CDK metadata aren't scanned by IaC Generator
+UNATTRIBUTED_RESOURCE_TYPES = frozenset({"AWS::CloudFormation::Stack", CDK_METADATA_RESOURCE_TYPE})
+CUSTOM_RESOURCE_TYPE_PREFIX = "Custom::"
+
+
+# pylint: disable=too-few-public-methods
+class IacTools:
+    CDK = "CDK"
+    SAM = "SAM"
+    CLOUDFORMATION = "CloudFormation"
+
+
+@dataclass
+class StackResources:
+    """
+    Managed resources of a stack, which belong to its root stack when the stack is nested
+    """
+
+    root_stack_id: str
+    managed_resources: int = 0
+    cdk: bool = False
+
+
+@dataclass
+class StackAttribution:
+    """
+    Managed resources attributed to the top root stacks, the other stacks combined, and every IaC tool
+
+    `stacks` is bounded by the number of top stacks plus one, so the number of metrics stays the same
+    on accounts with thousands of stacks.
+    """
+
+    stacks: dict[str, int] = field(default_factory=dict)
+    iac_tools: dict[str, int] = field(default_factory=dict)
+    stacks_listed: int = 0
+
+    def to_json(self) -> dict[str, Any]:
+        return {"Stacks": self.stacks, "IaCTools": self.iac_tools, "StacksListed": self.stacks_listed}
+
+    @classmethod
+    def from_json(cls, data: Mapping[str, Any]) -> Self:
+        return cls(stacks=data["Stacks"], iac_tools=data["IaCTools"], stacks_listed=data["StacksListed"])
+
+
+def attribute_managed_resources(
+    cloudformation_client: CloudFormationClient,
+    excluded_resource_types: frozenset[str],
+    top_stacks: int,
+    concurrency: int,
+) -> StackAttribution:
+    """
+    Counts the managed resources of every stack of the account and region, and attributes them to the
+    `top_stacks` root stacks with the most managed resources and to the IaC tool that deployed them
+
+    Resource scans don't return the stack of a managed resource, so the resources of every stack are listed
+    with `ListStackResources`, `concurrency` stacks at a time. The resource types excluded from the
+    resource scan metrics aren't attributed either.
+    """
+
+    stacks = list_stacks(cloudformation_client)
+
+    def count_stack_resources_of_stack(stack: StackTypeDef) -> StackResources:
+        return count_stack_resources(cloudformation_client, stack, excluded_resource_types)
+
+    root_stacks: dict[str, StackResources] = {}
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        for stack_resources in executor.map(count_stack_resources_of_stack, stacks):
+            root_stack = root_stacks.setdefault(
+                stack_resources.root_stack_id, StackResources(stack_resources.root_stack_id)
+            )
+            root_stack.managed_resources += stack_resources.managed_resources
+            root_stack.cdk |= stack_resources.cdk
+
+    stack_names = {stack["StackId"]: stack["StackName"] for stack in stacks}
+    return StackAttribution(
+        stacks=select_top_stacks(
+            {
+                stack_names.get(stack_id, stack_id): root.managed_resources
+                for stack_id, root in root_stacks.items()
+            },
+            top_stacks,
+        ),
+        iac_tools=count_iac_tool_resources(cloudformation_client, root_stacks.values()),
+        stacks_listed=len(stacks),
+    )
+
+
+def list_stacks(cloudformation_client: CloudFormationClient) -> list[StackTypeDef]:
+    # Deleted stacks aren't returned by `DescribeStacks` without a stack name
+    paginator = cloudformation_client.get_paginator("describe_stacks")
+    return [stack for page in paginator.paginate() for stack in page["Stacks"]]
+
+
+def count_stack_resources(
+    cloudformation_client: CloudFormationClient, stack: StackTypeDef, excluded_resource_types: frozenset[str]
+) -> StackResources:
+    stack_resources = StackResources(
+        root_stack_id=stack.get("RootId", stack["StackId"]),
+        cdk=any(
+            parameter.get("ParameterKey") == CDK_BOOTSTRAP_VERSION_PARAMETER_KEY
+            for parameter in stack.get("Parameters", [])
+        ),
+    )
+
+    paginator = cloudformation_client.get_paginator("list_stack_resources")
+    for page in paginator.paginate(StackName=stack["StackId"]):
+        for summary in page["StackResourceSummaries"]:
+            resource_type = summary["ResourceType"]
+            stack_resources.cdk |= resource_type == CDK_METADATA_RESOURCE_TYPE
+            stack_resources.managed_resources += is_attributed_resource(
+                resource_type, summary["ResourceStatus"], excluded_resource_types
+            )
+
+    return stack_resources
+
+
+def is_attributed_resource(
+    resource_type: str, resource_status: str, excluded_resource_types: frozenset[str]
+) -> bool:
+    if resource_type in UNATTRIBUTED_RESOURCE_TYPES or resource_type in excluded_resource_types:
+        return False
+
+    return not resource_type.startswith(CUSTOM_RESOURCE_TYPE_PREFIX) and resource_status != "DELETE_COMPLETE"
+
+
+def count_iac_tool_resources(
+    cloudformation_client: CloudFormationClient, root_stacks: Iterable[StackResources]
+) -> dict[str, int]:
+    iac_tools = dict.fromkeys((IacTools.CDK, IacTools.SAM, IacTools.CLOUDFORMATION), 0)
+    for root_stack in root_stacks:
+        iac_tools[get_iac_tool(cloudformation_client, root_stack)] += root_stack.managed_resources
+
+    return iac_tools
+
+
+def get_iac_tool(cloudformation_client: CloudFormationClient, root_stack: StackResources) -> str:
+    if root_stack.cdk:
+        return IacTools.CDK
+
+    # Only the template tells the transforms apart, stacks without managed resources don't need it
+    if root_stack.managed_resources == 0:
+        return IacTools.CLOUDFORMATION
+
+    response = cloudformation_client.get_template_summary(StackName=root_stack.root_stack_id)
+    if SAM_TRANSFORM in response.get("DeclaredTransforms", []):
+        return IacTools.SAM
+
+    return IacTools.CLOUDFORMATION
+
+
+def select_top_stacks(stack_managed_resources: Mapping[str, int], top_stacks: int) -> dict[str, int]:
+    """
+    Returns the managed resources of the `top_stacks` stacks with the most managed resources, and of the
+    other stacks combined under `OTHER_STACKS_DIMENSION_VALUE`. Ties are ordered by stack name.
+    """
+
+    selected_stacks = dict(
+        heapq.nsmallest(top_stacks, stack_managed_resources.items(), key=lambda item: (-item[1], item[0]))
+    )
+    other_stacks = len(stack_managed_resources) - len(selected_stacks)
+    if other_stacks > 0:
+        selected_stacks[OTHER_STACKS_DIMENSION_VALUE] = sum(stack_managed_resources.values()) - sum(
+            selected_stacks.values()
+        )
+
+    return selected_stacks
+
+
+def generate_stack_attribution_metric_data(
+    stack_attribution: StackAttribution, dimensions: list[dict[str, str]]
+) -> list[dict[str, Any]]:
+    """
+    Generates the managed resources metric data of the top stacks and of every IaC tool,
+    dimensioned by `Stack` or `IaCTool` in addition to `dimensions`
+    """
+
+    return [
+        *generate_dimension_metric_data(stack_attribution.stacks, STACK_DIMENSION_NAME, dimensions),
+        *generate_dimension_metric_data(stack_attribution.iac_tools, IAC_TOOL_DIMENSION_NAME, dimensions),
+    ]
+
+
+def generate_dimension_metric_data(
+    managed_resources: Mapping[str, int], dimension_name: str, dimensions: list[dict[str, str]]
+) -> list[dict[str, Any]]:
+    return [
+        {
+            "MetricName": MANAGED_RESOURCES_METRIC_NAME,
+            "Value": value,
+            "Unit": "Count",
+            "Dimensions": [*dimensions, {"Name": dimension_name, "Value": dimension_value}],
+        }
+        for dimension_value, value in sorted(managed_resources.items())
+    ]
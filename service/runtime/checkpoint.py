@@ -0,0 +1,123 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING, Any, Self
+
+from constants import CHECKPOINTS_PREFIX
+from pagination import ScanSlice
+from snapshot import ResourceSnapshot
+
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+
+SNAPSHOT_KEY_SUFFIX = ".snapshot"
+
+
+# pylint: disable=too-many-instance-attributes
+@dataclass
+class Checkpoint:
+    """
+    Progress of a metric extraction that stopped before listing every page of a resource scan
+
+    `scan_slices` are the scan slices that weren't listed entirely, their `next_token` is the token
+    of the first page that wasn't counted. The counters are the ones of the pages already counted,
+    by every invocation of the metric extraction of the resource scan so far.
+    """
+
+    scan_slices: list[ScanSlice]
+    # Metric counters serialized by `MetricCounters.to_json`
+    metric_counters: dict[str, Any]
+    resources_listed: int
+    invocations: int
+    resource_type_counts: dict[str, list[int]] | None = None
+    # Partition and keys of the objects of the resource export written by the previous invocations
+    export_prefix: str = ""
+    export_keys: list[str] | None = None
+    export_resources: int = 0
+    snapshot: ResourceSnapshot | None = field(default=None, repr=False)
+    # Stack attribution serialized by `StackAttribution.to_json`, computed by the first invocation
+    stack_attribution: dict[str, Any] | None = None
+    # Global resources serialized by `GlobalResourceSet.to_json`
+    global_resources: dict[str, Any] = field(default_factory=dict)
+    # Tag grouping serialized by `TagGrouping.to_json`
+    tag_grouping: dict[str, Any] = field(default_factory=dict)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "ScanSlices": [
+                {"ResourceTypePrefix": scan_slice.resource_type_prefix, "NextToken": scan_slice.next_token}
+                for scan_slice in self.scan_slices
+            ],
+            "MetricCounters": self.metric_counters,
+            "ResourcesListed": self.resources_listed,
+            "Invocations": self.invocations,
+            "ResourceTypeCounts": self.resource_type_counts,
+            "ExportPrefix": self.export_prefix,
+            "ExportKeys": self.export_keys,
+            "ExportResources": self.export_resources,
+            "Snapshot": self.snapshot is not None,
+            "StackAttribution": self.stack_attribution,
+            "GlobalResources": self.global_resources,
+            "TagGrouping": self.tag_grouping,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any], snapshot: ResourceSnapshot | None) -> Self:
+        return cls(
+            scan_slices=[
+                ScanSlice(
+                    resource_type_prefix=scan_slice["ResourceTypePrefix"], next_token=scan_slice["NextToken"]
+                )
+                for scan_slice in data["ScanSlices"]
+            ],
+            metric_counters=data["MetricCounters"],
+            resources_listed=data["ResourcesListed"],
+            invocations=data["Invocations"],
+            resource_type_counts=data["ResourceTypeCounts"],
+            export_prefix=data["ExportPrefix"],
+            export_keys=data["ExportKeys"],
+            export_resources=data["ExportResources"],
+            snapshot=snapshot,
+            stack_attribution=data["StackAttribution"],
+            global_resources=data["GlobalResources"],
+            tag_grouping=data["TagGrouping"],
+        )
+
+
+def save_checkpoint(s3_client: S3Client, bucket_name: str, key: str, checkpoint: Checkpoint) -> None:
+    # The snapshot of a large resource scan takes megabytes, so it's stored next to the checkpoint
+    if checkpoint.snapshot is not None:
+        s3_client.put_object(
+            Bucket=bucket_name, Key=f"{key}{SNAPSHOT_KEY_SUFFIX}", Body=checkpoint.snapshot.to_bytes()
+        )
+
+    s3_client.put_object(Bucket=bucket_name, Key=key, Body=json.dumps(checkpoint.to_json()).encode())
+
+
+def load_checkpoint(s3_client: S3Client, bucket_name: str, key: str) -> Checkpoint:
+    data = json.loads(s3_client.get_object(Bucket=bucket_name, Key=key)["Body"].read())
+
+    snapshot = None
+    if data["Snapshot"]:
+        response = s3_client.get_object(Bucket=bucket_name, Key=f"{key}{SNAPSHOT_KEY_SUFFIX}")
+        snapshot = ResourceSnapshot.from_bytes(response["Body"].read())
+
+    return Checkpoint.from_json(data, snapshot)
+
+
+def delete_checkpoint(s3_client: S3Client, bucket_name: str, key: str) -> None:
+    s3_client.delete_objects(
+        Bucket=bucket_name,
+        Delete={"Objects": [{"Key": key}, {"Key": f"{key}{SNAPSHOT_KEY_SUFFIX}"}], "Quiet": True},
+    )
+
+
+def generate_checkpoint_key(account_id: str, region: str, resource_scan_id: str) -> str:
+    # A resource scan ID is an ARN ending with `/<UUID>`
+    resource_scan_uuid = resource_scan_id.rsplit("/", maxsplit=1)[-1]
+    return f"{CHECKPOINTS_PREFIX}/{account_id}/{region}/{resource_scan_uuid}.json"
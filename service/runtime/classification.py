@@ -0,0 +1,194 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, Mapping, Sequence
+
+from counters import TOTAL_RESOURCES_SLOT
+from counters import MetricCounters
+from counters import MetricSlots
+from metrics import ALL_RESOURCES_METRIC_NAME
+from metrics import ScannedResourceKeys
+from metrics import generate_managed_metric_name
+from metrics import generate_total_metric_name
+from metrics import get_resource_type
+from metrics import validate_resource_type
+
+if TYPE_CHECKING:
+    from mypy_boto3_cloudformation.type_defs import ScannedResourceTypeDef
+
+
+# pylint: disable=too-few-public-methods
+class ResourceClassifier:
+    """
+    Classifies scanned resources into the total and managed metrics of the focused resource types
+
+    The focus and exclude lists are compiled once into hash lookups keyed by resource type, so
+    classifying a resource costs a single set lookup and a single dict lookup regardless of the focus
+    list size.
+    Resources are counted into the slots of `MetricCounters` created by `create_counters`.
+
+    With `all_resource_types`, every resource type that isn't excluded gets total and managed metrics,
+    not only the focused ones, counted in slots assigned to the resource types as they are seen.
+    """
+
+    def __init__(
+        self,
+        focus_resource_types: Iterable[str],
+        exclude_resource_types: Iterable[str],
+        all_resource_types: bool = False,
+    ) -> None:
+        self.excluded_resource_types = frozenset(exclude_resource_types)
+        self.all_resource_types = all_resource_types
+
+        self.total_resources_metric_name = generate_total_metric_name(ALL_RESOURCES_METRIC_NAME)
+        self.managed_resources_metric_name = generate_managed_metric_name(ALL_RESOURCES_METRIC_NAME)
+        self.metric_slots = MetricSlots()
+        self.metric_slots.add_pair(self.total_resources_metric_name, self.managed_resources_metric_name)
+
+        # Maps a focused resource type to its (total, managed) metric names
+        self.focus_metric_names: dict[str, tuple[str, str]] = {}
+        # Maps a resource type to the slot of its total metric, the focused resource types have fixed slots
+        self.resource_type_slots: dict[str, int] = {}
+        for resource_type in focus_resource_types:
+            self._add_focus_resource_type(resource_type)
+        self.metric_slots.fix()
+
+    def _add_focus_resource_type(self, resource_type: str) -> None:
+        if not validate_resource_type(resource_type):
+            raise ValueError(f"Invalid resource type: {resource_type}")
+
+        if resource_type in self.focus_metric_names:
+            return
+
+        metric_names = generate_resource_type_metric_names(resource_type)
+
+        self.focus_metric_names[resource_type] = metric_names
+        self.resource_type_slots[resource_type] = self.metric_slots.add_pair(*metric_names)
+
+    def create_counters(self) -> MetricCounters:
+        return MetricCounters(self.metric_slots)
+
+    def classify(
+        self, scanned_resources: Iterable[ScannedResourceTypeDef], metric_counters: MetricCounters
+    ) -> None:
+        """
+        Counts the total and managed resources of every metric in a single pass, adding them to
+        `metric_counters`, see `MetricCounters.to_metric_values` for the metrics present
+        """
+
+        if self.all_resource_types:
+            self._classify_all_resource_types(scanned_resources, metric_counters)
+            return
+
+        self._classify_focus_resource_types(scanned_resources, metric_counters)
+
+    def _classify_focus_resource_types(
+        self, scanned_resources: Iterable[ScannedResourceTypeDef], metric_counters: MetricCounters
+    ) -> None:
+        # The slots of the focused resource types are fixed, so the counters never grow here
+        values = metric_counters.grow()
+        resource_type_slots = self.resource_type_slots
+        total_resources, managed_resources = 0, 0
+
+        for scanned_resource in scanned_resources:
+            resource_type: str = scanned_resource.get(ScannedResourceKeys.ResourceType, "")  # type: ignore
+            if resource_type in self.excluded_resource_types:
+                continue
+
+            managed = bool(scanned_resource.get(ScannedResourceKeys.ManagedByStack, False))
+            total_resources += 1
+            managed_resources += managed
+
+            slot = resource_type_slots.get(resource_type)
+            if slot is not None:
+                values[slot] += 1
+                values[slot + 1] += managed
+
+        metric_counters.add_pair(TOTAL_RESOURCES_SLOT, total_resources, managed_resources)
+
+    def _classify_all_resource_types(
+        self, scanned_resources: Iterable[ScannedResourceTypeDef], metric_counters: MetricCounters
+    ) -> None:
+        self.classify_resource_type_counts(self.count_resource_types(scanned_resources), metric_counters)
+
+    def classify_resource_type_counts(
+        self, resource_type_counts: Mapping[str, Sequence[int]], metric_counters: MetricCounters
+    ) -> None:
+        """
+        Adds the metric values of `classify` from the (total, managed) counts of every resource type,
+        see `count_resource_types`
+        """
+
+        for resource_type, (total, managed) in resource_type_counts.items():
+            metric_counters.add_pair(TOTAL_RESOURCES_SLOT, total, managed)
+
+            slot = self.get_resource_type_slot(resource_type)
+            if slot is not None:
+                metric_counters.add_pair(slot, total, managed)
+
+    def count_resource_types(
+        self, scanned_resources: Iterable[ScannedResourceTypeDef]
+    ) -> dict[str, list[int]]:
+        """
+        Counts the total and managed resources of every resource type that isn't excluded in a single pass,
+        the counts are keyed by resource type
+        """
+
+        resource_type_counts: dict[str, list[int]] = {}
+
+        for scanned_resource in scanned_resources:
+            resource_type: str = scanned_resource.get(ScannedResourceKeys.ResourceType, "")  # type: ignore
+            if resource_type in self.excluded_resource_types:
+                continue
+
+            counts = resource_type_counts.get(resource_type)
+            if counts is None:
+                counts = resource_type_counts[resource_type] = [0, 0]
+            counts[0] += 1
+            counts[1] += bool(scanned_resource.get(ScannedResourceKeys.ManagedByStack, False))
+
+        return resource_type_counts
+
+    def get_resource_type_slot(self, resource_type: str) -> int | None:
+        """
+        Returns the slot of the total metric of a resource type, or `None` for a resource type
+        that has no metrics, which is a resource type that isn't focused unless in `all_resource_types` mode,
+        or one that doesn't have the `AWS::<Service>::<Resource>` form
+        """
+
+        slot = self.resource_type_slots.get(resource_type)
+        if slot is not None or not self.all_resource_types or not validate_resource_type(resource_type):
+            return slot
+
+        # Scan slices classified concurrently may both look up the slot of a new resource type,
+        # the layout assigns it only once
+        new_slot: int = self.metric_slots.add_pair(*generate_resource_type_metric_names(resource_type))
+        self.resource_type_slots[resource_type] = new_slot
+        return new_slot
+
+    def count_unmanaged_resources_by_resource_type(self, metric_values: Mapping[str, int]) -> dict[str, int]:
+        """
+        Returns the number of unmanaged resources of every resource type that has metrics in `metric_values`
+        """
+
+        unmanaged_resources = {}
+        metric_names = self.metric_slots.metric_names
+        for resource_type, slot in list(self.resource_type_slots.items()):
+            total_metric_name, managed_metric_name = metric_names[slot], metric_names[slot + 1]
+            if total_metric_name in metric_values:
+                unmanaged_resources[resource_type] = metric_values[total_metric_name] - metric_values.get(
+                    managed_metric_name, 0
+                )
+
+        return unmanaged_resources
+
+
+def generate_resource_type_metric_names(resource_type: str) -> tuple[str, str]:
+    parsed_resource_type = get_resource_type(resource_type)
+    if not parsed_resource_type.metric_name:
+        raise ValueError(f"Invalid resource type: {resource_type}")
+
+    metric_names: tuple[str, str] = parsed_resource_type.metric_names
+    return metric_names
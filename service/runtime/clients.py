@@ -0,0 +1,202 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import bisect
+import functools
+import os
+import threading
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING, Any
+
+import boto3
+from botocore.config import Config
+from constants import EnvVarsNames
+
+if TYPE_CHECKING:
+    from mypy_boto3_cloudformation.client import CloudFormationClient
+    from mypy_boto3_cloudwatch.client import CloudWatchClient
+    from mypy_boto3_resourcegroupstaggingapi.client import (
+        ResourceGroupsTaggingAPIClient,
+    )
+    from mypy_boto3_s3.client import S3Client
+    from mypy_boto3_sts.client import STSClient
+
+# The adaptive retry mode retries throttled requests and slows down the request rate of the client
+CLIENT_RETRY_MODE = os.getenv(EnvVarsNames.CLIENT_RETRY_MODE, "adaptive")
+CLIENT_MAX_ATTEMPTS = int(os.getenv(EnvVarsNames.CLIENT_MAX_ATTEMPTS, "10"))
+
+# The connection pool should be at least as large as the number of concurrent requests of a client
+CLIENT_MAX_POOL_CONNECTIONS = int(os.getenv(EnvVarsNames.CLIENT_MAX_POOL_CONNECTIONS, "10"))
+
+# Fails fast on unreachable endpoints and keeps idle connections alive between the pages of a resource scan
+CLIENT_CONNECT_TIMEOUT_SECONDS = int(os.getenv(EnvVarsNames.CLIENT_CONNECT_TIMEOUT_SECONDS, "5"))
+CLIENT_READ_TIMEOUT_SECONDS = int(os.getenv(EnvVarsNames.CLIENT_READ_TIMEOUT_SECONDS, "60"))
+CLIENT_TCP_KEEPALIVE = os.getenv(EnvVarsNames.CLIENT_TCP_KEEPALIVE, "true").lower() == "true"
+
+DEFAULT_CLIENT_CONFIG = Config(
+    connect_timeout=CLIENT_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=CLIENT_READ_TIMEOUT_SECONDS,
+    retries={"mode": CLIENT_RETRY_MODE, "total_max_attempts": CLIENT_MAX_ATTEMPTS},  # type: ignore
+    max_pool_connections=CLIENT_MAX_POOL_CONNECTIONS,
+    tcp_keepalive=CLIENT_TCP_KEEPALIVE,
+)
+
+# Upper bounds of the buckets of the latency histograms, calls slower than the last bound are counted
+# in an additional bucket
+LATENCY_BUCKET_BOUNDS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+START_CONTEXT_KEY = "client_statistics_start"
+OPERATION_CONTEXT_KEY = "client_statistics_operation"
+
+
+@dataclass
+class OperationStatistics:
+    """
+    Calls of an operation, `latency_buckets` counts the calls by `LATENCY_BUCKET_BOUNDS_MS` bucket
+    The latency of a call includes its retries, which are counted in `retries`
+    """
+
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    latency_buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKET_BOUNDS_MS) + 1))
+
+    def record(self, latency_ms: float, retries: int, error: bool) -> None:
+        self.calls += 1
+        self.errors += error
+        self.retries += retries
+        self.latency_buckets[bisect.bisect_left(LATENCY_BUCKET_BOUNDS_MS, latency_ms)] += 1
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "Calls": self.calls,
+            "Errors": self.errors,
+            "Retries": self.retries,
+            "LatencyMs": {
+                label: count
+                for label, count in zip(generate_latency_bucket_labels(), self.latency_buckets)
+                if count
+            },
+        }
+
+
+class ClientStatistics:
+    """
+    Calls of the operations of every instrumented client, keyed by `<service>.<operation>`
+
+    Clients are shared by the threads of the metric extraction, so recording is synchronized.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.operations: dict[str, OperationStatistics] = {}
+
+    def record(self, operation: str, latency_ms: float, retries: int, error: bool) -> None:
+        with self.lock:
+            self.operations.setdefault(operation, OperationStatistics()).record(latency_ms, retries, error)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.operations = {}
+
+    def to_payload(self) -> dict[str, Any]:
+        with self.lock:
+            return {operation: statistics.to_payload() for operation, statistics in self.operations.items()}
+
+
+# Statistics of the current invocation, handlers reset them at the start of every invocation
+CLIENT_STATISTICS = ClientStatistics()
+
+
+def generate_latency_bucket_labels() -> list[str]:
+    return [f"<={bound}" for bound in LATENCY_BUCKET_BOUNDS_MS] + [f">{LATENCY_BUCKET_BOUNDS_MS[-1]}"]
+
+
+def create_client_config(config: Config | None = None) -> Config:
+    """
+    Returns `DEFAULT_CLIENT_CONFIG` with the options of `config` taking precedence
+    """
+
+    if config is None:
+        return DEFAULT_CLIENT_CONFIG
+
+    merged_config: Config = DEFAULT_CLIENT_CONFIG.merge(config)
+    return merged_config
+
+
+def instrument_client(client: Any) -> Any:
+    """
+    Records the latency, retries and errors of every call of `client` in `CLIENT_STATISTICS`
+    """
+
+    client.meta.events.register("before-parameter-build", _record_call_start)
+    client.meta.events.register("after-call", _record_call)
+    client.meta.events.register("after-call-error", _record_call_error)
+    return client
+
+
+# Event handlers receive every argument of their event as a keyword argument
+# pylint: disable=unused-argument
+def _record_call_start(model: Any, context: dict[str, Any], **kwargs: Any) -> None:
+    context[OPERATION_CONTEXT_KEY] = f"{model.service_model.service_name}.{model.name}"
+    context[START_CONTEXT_KEY] = time.perf_counter()
+
+
+def _record_call(http_response: Any, parsed: dict[str, Any], context: dict[str, Any], **kwargs: Any) -> None:
+    retries = parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+    _record(context, retries, error=http_response.status_code >= 300)
+
+
+def _record_call_error(exception: Exception, context: dict[str, Any], **kwargs: Any) -> None:
+    # Connection errors and timeouts have no response to read the retries from, so they are not counted
+    _record(context, 0, error=True)
+
+
+def _record(context: dict[str, Any], retries: int, error: bool) -> None:
+    if START_CONTEXT_KEY not in context:
+        return
+
+    latency_ms = (time.perf_counter() - context[START_CONTEXT_KEY]) * 1000
+    CLIENT_STATISTICS.record(context[OPERATION_CONTEXT_KEY], latency_ms, retries, error)
+
+
+@functools.cache
+def get_client(service_name: str, config: Config | None = None) -> Any:
+    """
+    Creates a client the first time it's used and reuses it for the lifetime of the execution environment
+
+    Creating a client loads the service model of its service, so creating the clients at import time
+    delays every cold start, including the ones of invocations that never use some of the clients.
+    `config` is part of the cache key, so it should be a module-level constant.
+    """
+
+    return instrument_client(boto3.client(service_name, config=create_client_config(config)))  # type: ignore
+
+
+def get_cloudformation_client(config: Config | None = None) -> CloudFormationClient:
+    cloudformation_client: CloudFormationClient = get_client("cloudformation", config)
+    return cloudformation_client
+
+
+def get_cloudwatch_client(config: Config | None = None) -> CloudWatchClient:
+    cloudwatch_client: CloudWatchClient = get_client("cloudwatch", config)
+    return cloudwatch_client
+
+
+def get_tagging_client(config: Config | None = None) -> ResourceGroupsTaggingAPIClient:
+    tagging_client: ResourceGroupsTaggingAPIClient = get_client("resourcegroupstaggingapi", config)
+    return tagging_client
+
+
+def get_s3_client(config: Config | None = None) -> S3Client:
+    s3_client: S3Client = get_client("s3", config)
+    return s3_client
+
+
+def get_sts_client(config: Config | None = None) -> STSClient:
+    sts_client: STSClient = get_client("sts", config)
+    return sts_client
@@ -9,6 +9,87 @@ class EnvVarsNames:
     CLOUDWATCH_METRICS_NAMESPACE = "CLOUDWATCH_METRICS_NAMESPACE"
     ACCOUNT_ID = "ACCOUNT_ID"
     REGION = "REGION"
+    LIST_RESOURCES_CONCURRENCY = "LIST_RESOURCES_CONCURRENCY"
+    PAGE_PREFETCH_DEPTH = "PAGE_PREFETCH_DEPTH"
+    SCAN_DATA_BUCKET_NAME = "SCAN_DATA_BUCKET_NAME"
+    SCAN_SNAPSHOTS_ENABLED = "SCAN_SNAPSHOTS_ENABLED"
+    RESOURCE_EXPORT_ENABLED = "RESOURCE_EXPORT_ENABLED"
+    ALL_RESOURCE_TYPES_ENABLED = "ALL_RESOURCE_TYPES_ENABLED"
+    HIERARCHICAL_METRICS_ENABLED = "HIERARCHICAL_METRICS_ENABLED"
+    MANAGED_PERCENT_METRICS_ENABLED = "MANAGED_PERCENT_METRICS_ENABLED"
+    HISTORY_ENABLED = "HISTORY_ENABLED"
+    HISTORY_BUCKET_NAME = "HISTORY_BUCKET_NAME"
+    EXTRACTION_CHECKPOINT_MARGIN_SECONDS = "EXTRACTION_CHECKPOINT_MARGIN_SECONDS"
+    STACK_ATTRIBUTION_ENABLED = "STACK_ATTRIBUTION_ENABLED"
+    STACK_ATTRIBUTION_TOP_STACKS = "STACK_ATTRIBUTION_TOP_STACKS"
+    GLOBAL_RESOURCE_DEDUPLICATION_ENABLED = "GLOBAL_RESOURCE_DEDUPLICATION_ENABLED"
+    GLOBAL_RESOURCE_TYPE_PREFIXES = "GLOBAL_RESOURCE_TYPE_PREFIXES"
+    GLOBAL_RESOURCES_MAX_EXACT_KEYS = "GLOBAL_RESOURCES_MAX_EXACT_KEYS"
+    TAG_GROUPING_KEYS = "TAG_GROUPING_KEYS"
+    TAG_GROUPING_TOP_VALUES = "TAG_GROUPING_TOP_VALUES"
+    RESOURCE_TYPES_DASHBOARD_NAME = "RESOURCE_TYPES_DASHBOARD_NAME"
+    RESOURCE_TYPES_DASHBOARD_SIZE = "RESOURCE_TYPES_DASHBOARD_SIZE"
+    REUSE_RESOURCE_SCAN_MAX_AGE_MINUTES = "REUSE_RESOURCE_SCAN_MAX_AGE_MINUTES"
+    TARGET_ROLE_ARN_TEMPLATE = "TARGET_ROLE_ARN_TEMPLATE"
+    METRICS_PUBLISHING_MODE = "METRICS_PUBLISHING_MODE"
+    CLIENT_RETRY_MODE = "CLIENT_RETRY_MODE"
+    CLIENT_MAX_ATTEMPTS = "CLIENT_MAX_ATTEMPTS"
+    CLIENT_MAX_POOL_CONNECTIONS = "CLIENT_MAX_POOL_CONNECTIONS"
+    CLIENT_CONNECT_TIMEOUT_SECONDS = "CLIENT_CONNECT_TIMEOUT_SECONDS"
+    CLIENT_READ_TIMEOUT_SECONDS = "CLIENT_READ_TIMEOUT_SECONDS"
+    CLIENT_TCP_KEEPALIVE = "CLIENT_TCP_KEEPALIVE"
 
 
 RESOURCE_SCAN_ID_EVENT_KEY = "ResourceScanId"
+RESOURCES_SCANNED_EVENT_KEY = "ResourcesScanned"
+EXTRACTION_STATISTICS_PAYLOAD_KEY = "ExtractionStatistics"
+SCAN_FILTERS_EVENT_KEY = "ScanFilters"
+SCAN_TYPE_EVENT_KEY = "ScanType"
+WAIT_SECONDS_EVENT_KEY = "WaitSeconds"
+TARGET_ACCOUNT_ID_EVENT_KEY = "AccountId"
+TARGET_REGION_EVENT_KEY = "Region"
+TARGETS_EVENT_KEY = "Targets"
+RESULT_WRITER_DETAILS_EVENT_KEY = "ResultWriterDetails"
+METRIC_VALUES_PAYLOAD_KEY = "MetricValues"
+PUBLISHING_SUMMARY_PAYLOAD_KEY = "PublishingSummary"
+CLIENT_STATISTICS_PAYLOAD_KEY = "ClientStatistics"
+RESOURCE_EXPORT_PAYLOAD_KEY = "ResourceExport"
+UNMANAGED_RESOURCES_BY_RESOURCE_TYPE_PAYLOAD_KEY = "UnmanagedResourcesByResourceType"
+DASHBOARD_RESOURCE_TYPES_PAYLOAD_KEY = "DashboardResourceTypes"
+RESOURCE_TYPE_COUNTS_PAYLOAD_KEY = "ResourceTypeCounts"
+CHECKPOINT_EVENT_KEY = "Checkpoint"
+STACK_ATTRIBUTION_PAYLOAD_KEY = "StackAttribution"
+GLOBAL_RESOURCES_PAYLOAD_KEY = "GlobalResources"
+GLOBAL_RESOURCE_DEDUPLICATION_PAYLOAD_KEY = "GlobalResourceDeduplication"
+TAG_GROUPING_PAYLOAD_KEY = "TagGrouping"
+
+# Prefix of the scanned resources exported to the scan data bucket
+RESOURCE_EXPORT_PREFIX = "resources"
+
+# Prefix of the checkpoints of the metric extractions that stopped before listing an entire resource scan
+CHECKPOINTS_PREFIX = "checkpoints"
+
+
+# pylint: disable=too-few-public-methods
+class ScanTypes:
+    FULL = "FULL"
+    PARTIAL = "PARTIAL"
+
+
+# pylint: disable=too-few-public-methods
+class MetricsPublishingModes:
+    # The state machine publishes the metrics returned by the Lambda functions with a `PutMetricData` task
+    STATE_MACHINE = "STATE_MACHINE"
+    # The Lambda functions publish the metrics with batched `PutMetricData` requests
+    LAMBDA = "LAMBDA"
+    # The Lambda functions write the metrics to their logs in Embedded Metric Format
+    EMF = "EMF"
+
+
+# pylint: disable=too-few-public-methods
+class DashboardModes:
+    # A panel of metric queries and math expressions per focused resource type
+    STATIC = "STATIC"
+    # SEARCH expressions over the dimensioned metrics and the precomputed ManagedPercent metric,
+    # which cover every resource type found by the resource scans
+    SEARCH = "SEARCH"
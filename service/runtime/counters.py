@@ -0,0 +1,128 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import itertools
+import operator
+import threading
+from array import array
+from typing import Any, Mapping
+
+# Slot of the first metric of the metric pairs that are present whenever a resource was counted,
+# the pair in slots 0 and 1 holds the total and managed resources of every resource type
+TOTAL_RESOURCES_SLOT = 0
+
+
+class MetricSlots:
+    """
+    Layout of `MetricCounters`, which assigns every metric name a slot of the counters
+
+    Metrics are assigned in (total, managed) pairs, the managed metric of a pair is in the slot after the
+    total metric. The pairs assigned before `fix` are present whenever a resource was counted, the other
+    pairs are present once their total is counted. Slots are only ever added, so counters created with
+    fewer slots stay valid, and they are added under a lock since scan slices are classified concurrently.
+    """
+
+    __slots__ = ("metric_names", "metric_slots", "fixed_slots", "lock")
+
+    def __init__(self) -> None:
+        self.metric_names: list[str] = []
+        self.metric_slots: dict[str, int] = {}
+        self.fixed_slots = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.metric_names)
+
+    def add_pair(self, total_metric_name: str, managed_metric_name: str) -> int:
+        """
+        Returns the slot of the total metric of a pair, assigning slots to the pair on first use
+        """
+
+        slot = self.metric_slots.get(total_metric_name)
+        if slot is not None:
+            return slot
+
+        with self.lock:
+            slot = self.metric_slots.get(total_metric_name)
+            if slot is None:
+                slot = len(self.metric_names)
+                self.metric_names.extend((total_metric_name, managed_metric_name))
+                self.metric_slots[total_metric_name] = slot
+                self.metric_slots[managed_metric_name] = slot + 1
+
+        return slot
+
+    def fix(self) -> None:
+        self.fixed_slots = len(self.metric_names)
+
+
+class MetricCounters:
+    """
+    Metric values of an extraction, stored as 64-bit counters in an `array` indexed by the slots of a layout
+
+    Pages are counted in place, and counters of the same layout are merged slot by slot,
+    so no dictionary keyed by metric name is created until the metrics are published.
+    """
+
+    __slots__ = ("slots", "values")
+
+    def __init__(self, slots: MetricSlots) -> None:
+        self.slots = slots
+        self.values = array("q", bytes(len(slots) * array("q").itemsize))
+
+    def grow(self) -> array[int]:
+        """
+        Adds the slots assigned by the layout since the counters were created and returns the counters
+        """
+
+        missing_slots = len(self.slots) - len(self.values)
+        if missing_slots > 0:
+            self.values.extend(itertools.repeat(0, missing_slots))
+
+        return self.values
+
+    def add_pair(self, slot: int, total: int, managed: int) -> None:
+        values = self.values if slot < len(self.values) else self.grow()
+        values[slot] += total
+        values[slot + 1] += managed
+
+    def merge(self, other: MetricCounters) -> None:
+        if len(self.values) < len(other.values):
+            self.grow()
+
+        if len(self.values) == len(other.values):
+            self.values = array("q", map(operator.add, self.values, other.values))
+            return
+
+        for slot, value in enumerate(other.values):
+            self.values[slot] += value
+
+    def to_metric_values(self) -> dict[str, int]:
+        """
+        Returns the value of every present metric, see `MetricSlots`, or an empty dictionary
+        when no resource was counted
+        """
+
+        values, metric_names = self.values, self.slots.metric_names
+        if not values or values[TOTAL_RESOURCES_SLOT] == 0:
+            return {}
+
+        metric_values = dict(zip(metric_names[: self.slots.fixed_slots], values))
+        for slot in range(self.slots.fixed_slots, len(values), 2):
+            if values[slot]:
+                metric_values[metric_names[slot]] = values[slot]
+                metric_values[metric_names[slot + 1]] = values[slot + 1]
+
+        return metric_values
+
+    def to_json(self) -> dict[str, Any]:
+        # The slots of a layout depend on the order the resource types were seen, so names are kept alongside
+        return {"MetricNames": self.slots.metric_names[: len(self.values)], "Values": self.values.tolist()}
+
+    def merge_json(self, data: Mapping[str, Any]) -> None:
+        metric_names, values = data["MetricNames"], data["Values"]
+        for index in range(0, len(metric_names), 2):
+            slot = self.slots.add_pair(metric_names[index], metric_names[index + 1])
+            self.add_pair(slot, values[index], values[index + 1])
@@ -0,0 +1,279 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import base64
+import math
+import zlib
+from array import array
+from typing import TYPE_CHECKING, Any, Iterable, Mapping, Self
+
+from metrics import ALL_RESOURCES_METRIC_NAME
+from metrics import ScannedResourceKeys
+from metrics import generate_managed_metric_name
+from metrics import generate_total_metric_name
+from snapshot import MANAGED_BIT
+from snapshot import encode_scanned_resource
+
+if TYPE_CHECKING:
+    from mypy_boto3_cloudformation.type_defs import ScannedResourceTypeDef
+
+TOTAL_RESOURCES_METRIC_NAME = generate_total_metric_name(ALL_RESOURCES_METRIC_NAME)
+MANAGED_RESOURCES_METRIC_NAME = generate_managed_metric_name(ALL_RESOURCES_METRIC_NAME)
+
+# Resources of every account counted once, however many regions list its global resources
+UNIQUE_RESOURCES_METRIC_NAME = "UniqueResources"
+UNIQUE_RESOURCES_STANDARD_ERROR_METRIC_NAME = f"{UNIQUE_RESOURCES_METRIC_NAME}StandardError"
+
+# A sketch has 2^SKETCH_PRECISION one-byte registers, addressed by the highest bits of the 63-bit identity
+# of a resource key, which is the key without its `MANAGED_BIT`
+SKETCH_PRECISION = 14
+SKETCH_REGISTERS = 1 << SKETCH_PRECISION
+IDENTITY_BITS = 63
+SKETCH_VALUE_BITS = IDENTITY_BITS - SKETCH_PRECISION
+SKETCH_VALUE_MASK = (1 << SKETCH_VALUE_BITS) - 1
+
+# Bias correction constant of HyperLogLog for 128 registers or more
+SKETCH_ALPHA = 0.7213 / (1 + 1.079 / SKETCH_REGISTERS)
+
+# Relative standard error of the HyperLogLog estimate, about 0.8% with 2^14 registers
+SKETCH_RELATIVE_STANDARD_ERROR = 1.04 / math.sqrt(SKETCH_REGISTERS)
+
+
+class HyperLogLog:
+    """
+    Approximate count of distinct identities in a fixed 2^SKETCH_PRECISION bytes, however many identities
+    are added. Sketches of the same precision merge by keeping the highest rank of every register.
+    """
+
+    __slots__ = ("registers",)
+
+    def __init__(self, registers: bytearray | None = None) -> None:
+        self.registers = registers if registers is not None else bytearray(SKETCH_REGISTERS)
+
+    def add(self, identity: int) -> None:
+        index = identity >> SKETCH_VALUE_BITS
+        rank = SKETCH_VALUE_BITS - (identity & SKETCH_VALUE_MASK).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: HyperLogLog) -> None:
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> float:
+        raw_estimate = SKETCH_ALPHA * SKETCH_REGISTERS**2 / math.fsum(2.0**-rank for rank in self.registers)
+
+        # Linear counting is more accurate while many registers are still empty
+        empty_registers = self.registers.count(0)
+        if raw_estimate <= 2.5 * SKETCH_REGISTERS and empty_registers:
+            return SKETCH_REGISTERS * math.log(SKETCH_REGISTERS / empty_registers)
+
+        return raw_estimate
+
+    def to_json(self) -> str:
+        return encode_bytes(bytes(self.registers))
+
+    @classmethod
+    def from_json(cls, data: str) -> Self:
+        return cls(bytearray(decode_bytes(data)))
+
+
+# pylint: disable=too-many-instance-attributes
+class GlobalResourceSet:
+    """
+    Distinct resources of the global resource types, such as IAM roles, which the resource scan of every
+    region of an account lists again
+
+    Resources are tracked as the 64-bit keys of `encode_scanned_resource`, namespaced by account, in a
+    sorted `array` of at most `max_exact_keys` distinct keys. Beyond that, the set switches to HyperLogLog
+    sketches of the total and managed resources, whose size doesn't grow with the number of resources.
+    `resources` and `managed_resources` count every resource added, duplicates included. Without resource
+    type prefixes, no resources are added.
+    """
+
+    __slots__ = (
+        "max_exact_keys",
+        "resource_type_prefixes",
+        "namespace",
+        "keys",
+        "compacted_keys",
+        "sketches",
+        "resources",
+        "managed_resources",
+    )
+
+    def __init__(
+        self, max_exact_keys: int = 0, resource_type_prefixes: tuple[str, ...] = (), namespace: str = ""
+    ) -> None:
+        self.max_exact_keys = max_exact_keys
+        self.resource_type_prefixes = resource_type_prefixes
+        self.namespace = namespace
+        self.keys = array("Q")
+        # Number of keys after the last compaction, the keys are compacted again once they doubled
+        self.compacted_keys = 0
+        self.sketches: tuple[HyperLogLog, HyperLogLog] | None = None
+        self.resources = 0
+        self.managed_resources = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.resource_type_prefixes)
+
+    @property
+    def exact(self) -> bool:
+        return self.sketches is None
+
+    def create_empty(self) -> GlobalResourceSet:
+        return GlobalResourceSet(self.max_exact_keys, self.resource_type_prefixes, self.namespace)
+
+    def add(
+        self, scanned_resources: Iterable[ScannedResourceTypeDef], excluded_resource_types: frozenset[str]
+    ) -> None:
+        if not self.resource_type_prefixes:
+            return
+
+        keys = [
+            encode_scanned_resource(scanned_resource, self.namespace)
+            for scanned_resource in scanned_resources
+            if self.is_global_resource(scanned_resource, excluded_resource_types)
+        ]
+        self.resources += len(keys)
+        self.managed_resources += sum(key & MANAGED_BIT for key in keys)
+        self.add_keys(keys)
+
+    def is_global_resource(
+        self, scanned_resource: ScannedResourceTypeDef, excluded_resource_types: frozenset[str]
+    ) -> bool:
+        resource_type: str = scanned_resource.get(ScannedResourceKeys.ResourceType, "")  # type: ignore
+        prefixes = self.resource_type_prefixes
+        # Excluded resource types aren't part of the totals the duplicates are removed from
+        return resource_type not in excluded_resource_types and resource_type.startswith(prefixes)
+
+    def add_keys(self, keys: Iterable[int]) -> None:
+        if self.sketches is not None:
+            add_keys_to_sketches(self.sketches, keys)
+            return
+
+        self.keys.extend(keys)
+        if len(self.keys) > max(2 * self.compacted_keys, self.max_exact_keys):
+            self.compact()
+
+    def compact(self) -> None:
+        self.keys = array("Q", sorted(set(self.keys)))
+        self.compacted_keys = len(self.keys)
+        if len(self.keys) > self.max_exact_keys:
+            self.switch_to_sketches()
+
+    def switch_to_sketches(self) -> tuple[HyperLogLog, HyperLogLog]:
+        if self.sketches is None:
+            self.sketches = (HyperLogLog(), HyperLogLog())
+            add_keys_to_sketches(self.sketches, self.keys)
+            self.keys, self.compacted_keys = array("Q"), 0
+
+        return self.sketches
+
+    def merge(self, other: GlobalResourceSet) -> None:
+        self.resources += other.resources
+        self.managed_resources += other.managed_resources
+        if other.sketches is None:
+            self.add_keys(other.keys)
+            return
+
+        total_sketch, managed_sketch = self.switch_to_sketches()
+        total_sketch.merge(other.sketches[0])
+        managed_sketch.merge(other.sketches[1])
+
+    def count_unique(self) -> tuple[int, int, int]:
+        """
+        Returns the number of distinct total and managed resources, and the standard error of the total,
+        which is 0 while the set is exact
+        """
+
+        if self.sketches is not None:
+            total, managed = (round(sketch.estimate()) for sketch in self.sketches)
+            return total, managed, round(total * SKETCH_RELATIVE_STANDARD_ERROR)
+
+        # A resource listed as managed by a resource scan and unmanaged by another is counted once, as managed
+        self.compact()
+        identities: dict[int, int] = {}
+        for key in self.keys:
+            identities[key >> 1] = identities.get(key >> 1, 0) | key & MANAGED_BIT
+        return len(identities), sum(identities.values()), 0
+
+    def to_json(self) -> dict[str, Any]:
+        if self.sketches is None:
+            self.compact()
+
+        return {
+            "Resources": self.resources,
+            "ManagedResources": self.managed_resources,
+            "Keys": encode_bytes(self.keys.tobytes()) if self.sketches is None else None,
+            "Sketches": [sketch.to_json() for sketch in self.sketches] if self.sketches is not None else None,
+        }
+
+    @classmethod
+    def from_json(cls, data: Mapping[str, Any], max_exact_keys: int) -> Self:
+        global_resources = cls(max_exact_keys)
+        global_resources.resources = data["Resources"]
+        global_resources.managed_resources = data["ManagedResources"]
+        if data["Sketches"] is not None:
+            total_sketch, managed_sketch = (HyperLogLog.from_json(sketch) for sketch in data["Sketches"])
+            global_resources.sketches = (total_sketch, managed_sketch)
+        else:
+            global_resources.keys.frombytes(decode_bytes(data["Keys"]))
+            global_resources.compacted_keys = len(global_resources.keys)
+
+        return global_resources
+
+    def to_payload(self) -> dict[str, Any]:
+        unique_resources, unique_managed_resources, standard_error = self.count_unique()
+        return {
+            "Exact": self.exact,
+            "GlobalResources": self.resources,
+            "UniqueGlobalResources": unique_resources,
+            "UniqueManagedGlobalResources": unique_managed_resources,
+            "StandardError": standard_error,
+        }
+
+
+def add_keys_to_sketches(sketches: tuple[HyperLogLog, HyperLogLog], keys: Iterable[int]) -> None:
+    total_sketch, managed_sketch = sketches
+    for key in keys:
+        identity = key >> 1
+        total_sketch.add(identity)
+        if key & MANAGED_BIT:
+            managed_sketch.add(identity)
+
+
+def generate_unique_resources_metric_values(
+    metric_values: Mapping[str, int], global_resources: GlobalResourceSet | None
+) -> dict[str, int]:
+    """
+    Returns the total and managed resources with every global resource counted once, and the standard error
+    of the total, from metric values that summed the resource scans of every region
+    """
+
+    if global_resources is None or TOTAL_RESOURCES_METRIC_NAME not in metric_values:
+        return {}
+
+    unique_global_resources, unique_managed_global_resources, standard_error = global_resources.count_unique()
+    duplicate_resources = global_resources.resources - unique_global_resources
+    duplicate_managed_resources = global_resources.managed_resources - unique_managed_global_resources
+    return {
+        generate_total_metric_name(UNIQUE_RESOURCES_METRIC_NAME): (
+            metric_values[TOTAL_RESOURCES_METRIC_NAME] - duplicate_resources
+        ),
+        generate_managed_metric_name(UNIQUE_RESOURCES_METRIC_NAME): (
+            metric_values.get(MANAGED_RESOURCES_METRIC_NAME, 0) - duplicate_managed_resources
+        ),
+        UNIQUE_RESOURCES_STANDARD_ERROR_METRIC_NAME: standard_error,
+    }
+
+
+def encode_bytes(data: bytes) -> str:
+    return base64.b64encode(zlib.compress(data)).decode()
+
+
+def decode_bytes(data: str) -> bytes:
+    return zlib.decompress(base64.b64decode(data))
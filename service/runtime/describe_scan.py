@@ -1,14 +1,21 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+from __future__ import annotations
+
 import json
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import boto3
-from aws_lambda_powertools.utilities.typing import LambdaContext
+from clients import CLIENT_STATISTICS
+from constants import CLIENT_STATISTICS_PAYLOAD_KEY
 from constants import RESOURCE_SCAN_ID_EVENT_KEY
+from constants import WAIT_SECONDS_EVENT_KEY
+from polling import calculate_wait_seconds
+from targets import get_target_cloudformation_client
+from targets import get_target_event_values
 
-CLOUDFORMATION_CLIENT = boto3.client("cloudformation")
+if TYPE_CHECKING:
+    from aws_lambda_powertools.utilities.typing import LambdaContext
 
 
 # pylint: disable=unused-argument
@@ -17,9 +24,21 @@ def lambda_handler(event: dict[str, Any], context: LambdaContext) -> Any:
     if not resource_scan_id:
         raise ValueError("ResourceScanId is required")
 
+    CLIENT_STATISTICS.reset()
+    cloudformation_client = get_target_cloudformation_client(event)
+    resource_scan = cloudformation_client.describe_resource_scan(ResourceScanId=resource_scan_id)
+
+    # The state machine waits this long before describing the resource scan again if it's still in progress
+    wait_seconds = calculate_wait_seconds(resource_scan, event.get(WAIT_SECONDS_EVENT_KEY))
+
     return json.loads(
         json.dumps(
-            CLOUDFORMATION_CLIENT.describe_resource_scan(ResourceScanId=resource_scan_id),
+            {
+                **resource_scan,
+                WAIT_SECONDS_EVENT_KEY: wait_seconds,
+                CLIENT_STATISTICS_PAYLOAD_KEY: CLIENT_STATISTICS.to_payload(),
+                **get_target_event_values(event),
+            },
             default=str,
         )
     )
@@ -0,0 +1,232 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import contextlib
+import json
+import threading
+import zlib
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+from constants import RESOURCE_EXPORT_PREFIX
+from metrics import RESOURCE_TYPE_DELIMETER
+from metrics import ScannedResourceKeys
+
+if TYPE_CHECKING:
+    from mypy_boto3_cloudformation.type_defs import ScannedResourceTypeDef
+    from mypy_boto3_s3.client import S3Client
+    from mypy_boto3_s3.type_defs import CompletedPartTypeDef
+
+# S3 requires every part of a multipart upload but the last one to be at least 5 MiB,
+# a writer holds at most one part of compressed data in memory
+MULTIPART_UPLOAD_PART_SIZE = 8 * 1024 * 1024
+
+COMPRESSION_LEVEL = 6
+
+# Adding 16 to the window bits makes zlib write a gzip header and trailer
+GZIP_WINDOW_BITS = 16 + zlib.MAX_WBITS
+
+# Name of the object of a scan slice that covers the entire resource scan
+ENTIRE_RESOURCE_SCAN_OBJECT_NAME = "all"
+
+
+# pylint: disable=too-many-instance-attributes
+class ResourceExportWriter:
+    """
+    Streams scanned resources to an S3 object as gzip-compressed newline-delimited JSON
+
+    Compressed data is uploaded as the parts of a multipart upload as soon as a part is full, so the memory
+    of a writer is bounded by `MULTIPART_UPLOAD_PART_SIZE` regardless of the number of resources.
+    Objects smaller than a part are uploaded with a single `PutObject` request.
+    """
+
+    def __init__(self, s3_client: S3Client, bucket_name: str, key: str, resource_scan_id: str) -> None:
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key = key
+        self.resource_scan_id = resource_scan_id
+
+        self.compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, GZIP_WINDOW_BITS)
+        self.buffer = bytearray()
+        self.upload_id = ""
+        self.parts: list[CompletedPartTypeDef] = []
+        self.resources = 0
+
+    def write(self, scanned_resources: Iterable[ScannedResourceTypeDef]) -> None:
+        lines = [
+            json.dumps(
+                generate_resource_record(scanned_resource, self.resource_scan_id), separators=(",", ":")
+            )
+            for scanned_resource in scanned_resources
+        ]
+        if not lines:
+            return
+
+        self.resources += len(lines)
+        self.buffer += self.compressor.compress(("\n".join(lines) + "\n").encode())
+        if len(self.buffer) >= MULTIPART_UPLOAD_PART_SIZE:
+            self._upload_part()
+
+    def close(self) -> bool:
+        """
+        Uploads the remaining compressed data, returns whether an object was written
+        No object is written when no resource was written.
+        """
+
+        if self.resources == 0:
+            return False
+
+        self.buffer += self.compressor.flush()
+        if not self.upload_id:
+            self.s3_client.put_object(Bucket=self.bucket_name, Key=self.key, Body=bytes(self.buffer))
+            return True
+
+        self._upload_part()
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts},
+        )
+        return True
+
+    def abort(self) -> None:
+        # Parts of an incomplete multipart upload are stored until the upload is aborted
+        if self.upload_id:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id
+            )
+
+    def _upload_part(self) -> None:
+        if not self.upload_id:
+            self.upload_id = self.s3_client.create_multipart_upload(Bucket=self.bucket_name, Key=self.key)[
+                "UploadId"
+            ]
+
+        part_number = len(self.parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=bytes(self.buffer),
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+        self.buffer = bytearray()
+
+
+class ResourceExport:
+    """
+    Export of the resources of a resource scan to the objects of a partition, one object per scan slice
+
+    Scan slices are exported concurrently, so the written objects are tracked under a lock
+    to be deleted if the metric extraction falls back to listing the resource scan sequentially.
+    """
+
+    def __init__(
+        self, s3_client: S3Client, bucket_name: str, partition_prefix: str, resource_scan_id: str
+    ) -> None:
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.partition_prefix = partition_prefix
+        self.resource_scan_id = resource_scan_id
+
+        self.lock = threading.Lock()
+        self.keys: list[str] = []
+        self.resources = 0
+        # Invocation of a checkpointed metric extraction, every invocation writes objects of its own
+        self.invocation = 0
+
+    def create_writer(self, resource_type_prefix: str) -> ResourceExportWriter:
+        object_name = generate_export_object_name(
+            self.resource_scan_id, resource_type_prefix, self.invocation
+        )
+        key = f"{self.partition_prefix}/{object_name}"
+        return ResourceExportWriter(self.s3_client, self.bucket_name, key, self.resource_scan_id)
+
+    def restore(self, partition_prefix: str, keys: list[str], resources: int, invocation: int) -> None:
+        """
+        Restores the objects written by the previous invocations of a checkpointed metric extraction,
+        the partition is kept so that a resource scan resumed on the next day stays in a single partition
+        """
+
+        with self.lock:
+            self.partition_prefix = partition_prefix
+            self.keys = list(keys)
+            self.resources = resources
+            self.invocation = invocation
+
+    def record_written(self, writer: ResourceExportWriter) -> None:
+        with self.lock:
+            self.keys.append(writer.key)
+            self.resources += writer.resources
+
+    def delete_written(self) -> None:
+        with self.lock:
+            for key in self.keys:
+                self.s3_client.delete_object(Bucket=self.bucket_name, Key=key)
+            self.keys = []
+            self.resources = 0
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "Bucket": self.bucket_name,
+            "Prefix": self.partition_prefix,
+            "Objects": len(self.keys),
+            "Resources": self.resources,
+        }
+
+
+@contextlib.contextmanager
+def write_resource_export(
+    resource_export: ResourceExport | None, resource_type_prefix: str
+) -> Iterator[ResourceExportWriter | None]:
+    """
+    Yields a writer of the object of a scan slice, which is completed and recorded once the listing stops,
+    including when it stops at the deadline, so the object then holds the pages listed by this invocation
+    and the next one writes the remaining pages to an object of its own. The writer is aborted when the
+    listing raises. Yields `None` when the resources aren't exported.
+    """
+
+    if resource_export is None:
+        yield None
+        return
+
+    writer = resource_export.create_writer(resource_type_prefix)
+    try:
+        yield writer
+    except BaseException:
+        writer.abort()
+        raise
+
+    if writer.close():
+        resource_export.record_written(writer)
+
+
+def generate_resource_record(
+    scanned_resource: ScannedResourceTypeDef, resource_scan_id: str
+) -> dict[str, Any]:
+    return {
+        "resource_type": scanned_resource.get(ScannedResourceKeys.ResourceType, ""),
+        "resource_identifier": scanned_resource.get(ScannedResourceKeys.ResourceIdentifier, {}),
+        "managed_by_stack": bool(scanned_resource.get(ScannedResourceKeys.ManagedByStack, False)),
+        "resource_scan_id": resource_scan_id,
+    }
+
+
+def generate_partition_prefix(account_id: str, region: str, scan_date: str) -> str:
+    # Hive-style partitions, read by Athena and DuckDB as the `account_id`, `region` and `scan_date` columns
+    return f"{RESOURCE_EXPORT_PREFIX}/account_id={account_id}/region={region}/scan_date={scan_date}"
+
+
+def generate_export_object_name(resource_scan_id: str, resource_type_prefix: str, invocation: int = 0) -> str:
+    # A resource scan ID is an ARN ending with `/<UUID>`, which keeps the objects of every resource scan apart
+    resource_scan_uuid = resource_scan_id.rsplit("/", maxsplit=1)[-1]
+    slice_name = (
+        resource_type_prefix.replace(RESOURCE_TYPE_DELIMETER, "-") or ENTIRE_RESOURCE_SCAN_OBJECT_NAME
+    )
+    # A scan slice listed by several invocations has an object per invocation
+    if invocation:
+        slice_name = f"{slice_name}-{invocation}"
+    return f"{resource_scan_uuid}-{slice_name}.json.gz"
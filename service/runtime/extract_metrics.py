@@ -1,20 +1,97 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+from __future__ import annotations
+
 import json
+import logging
 import os
-from collections import defaultdict
-from typing import Any, DefaultDict
-
-import boto3
-from aws_lambda_powertools.utilities.typing import LambdaContext
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import timezone
+from typing import TYPE_CHECKING, Any, Mapping
+
+from attribution import StackAttribution
+from attribution import attribute_managed_resources
+from attribution import generate_stack_attribution_metric_data
+from botocore.config import Config
+from checkpoint import Checkpoint
+from checkpoint import delete_checkpoint
+from checkpoint import generate_checkpoint_key
+from checkpoint import load_checkpoint
+from checkpoint import save_checkpoint
+from classification import ResourceClassifier
+from clients import CLIENT_MAX_POOL_CONNECTIONS
+from clients import CLIENT_STATISTICS
+from clients import get_s3_client
+from constants import CHECKPOINT_EVENT_KEY
+from constants import CLIENT_STATISTICS_PAYLOAD_KEY
+from constants import DASHBOARD_RESOURCE_TYPES_PAYLOAD_KEY
+from constants import EXTRACTION_STATISTICS_PAYLOAD_KEY
+from constants import GLOBAL_RESOURCES_PAYLOAD_KEY
+from constants import METRIC_VALUES_PAYLOAD_KEY
+from constants import RESOURCE_EXPORT_PAYLOAD_KEY
 from constants import RESOURCE_SCAN_ID_EVENT_KEY
+from constants import RESOURCE_TYPE_COUNTS_PAYLOAD_KEY
+from constants import RESOURCES_SCANNED_EVENT_KEY
+from constants import SCAN_FILTERS_EVENT_KEY
+from constants import STACK_ATTRIBUTION_PAYLOAD_KEY
+from constants import TAG_GROUPING_PAYLOAD_KEY
+from constants import UNMANAGED_RESOURCES_BY_RESOURCE_TYPE_PAYLOAD_KEY
 from constants import EnvVarsNames
-from metrics import ManagedResourceMetrics
-from metrics import ScannedResourceKeys
-from mypy_boto3_cloudformation.type_defs import ScannedResourceTypeDef
-
-CLOUDFORMATION_CLIENT = boto3.client("cloudformation")
+from counters import MetricCounters
+from deduplication import GlobalResourceSet
+from export import ResourceExport
+from export import ResourceExportWriter
+from export import generate_partition_prefix
+from export import write_resource_export
+from hierarchy import generate_global_level_metric_data
+from hierarchy import generate_hierarchical_metric_data
+from hierarchy import merge_resource_type_counts
+from history import HistoryColumns
+from history import append_history
+from history import generate_history_key
+from metrics import get_resource_type_registry_statistics
+from pagination import ScanSlice
+from pagination import create_resource_type_prefix_scan_slices
+from pagination import list_scan_slice_pages_with_next_tokens
+from pipeline import PipelineStatistics
+from pipeline import prefetch
+from publishing import publish_metrics
+from resource_types_dashboard import update_resource_types_dashboard
+from snapshot import ResourceSnapshot
+from snapshot import load_resource_snapshot
+from snapshot import save_resource_snapshot
+from tagging import TAG_VALUE_CAPACITY_FACTOR
+from tagging import ResourceTagIndex
+from tagging import TagGrouping
+from tagging import generate_tag_grouping_metric_data
+from tagging import list_resource_tags
+from targets import Target
+from targets import get_target
+from targets import get_target_cloudformation_client
+from targets import get_target_tagging_client
+
+if TYPE_CHECKING:
+    from aws_lambda_powertools.utilities.typing import LambdaContext
+    from mypy_boto3_cloudformation.client import CloudFormationClient
+    from mypy_boto3_cloudformation.type_defs import ScannedResourceTypeDef
+
+LOGGER = logging.getLogger()
+
+# The number of scan slices listed concurrently, a value of 1 lists the entire scan sequentially
+LIST_RESOURCES_CONCURRENCY = int(os.getenv(EnvVarsNames.LIST_RESOURCES_CONCURRENCY, "1"))
+
+# The number of pages listed ahead of the page being classified, a value of 0 disables prefetching
+PAGE_PREFETCH_DEPTH = int(os.getenv(EnvVarsNames.PAGE_PREFETCH_DEPTH, "2"))
+
+# Every concurrently listed scan slice needs a connection of its own
+CLOUDFORMATION_CLIENT_CONFIG = Config(
+    max_pool_connections=max(CLIENT_MAX_POOL_CONNECTIONS, LIST_RESOURCES_CONCURRENCY)
+)
 
 RESOURCE_TYPE_FOCUS_LIST_JSON = os.getenv(EnvVarsNames.RESOURCE_TYPE_FOCUS_LIST_JSON, "[]")
 RESOURCE_TYPE_FOCUS_LIST = json.loads(RESOURCE_TYPE_FOCUS_LIST_JSON)
@@ -23,8 +100,156 @@ RESOURCE_TYPE_EXCLUDE_LIST_JSON = os.getenv(EnvVarsNames.RESOURCE_TYPE_EXCLUDE_L
 RESOURCE_TYPE_EXCLUDE_LIST = json.loads(RESOURCE_TYPE_EXCLUDE_LIST_JSON)
 
 CLOUDWATCH_METRICS_NAMESPACE = os.getenv(EnvVarsNames.CLOUDWATCH_METRICS_NAMESPACE)
-ACCOUNT_ID = os.getenv(EnvVarsNames.ACCOUNT_ID)
-REGION = os.getenv(EnvVarsNames.REGION)
+ACCOUNT_ID = os.getenv(EnvVarsNames.ACCOUNT_ID, "")
+REGION = os.getenv(EnvVarsNames.REGION, "")
+
+# The account and region the solution is deployed to, monitored when the event has no target
+DEFAULT_TARGET = Target(account_id=ACCOUNT_ID, region=REGION)
+
+# Whether to extract total and managed metrics for every resource type, not only the focused ones
+ALL_RESOURCE_TYPES_ENABLED = os.getenv(EnvVarsNames.ALL_RESOURCE_TYPES_ENABLED, "false").lower() == "true"
+
+RESOURCE_CLASSIFIER = ResourceClassifier(
+    RESOURCE_TYPE_FOCUS_LIST, RESOURCE_TYPE_EXCLUDE_LIST, all_resource_types=ALL_RESOURCE_TYPES_ENABLED
+)
+
+SCAN_DATA_BUCKET_NAME = os.getenv(EnvVarsNames.SCAN_DATA_BUCKET_NAME, "")
+
+# Whether to compare every resource scan with the snapshot of the previous one to extract drift metrics
+SCAN_SNAPSHOTS_ENABLED = os.getenv(EnvVarsNames.SCAN_SNAPSHOTS_ENABLED, "false").lower() == "true"
+
+# Whether to export the scanned resources of every full resource scan to the scan data bucket
+RESOURCE_EXPORT_ENABLED = os.getenv(EnvVarsNames.RESOURCE_EXPORT_ENABLED, "false").lower() == "true"
+
+# Whether to publish the total and managed resources of every service and resource type as dimensioned metrics
+HIERARCHICAL_METRICS_ENABLED = os.getenv(EnvVarsNames.HIERARCHICAL_METRICS_ENABLED, "false").lower() == "true"
+
+# Whether to append the resources of every resource type of every full resource scan to the adoption history
+HISTORY_ENABLED = os.getenv(EnvVarsNames.HISTORY_ENABLED, "false").lower() == "true"
+HISTORY_BUCKET_NAME = os.getenv(EnvVarsNames.HISTORY_BUCKET_NAME, "")
+
+# Hierarchical metrics and the adoption history both need the resources of every resource type
+RESOURCE_TYPES_COUNTED = HIERARCHICAL_METRICS_ENABLED or HISTORY_ENABLED
+
+# Number of seconds before the Lambda function times out at which the metric extraction stops listing pages
+# and saves a checkpoint to be resumed by the next invocation, a value of 0 disables checkpoints
+EXTRACTION_CHECKPOINT_MARGIN_SECONDS = int(os.getenv(EnvVarsNames.EXTRACTION_CHECKPOINT_MARGIN_SECONDS, "0"))
+
+# Whether to attribute the managed resources of every full resource scan to their stacks and IaC tools,
+# and the number of stacks with the most managed resources that get a metric of their own
+STACK_ATTRIBUTION_ENABLED = os.getenv(EnvVarsNames.STACK_ATTRIBUTION_ENABLED, "false").lower() == "true"
+STACK_ATTRIBUTION_TOP_STACKS = int(os.getenv(EnvVarsNames.STACK_ATTRIBUTION_TOP_STACKS, "10"))
+
+# Whether to track the global resources of every full resource scan, which the resource scan of every region
+# lists again, for the fan-out orchestration to count them once. The keys of at most
+# GLOBAL_RESOURCES_MAX_EXACT_KEYS distinct global resources are kept in the payload, beyond that HyperLogLog
+# sketches of them
+GLOBAL_RESOURCE_DEDUPLICATION_ENABLED = (
+    os.getenv(EnvVarsNames.GLOBAL_RESOURCE_DEDUPLICATION_ENABLED, "false").lower() == "true"
+)
+GLOBAL_RESOURCE_TYPE_PREFIXES = tuple(json.loads(os.getenv(EnvVarsNames.GLOBAL_RESOURCE_TYPE_PREFIXES, "[]")))
+GLOBAL_RESOURCES_MAX_EXACT_KEYS = int(os.getenv(EnvVarsNames.GLOBAL_RESOURCES_MAX_EXACT_KEYS, "4096"))
+
+# Tag keys whose values group the total and managed resources of every full resource scan, and the number
+# of values of every tag key with the most resources that get a metric of their own
+TAG_GROUPING_KEYS = tuple(json.loads(os.getenv(EnvVarsNames.TAG_GROUPING_KEYS, "[]")))
+TAG_GROUPING_TOP_VALUES = int(os.getenv(EnvVarsNames.TAG_GROUPING_TOP_VALUES, "10"))
+
+SNAPSHOTS_PREFIX = "snapshots"
+SNAPSHOT_OBJECT_NAME = "resources.snapshot"
+
+
+# pylint: disable=too-many-instance-attributes
+@dataclass
+class Extraction:
+    """
+    State accumulated while extracting metrics from a resource scan, or from a slice of one
+    """
+
+    metric_counters: MetricCounters = field(default_factory=RESOURCE_CLASSIFIER.create_counters)
+    resources_listed: int = 0
+    statistics: PipelineStatistics = field(default_factory=PipelineStatistics)
+    snapshot: ResourceSnapshot | None = None
+    # Shared by the extractions of every scan slice, each scan slice is exported to an object of its own
+    export: ResourceExport | None = None
+    # Maps every resource type to its (total, managed) counts, kept for the hierarchical metrics
+    resource_type_counts: dict[str, list[int]] | None = None
+    # `time.perf_counter()` value after which no more pages are listed, `None` lists every page
+    deadline: float | None = None
+    # Number of the previous invocations of a checkpointed metric extraction
+    invocation: int = 0
+    # Scan slices whose listing stopped at the deadline, with the token of their first page not listed
+    incomplete_slices: list[ScanSlice] = field(default_factory=list)
+    stack_attribution: StackAttribution | None = None
+    # Tracks no resources unless the deduplication of global resources is enabled
+    global_resources: GlobalResourceSet = field(default_factory=GlobalResourceSet)
+    # Groups no resources unless tag keys are configured
+    tag_grouping: TagGrouping = field(default_factory=TagGrouping)
+
+    def create_slice_extraction(self) -> "Extraction":
+        return Extraction(
+            snapshot=ResourceSnapshot() if self.snapshot is not None else None,
+            export=self.export,
+            resource_type_counts={} if self.resource_type_counts is not None else None,
+            global_resources=self.global_resources.create_empty(),
+            tag_grouping=self.tag_grouping.create_empty(),
+            deadline=self.deadline,
+            invocation=self.invocation,
+        )
+
+    def is_past_deadline(self) -> bool:
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def to_checkpoint(self) -> Checkpoint:
+        return Checkpoint(
+            scan_slices=self.incomplete_slices,
+            metric_counters=self.metric_counters.to_json(),
+            resources_listed=self.resources_listed,
+            invocations=self.invocation + 1,
+            resource_type_counts=self.resource_type_counts,
+            export_prefix=self.export.partition_prefix if self.export is not None else "",
+            export_keys=self.export.keys if self.export is not None else None,
+            export_resources=self.export.resources if self.export is not None else 0,
+            snapshot=self.snapshot,
+            stack_attribution=(
+                self.stack_attribution.to_json() if self.stack_attribution is not None else None
+            ),
+            global_resources=self.global_resources.to_json(),
+            tag_grouping=self.tag_grouping.to_json(),
+        )
+
+    def restore(self, checkpoint: Checkpoint) -> None:
+        # The checkpoint was saved by the same Lambda function, so it tracks the same optional state
+        self.metric_counters.merge_json(checkpoint.metric_counters)
+        self.resources_listed = checkpoint.resources_listed
+        self.invocation = checkpoint.invocations
+        self.snapshot = checkpoint.snapshot
+        self.resource_type_counts = checkpoint.resource_type_counts
+        if checkpoint.stack_attribution is not None:
+            self.stack_attribution = StackAttribution.from_json(checkpoint.stack_attribution)
+        self.global_resources.merge(
+            GlobalResourceSet.from_json(checkpoint.global_resources, self.global_resources.max_exact_keys)
+        )
+        self.tag_grouping.merge(TagGrouping.from_json(checkpoint.tag_grouping, self.tag_grouping.capacity))
+        if self.export is not None:
+            self.export.restore(
+                checkpoint.export_prefix,
+                checkpoint.export_keys or [],
+                checkpoint.export_resources,
+                checkpoint.invocations,
+            )
+
+    def merge(self, other: "Extraction") -> None:
+        self.metric_counters.merge(other.metric_counters)
+        self.resources_listed += other.resources_listed
+        self.statistics.merge(other.statistics)
+        if self.snapshot is not None and other.snapshot is not None:
+            self.snapshot.extend(other.snapshot)
+        if self.resource_type_counts is not None and other.resource_type_counts is not None:
+            merge_resource_type_counts(self.resource_type_counts, other.resource_type_counts)
+        self.global_resources.merge(other.global_resources)
+        self.tag_grouping.merge(other.tag_grouping)
+        self.incomplete_slices.extend(other.incomplete_slices)
 
 
 # pylint: disable=unused-argument
@@ -34,84 +259,509 @@ def lambda_handler(event: dict[str, Any], context: LambdaContext) -> dict[str, A
     if not resource_scan_id:
         raise ValueError("ResourceScanId is required")
 
-    metrics_to_collect = construct_metric_to_collect_list()
-    metric_values = extract_metrics_from_resource_scan(resource_scan_id, metrics_to_collect)
-    metrics = generate_cloudwatch_metrics(metric_values)
+    start = time.perf_counter()
+    CLIENT_STATISTICS.reset()
+    partial_scan = is_partial_scan(event)
+    target = get_target(event) or DEFAULT_TARGET
+    cloudformation_client = get_target_cloudformation_client(event, CLOUDFORMATION_CLIENT_CONFIG)
+
+    extraction, scan_slices = start_extraction(event, partial_scan, resource_scan_id, target)
+    extraction.deadline = get_extraction_deadline(context)
+    add_stack_attribution(extraction, cloudformation_client, partial_scan)
+    add_resource_tags(extraction, event)
+    extraction = extract_metrics_from_event(
+        event, resource_scan_id, cloudformation_client, extraction, scan_slices
+    )
+    extraction_statistics = {
+        **extraction.statistics.to_payload(),
+        "Invocations": extraction.invocation + 1,
+        "ResourceTypeRegistry": get_resource_type_registry_statistics(),
+        "TotalSeconds": round(time.perf_counter() - start, 3),
+    }
 
-    return metrics
+    if extraction.incomplete_slices:
+        return save_extraction_checkpoint(event, extraction, extraction_statistics, target)
+    delete_extraction_checkpoint(event)
 
+    metric_values = complete_metric_values(extraction, partial_scan, target)
 
-def construct_metric_to_collect_list() -> list[ManagedResourceMetrics]:
-    metrics_to_collect = [ManagedResourceMetrics("Resources", all_resources_predicate)]
+    metrics = generate_cloudwatch_metrics(metric_values, target)
+    add_managed_percent_metrics(metrics, metric_values, target)
+    add_hierarchical_metrics(metrics, extraction.resource_type_counts, target)
+    append_adoption_history(extraction.resource_type_counts, target)
+    add_stack_attribution_metrics(metrics, extraction.stack_attribution, target)
+    add_global_resources_payload(metrics, extraction.global_resources)
+    add_tag_grouping_metrics(metrics, extraction.tag_grouping, target)
+    metrics[EXTRACTION_STATISTICS_PAYLOAD_KEY] = extraction_statistics
+    add_optional_payloads(metrics, extraction.export, metric_values, partial_scan, event)
+    metrics[CLIENT_STATISTICS_PAYLOAD_KEY] = CLIENT_STATISTICS.to_payload()
 
-    focus_managed_resource_metrics = map(ManagedResourceMetrics.from_resource_type, RESOURCE_TYPE_FOCUS_LIST)
-    metrics_to_collect.extend(focus_managed_resource_metrics)
+    # The metric values are kept in the payload to be rolled up by the fan-out orchestration
+    metrics[METRIC_VALUES_PAYLOAD_KEY] = metric_values
 
-    return metrics_to_collect
+    payload: dict[str, Any] = publish_metrics(metrics)
+    return payload
 
 
-# pylint: disable=unused-argument
-def all_resources_predicate(scanned_resource: ScannedResourceTypeDef) -> bool:
-    return True
+def get_extraction_deadline(context: LambdaContext) -> float | None:
+    if EXTRACTION_CHECKPOINT_MARGIN_SECONDS <= 0:
+        return None
+
+    remaining_seconds = context.get_remaining_time_in_millis() / 1000
+    return time.perf_counter() + remaining_seconds - EXTRACTION_CHECKPOINT_MARGIN_SECONDS
+
+
+def start_extraction(
+    event: dict[str, Any], partial_scan: bool, resource_scan_id: str, target: Target
+) -> tuple[Extraction, list[ScanSlice] | None]:
+    """
+    Returns a new extraction and `None` as the scan slices to list, which lists the entire resource scan,
+    or the extraction and the remaining scan slices of the checkpoint of the event
+    """
+
+    extraction = create_extraction(partial_scan, resource_scan_id, target)
+    if CHECKPOINT_EVENT_KEY not in event:
+        return extraction, None
+
+    checkpoint = load_checkpoint(get_s3_client(), SCAN_DATA_BUCKET_NAME, event[CHECKPOINT_EVENT_KEY])
+    extraction.restore(checkpoint)
+    return extraction, checkpoint.scan_slices
+
+
+def save_extraction_checkpoint(
+    event: dict[str, Any], extraction: Extraction, extraction_statistics: dict[str, Any], target: Target
+) -> dict[str, Any]:
+    """
+    Saves the progress of the extraction and returns the event of the invocation that resumes it,
+    which is the current event with the key of the checkpoint
+    """
+
+    checkpoint_key = generate_checkpoint_key(
+        target.account_id, target.region, event[RESOURCE_SCAN_ID_EVENT_KEY]
+    )
+    save_checkpoint(get_s3_client(), SCAN_DATA_BUCKET_NAME, checkpoint_key, extraction.to_checkpoint())
+    LOGGER.info(
+        "Listed %d resources before the deadline, %d scan slices remain",
+        extraction.resources_listed,
+        len(extraction.incomplete_slices),
+    )
+
+    return {
+        **event,
+        CHECKPOINT_EVENT_KEY: checkpoint_key,
+        EXTRACTION_STATISTICS_PAYLOAD_KEY: extraction_statistics,
+        CLIENT_STATISTICS_PAYLOAD_KEY: CLIENT_STATISTICS.to_payload(),
+    }
+
+
+def delete_extraction_checkpoint(event: dict[str, Any]) -> None:
+    if CHECKPOINT_EVENT_KEY in event:
+        delete_checkpoint(get_s3_client(), SCAN_DATA_BUCKET_NAME, event[CHECKPOINT_EVENT_KEY])
+
+
+def add_managed_percent_metrics(
+    metrics: dict[str, Any], metric_values: Mapping[str, int], target: Target
+) -> None:
+    dimensions = generate_cloudwatch_dimensions(target)
+    metrics["MetricData"].extend(generate_global_level_metric_data(metric_values, dimensions))
+
+
+def add_hierarchical_metrics(
+    metrics: dict[str, Any], resource_type_counts: dict[str, list[int]] | None, target: Target
+) -> None:
+    # Resource types are also counted for the adoption history
+    if resource_type_counts is None or not HIERARCHICAL_METRICS_ENABLED:
+        return
+
+    dimensions = generate_cloudwatch_dimensions(target)
+    metrics["MetricData"].extend(generate_hierarchical_metric_data(resource_type_counts, dimensions))
+
+    # The counts are kept in the payload to be rolled up by the fan-out orchestration
+    metrics[RESOURCE_TYPE_COUNTS_PAYLOAD_KEY] = resource_type_counts
+
+
+def add_stack_attribution(
+    extraction: Extraction, cloudformation_client: CloudFormationClient, partial_scan: bool
+) -> None:
+    """
+    Attributes the managed resources to their stacks before the first page is listed, so that the time
+    it takes counts towards the deadline of the first invocation. Later invocations restore it from the
+    checkpoint, and partial resource scans only refresh the focused resource types.
+    """
+
+    if not STACK_ATTRIBUTION_ENABLED or partial_scan or extraction.invocation > 0:
+        return
+
+    extraction.stack_attribution = attribute_managed_resources(
+        cloudformation_client,
+        RESOURCE_CLASSIFIER.excluded_resource_types,
+        STACK_ATTRIBUTION_TOP_STACKS,
+        LIST_RESOURCES_CONCURRENCY,
+    )
+
+
+def add_stack_attribution_metrics(
+    metrics: dict[str, Any], stack_attribution: StackAttribution | None, target: Target
+) -> None:
+    if stack_attribution is None:
+        return
+
+    dimensions = generate_cloudwatch_dimensions(target)
+    metrics["MetricData"].extend(generate_stack_attribution_metric_data(stack_attribution, dimensions))
+
+    # The managed resources of every IaC tool are rolled up by the fan-out orchestration
+    metrics[STACK_ATTRIBUTION_PAYLOAD_KEY] = stack_attribution.to_json()
+
+
+def add_resource_tags(extraction: Extraction, event: dict[str, Any]) -> None:
+    """
+    Lists the tags of the resources before the first page is listed, like the stack attribution. The tag index
+    isn't part of the checkpoint, so every invocation lists the tags again, and partial resource scans don't
+    group their resources.
+    """
+
+    if not extraction.tag_grouping.enabled:
+        return
+
+    list_resource_tags(get_target_tagging_client(event), extraction.tag_grouping.tag_index)
+
+
+def add_tag_grouping_metrics(metrics: dict[str, Any], tag_grouping: TagGrouping, target: Target) -> None:
+    if not tag_grouping.enabled:
+        return
+
+    dimensions = generate_cloudwatch_dimensions(target)
+    metrics["MetricData"].extend(
+        generate_tag_grouping_metric_data(tag_grouping, TAG_GROUPING_TOP_VALUES, dimensions)
+    )
+
+    # The resources of every tag value are rolled up by the fan-out orchestration
+    metrics[TAG_GROUPING_PAYLOAD_KEY] = tag_grouping.to_json()
+
+
+def add_global_resources_payload(metrics: dict[str, Any], global_resources: GlobalResourceSet) -> None:
+    if not global_resources.enabled:
+        return
+
+    # The global resources of every region are deduplicated by the fan-out orchestration
+    metrics[GLOBAL_RESOURCES_PAYLOAD_KEY] = global_resources.to_json()
+
+
+def add_optional_payloads(
+    metrics: dict[str, Any],
+    export: ResourceExport | None,
+    metric_values: Mapping[str, int],
+    partial_scan: bool,
+    event: dict[str, Any],
+) -> None:
+    if export is not None:
+        metrics[RESOURCE_EXPORT_PAYLOAD_KEY] = export.to_payload()
+
+    # A partial resource scan only lists the focused resource types
+    if ALL_RESOURCE_TYPES_ENABLED and not partial_scan:
+        add_resource_types_payloads(metrics, metric_values, event)
+
+
+def add_resource_types_payloads(
+    metrics: dict[str, Any], metric_values: Mapping[str, int], event: dict[str, Any]
+) -> None:
+    unmanaged_resources = RESOURCE_CLASSIFIER.count_unmanaged_resources_by_resource_type(metric_values)
+    metrics[UNMANAGED_RESOURCES_BY_RESOURCE_TYPE_PAYLOAD_KEY] = unmanaged_resources
+
+    # The dashboard of a fan-out orchestration is updated with the rolled up metrics of every target
+    if get_target(event) is None:
+        metrics[DASHBOARD_RESOURCE_TYPES_PAYLOAD_KEY] = update_resource_types_dashboard(
+            unmanaged_resources, generate_cloudwatch_dimensions(DEFAULT_TARGET)
+        )
+
+
+def create_extraction(partial_scan: bool, resource_scan_id: str, target: Target) -> Extraction:
+    # Snapshots of partial resource scans would be compared with snapshots of full resource scans,
+    # exports of partial resource scans would mix with the exports of full resource scans,
+    # and the services and history of partial resource scans would only count the focused resource types
+    if partial_scan:
+        return Extraction()
+
+    return Extraction(
+        snapshot=ResourceSnapshot() if SCAN_SNAPSHOTS_ENABLED else None,
+        export=create_resource_export(resource_scan_id, target) if RESOURCE_EXPORT_ENABLED else None,
+        resource_type_counts={} if RESOURCE_TYPES_COUNTED else None,
+        global_resources=create_global_resource_set(target),
+        tag_grouping=TagGrouping(
+            ResourceTagIndex(TAG_GROUPING_KEYS), TAG_GROUPING_TOP_VALUES * TAG_VALUE_CAPACITY_FACTOR
+        ),
+    )
+
+
+def create_global_resource_set(target: Target) -> GlobalResourceSet:
+    if not GLOBAL_RESOURCE_DEDUPLICATION_ENABLED:
+        return GlobalResourceSet()
+
+    return GlobalResourceSet(
+        GLOBAL_RESOURCES_MAX_EXACT_KEYS, GLOBAL_RESOURCE_TYPE_PREFIXES, namespace=target.account_id
+    )
+
+
+def create_resource_export(resource_scan_id: str, target: Target) -> ResourceExport:
+    scan_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    return ResourceExport(
+        get_s3_client(),
+        SCAN_DATA_BUCKET_NAME,
+        generate_partition_prefix(target.account_id, target.region, scan_date),
+        resource_scan_id,
+    )
+
+
+def complete_metric_values(extraction: Extraction, partial_scan: bool, target: Target) -> dict[str, int]:
+    metric_values: dict[str, int] = extraction.metric_counters.to_metric_values()
+    if extraction.snapshot is not None:
+        metric_values.update(extract_drift_metrics(extraction.snapshot, target))
+
+    # A partial resource scan only lists the focused resource types, so the overall metrics are left
+    # to the full resource scans
+    if partial_scan:
+        remove_overall_metric_values(metric_values, RESOURCE_CLASSIFIER)
+
+    return metric_values
+
+
+def extract_metrics_from_event(
+    event: dict[str, Any],
+    resource_scan_id: str,
+    cloudformation_client: CloudFormationClient,
+    extraction: Extraction,
+    scan_slices: list[ScanSlice] | None = None,
+) -> Extraction:
+    """
+    Lists `scan_slices`, or the entire resource scan when `None`, concurrently when they are resource type
+    prefix slices. A checkpointed extraction resumes in the mode it started in.
+    """
+
+    scan_slices = scan_slices or create_scan_slices()
+    if any(scan_slice.resource_type_prefix for scan_slice in scan_slices):
+        resources_scanned = get_resources_scanned(event, resource_scan_id, cloudformation_client)
+        return extract_metrics_from_resource_scan_concurrently(
+            resource_scan_id,
+            cloudformation_client,
+            RESOURCE_CLASSIFIER,
+            resources_scanned,
+            extraction,
+            scan_slices,
+        )
+
+    extract_metrics_from_resource_scan(
+        resource_scan_id, cloudformation_client, RESOURCE_CLASSIFIER, extraction, scan_slices[0]
+    )
+    return extraction
+
+
+def create_scan_slices() -> list[ScanSlice]:
+    if LIST_RESOURCES_CONCURRENCY > 1:
+        scan_slices: list[ScanSlice] = create_resource_type_prefix_scan_slices()
+        return scan_slices
+
+    return [ScanSlice()]
 
 
 def extract_metrics_from_resource_scan(
     resource_scan_id: str,
-    metrics_to_collect: list[ManagedResourceMetrics],
-) -> DefaultDict[str, int]:
-    metric_values: DefaultDict[str, int] = defaultdict(int)
-    next_token = ""
-    while True:
-        # The first call to `list_resource_scan_resources` must not include `NextToken` argument
-        # The second call onward must include `NextToken` argument
-        #
-        # The response from `list_resource_scan_resources` contains a `NextToken` which
-        # should be used to retrieve the next page of results.
-        response = CLOUDFORMATION_CLIENT.list_resource_scan_resources(
-            ResourceScanId=resource_scan_id,
-            **({"NextToken": next_token} if next_token else {}),  # type: ignore
+    cloudformation_client: CloudFormationClient,
+    resource_classifier: ResourceClassifier,
+    extraction: Extraction,
+    scan_slice: ScanSlice | None = None,
+) -> None:
+    extract_metrics_from_scan_slice(
+        resource_scan_id, cloudformation_client, scan_slice or ScanSlice(), resource_classifier, extraction
+    )
+
+
+def extract_metrics_from_resource_scan_concurrently(
+    resource_scan_id: str,
+    cloudformation_client: CloudFormationClient,
+    resource_classifier: ResourceClassifier,
+    resources_scanned: int,
+    extraction: Extraction,
+    scan_slices: list[ScanSlice],
+) -> Extraction:
+    """
+    Lists disjoint slices of the resource scan on a thread pool and merges their extractions
+
+    Falls back to listing the resource scan sequentially if the slices did not list exactly
+    the number of resources the resource scan reports, since the merged metric values would
+    then differ from the ones of the sequential path. The number of listed resources is only checked
+    once every slice was listed entirely, possibly by several invocations of a checkpointed extraction.
+    The timings of the pipeline statistics are summed over the slices.
+    """
+
+    def extract_metrics_from_scan_slice_of_resource_scan(scan_slice: ScanSlice) -> Extraction:
+        slice_extraction = extraction.create_slice_extraction()
+        extract_metrics_from_scan_slice(
+            resource_scan_id, cloudformation_client, scan_slice, resource_classifier, slice_extraction
         )
-        next_token = response.get("NextToken", "")
+        return slice_extraction
+
+    with ThreadPoolExecutor(max_workers=LIST_RESOURCES_CONCURRENCY) as executor:
+        for slice_extraction in executor.map(extract_metrics_from_scan_slice_of_resource_scan, scan_slices):
+            extraction.merge(slice_extraction)
 
-        current_page_metric_values = extract_metric_values_from_scanned_resources(
-            response["Resources"], metrics_to_collect
+    if not extraction.incomplete_slices and extraction.resources_listed != resources_scanned:
+        LOGGER.warning(
+            "Scan slices listed %d resources but the resource scan has %d, listing sequentially",
+            extraction.resources_listed,
+            resources_scanned,
         )
+        if extraction.export is not None:
+            extraction.export.delete_written()
+        # The listing restarts from scratch, but the stack attribution was computed before the first page
+        # and the statistics keep the time spent listing the slices
+        sequential_extraction = extraction.create_slice_extraction()
+        sequential_extraction.stack_attribution = extraction.stack_attribution
+        sequential_extraction.statistics = extraction.statistics
+        extract_metrics_from_resource_scan(
+            resource_scan_id, cloudformation_client, resource_classifier, sequential_extraction
+        )
+        return sequential_extraction
 
-        for metric_name, value in current_page_metric_values.items():
-            metric_values[metric_name] += value
+    return extraction
 
-        if is_last_page(next_token):
-            break
 
-    return metric_values
+def extract_metrics_from_scan_slice(
+    resource_scan_id: str,
+    cloudformation_client: CloudFormationClient,
+    scan_slice: ScanSlice,
+    resource_classifier: ResourceClassifier,
+    extraction: Extraction,
+) -> None:
+    # Scan slices that weren't started before the deadline are left to the next invocation
+    if extraction.is_past_deadline():
+        extraction.incomplete_slices.append(scan_slice)
+        return
+
+    # Pages are listed on a background thread while the current page is being classified
+    pages = prefetch(
+        list_scan_slice_pages_with_next_tokens(cloudformation_client, resource_scan_id, scan_slice),
+        PAGE_PREFETCH_DEPTH,
+        extraction.statistics,
+    )
+    with write_resource_export(extraction.export, scan_slice.resource_type_prefix) as export_writer:
+        for scanned_resources, next_token in pages:
+            extract_metrics_from_page(scanned_resources, resource_classifier, extraction, export_writer)
+
+            # Stopping between pages leaves the counters consistent with the pages before `next_token`
+            if next_token and extraction.is_past_deadline():
+                extraction.incomplete_slices.append(ScanSlice(scan_slice.resource_type_prefix, next_token))
+                break
+
+
+def extract_metrics_from_page(
+    scanned_resources: list[ScannedResourceTypeDef],
+    resource_classifier: ResourceClassifier,
+    extraction: Extraction,
+    export_writer: ResourceExportWriter | None,
+) -> None:
+    start = time.perf_counter()
+    extraction.resources_listed += len(scanned_resources)
+
+    extract_page_metric_values(
+        scanned_resources, resource_classifier, extraction.metric_counters, extraction.resource_type_counts
+    )
 
+    if extraction.snapshot is not None:
+        extraction.snapshot.add(scanned_resources, resource_classifier.excluded_resource_types)
 
-def extract_metric_values_from_scanned_resources(
+    extraction.global_resources.add(scanned_resources, resource_classifier.excluded_resource_types)
+    extraction.tag_grouping.add(scanned_resources, resource_classifier.excluded_resource_types)
+
+    # Every scanned resource is exported, including the excluded resource types
+    if export_writer is not None:
+        export_writer.write(scanned_resources)
+
+    extraction.statistics.aggregate_seconds += time.perf_counter() - start
+
+
+def extract_page_metric_values(
     scanned_resources: list[ScannedResourceTypeDef],
-    metrics_to_collect: list[ManagedResourceMetrics],
-) -> DefaultDict[str, int]:
-    metric_values: DefaultDict[str, int] = defaultdict(int)
+    resource_classifier: ResourceClassifier,
+    metric_counters: MetricCounters,
+    resource_type_counts: dict[str, list[int]] | None,
+) -> None:
+    if resource_type_counts is None:
+        resource_classifier.classify(scanned_resources, metric_counters)
+        return
 
-    for scanned_resource in scanned_resources:
-        if scanned_resource.get(ScannedResourceKeys.ResourceType, "") in RESOURCE_TYPE_EXCLUDE_LIST:
-            continue
+    # The metric values are derived from the counts of the resource types of the page, so every level
+    # of the hierarchy is counted in the same pass over the resources
+    page_counts = resource_classifier.count_resource_types(scanned_resources)
+    merge_resource_type_counts(resource_type_counts, page_counts)
+    resource_classifier.classify_resource_type_counts(page_counts, metric_counters)
 
-        for managed_resource_metrics in metrics_to_collect:
-            for metric in managed_resource_metrics:
-                metric_values[metric.name] += metric.filter(scanned_resource)
 
-    return metric_values
+def get_resources_scanned(
+    event: dict[str, Any], resource_scan_id: str, cloudformation_client: CloudFormationClient
+) -> int:
+    # The event is usually the output of `DescribeResourceScan`, which already contains the count
+    if RESOURCES_SCANNED_EVENT_KEY in event:
+        return int(event[RESOURCES_SCANNED_EVENT_KEY])
+
+    response = cloudformation_client.describe_resource_scan(ResourceScanId=resource_scan_id)
+    return response.get("ResourcesScanned", 0)
+
+
+def is_partial_scan(event: dict[str, Any]) -> bool:
+    # The output of `DescribeResourceScan` only contains `ScanFilters` for partial resource scans
+    return bool(event.get(SCAN_FILTERS_EVENT_KEY))
+
+
+def append_adoption_history(resource_type_counts: dict[str, list[int]] | None, target: Target) -> None:
+    if resource_type_counts is None or not HISTORY_ENABLED:
+        return
+
+    day = datetime.now(timezone.utc).date()
+    columns = HistoryColumns()
+    columns.append_day(day, target.account_id, target.region, resource_type_counts)
+    append_history(
+        get_s3_client(),
+        HISTORY_BUCKET_NAME,
+        generate_history_key(target.account_id, target.region, day),
+        columns,
+    )
+
+
+def remove_overall_metric_values(
+    metric_values: dict[str, int], resource_classifier: ResourceClassifier
+) -> None:
+    metric_values.pop(resource_classifier.total_resources_metric_name, None)
+    metric_values.pop(resource_classifier.managed_resources_metric_name, None)
+
+
+def extract_drift_metrics(snapshot: ResourceSnapshot, target: Target) -> dict[str, int]:
+    """
+    Compares the resources of the current resource scan with the ones of the previous resource scan
+    and saves the current resources as the snapshot of the next comparison.
+    No drift metrics are extracted when there is no previous snapshot.
+    """
+
+    snapshot_key = generate_snapshot_key(target)
+    s3_client = get_s3_client()
+    previous_snapshot = load_resource_snapshot(s3_client, SCAN_DATA_BUCKET_NAME, snapshot_key)
+    save_resource_snapshot(s3_client, SCAN_DATA_BUCKET_NAME, snapshot_key, snapshot)
+
+    if previous_snapshot is None:
+        return {}
+
+    drift_metric_values: dict[str, int] = snapshot.diff(previous_snapshot).to_metric_values()
+    return drift_metric_values
 
 
-def is_last_page(next_token: str) -> bool:
-    return not next_token
+def generate_snapshot_key(target: Target) -> str:
+    return f"{SNAPSHOTS_PREFIX}/{target.account_id}/{target.region}/{SNAPSHOT_OBJECT_NAME}"
 
 
-def generate_cloudwatch_metrics(metric_values: DefaultDict[str, int]) -> dict[str, Any]:
+def generate_cloudwatch_metrics(metric_values: Mapping[str, int], target: Target) -> dict[str, Any]:
     if len(metric_values) == 0:
         raise ValueError("No metrics to send")
 
-    dimensions = generate_cloudwatch_dimensions()
+    dimensions = generate_cloudwatch_dimensions(target)
 
     metric_data = [
         generate_cloudwatch_metric_datum(metric_name, value, unit="Count", dimensions=dimensions)
@@ -138,11 +788,11 @@ def generate_cloudwatch_metric_datum(
     }
 
 
-def generate_cloudwatch_dimensions() -> list[dict[str, str]]:
+def generate_cloudwatch_dimensions(target: Target) -> list[dict[str, str]]:
     dimensions = []
-    if ACCOUNT_ID:
-        dimensions.append({"Name": "AccountID", "Value": ACCOUNT_ID})
-    if REGION:
-        dimensions.append({"Name": "Region", "Value": REGION})
+    if target.account_id:
+        dimensions.append({"Name": "AccountID", "Value": target.account_id})
+    if target.region:
+        dimensions.append({"Name": "Region", "Value": target.region})
 
     return dimensions
@@ -0,0 +1,143 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import os
+from typing import Any, Mapping, MutableMapping, Sequence
+
+from constants import EnvVarsNames
+from metrics import ALL_RESOURCES_METRIC_NAME
+from metrics import MANAGED_PERCENT_METRIC_NAME
+from metrics import compute_managed_percent
+from metrics import generate_managed_metric_name
+from metrics import generate_total_metric_name
+from metrics import get_resource_type
+from metrics import validate_resource_type
+
+SERVICE_DIMENSION_NAME = "Service"
+RESOURCE_TYPE_DIMENSION_NAME = "ResourceType"
+
+# Every level of the hierarchy shares the metric names of all resources, the level of a metric is told apart
+# by its dimensions, for example `{AccountID, Region, Service}` for the service level
+TOTAL_RESOURCES_METRIC_NAME = generate_total_metric_name(ALL_RESOURCES_METRIC_NAME)
+MANAGED_RESOURCES_METRIC_NAME = generate_managed_metric_name(ALL_RESOURCES_METRIC_NAME)
+
+# Whether every level of the hierarchy also gets the `ManagedPercent` metric, which SEARCH expressions
+# can chart without a math expression per service or resource type
+MANAGED_PERCENT_METRICS_ENABLED = (
+    os.getenv(EnvVarsNames.MANAGED_PERCENT_METRICS_ENABLED, "false").lower() == "true"
+)
+
+
+def merge_resource_type_counts(
+    resource_type_counts: MutableMapping[str, list[int]],
+    other_resource_type_counts: Mapping[str, Sequence[int]],
+) -> None:
+    for resource_type, (total, managed) in other_resource_type_counts.items():
+        counts = resource_type_counts.setdefault(resource_type, [0, 0])
+        counts[0] += total
+        counts[1] += managed
+
+
+def rollup_service_counts(resource_type_counts: Mapping[str, Sequence[int]]) -> dict[str, list[int]]:
+    """
+    Sums the (total, managed) counts of the resource types of every service, keyed by service,
+    for example `EC2` for `AWS::EC2::Instance`
+    """
+
+    service_counts: dict[str, list[int]] = {}
+    for resource_type, counts in resource_type_counts.items():
+        if validate_resource_type(resource_type):
+            merge_resource_type_counts(service_counts, {get_service(resource_type): counts})
+
+    return service_counts
+
+
+def generate_hierarchical_metric_data(
+    resource_type_counts: Mapping[str, Sequence[int]], dimensions: list[dict[str, str]]
+) -> list[dict[str, Any]]:
+    """
+    Generates the total and managed resources metric data of every service and resource type,
+    dimensioned by `Service` and by `Service` and `ResourceType` in addition to `dimensions`
+
+    The global level is the `TotalResources` and `ManagedResources` metrics without these dimensions,
+    which are already published.
+    """
+
+    metric_data = []
+    for service, (total, managed) in sorted(rollup_service_counts(resource_type_counts).items()):
+        service_dimensions = [*dimensions, {"Name": SERVICE_DIMENSION_NAME, "Value": service}]
+        metric_data.extend(generate_level_metric_data(total, managed, service_dimensions))
+
+    for resource_type, (total, managed) in sorted(resource_type_counts.items()):
+        if not validate_resource_type(resource_type):
+            continue
+
+        resource_type_dimensions = [
+            *dimensions,
+            {"Name": SERVICE_DIMENSION_NAME, "Value": get_service(resource_type)},
+            {"Name": RESOURCE_TYPE_DIMENSION_NAME, "Value": resource_type},
+        ]
+        metric_data.extend(generate_level_metric_data(total, managed, resource_type_dimensions))
+
+    return metric_data
+
+
+def generate_global_level_metric_data(
+    metric_values: Mapping[str, int], dimensions: list[dict[str, str]]
+) -> list[dict[str, Any]]:
+    """
+    Generates the `ManagedPercent` metric data of all resources, whose total and managed resources
+    are already part of `metric_values`. Partial resource scans don't count all resources.
+    """
+
+    if not MANAGED_PERCENT_METRICS_ENABLED or TOTAL_RESOURCES_METRIC_NAME not in metric_values:
+        return []
+
+    return [
+        generate_managed_percent_metric_datum(
+            metric_values[TOTAL_RESOURCES_METRIC_NAME],
+            metric_values.get(MANAGED_RESOURCES_METRIC_NAME, 0),
+            dimensions,
+        )
+    ]
+
+
+def generate_level_metric_data(
+    total: int, managed: int, dimensions: list[dict[str, str]]
+) -> list[dict[str, Any]]:
+    metric_data = [
+        {
+            "MetricName": TOTAL_RESOURCES_METRIC_NAME,
+            "Value": total,
+            "Unit": "Count",
+            "Dimensions": dimensions,
+        },
+        {
+            "MetricName": MANAGED_RESOURCES_METRIC_NAME,
+            "Value": managed,
+            "Unit": "Count",
+            "Dimensions": dimensions,
+        },
+    ]
+    if MANAGED_PERCENT_METRICS_ENABLED:
+        metric_data.append(generate_managed_percent_metric_datum(total, managed, dimensions))
+
+    return metric_data
+
+
+def generate_managed_percent_metric_datum(
+    total: int, managed: int, dimensions: list[dict[str, str]]
+) -> dict[str, Any]:
+    return {
+        "MetricName": MANAGED_PERCENT_METRIC_NAME,
+        "Value": compute_managed_percent(total, managed),
+        "Unit": "Percent",
+        "Dimensions": dimensions,
+    }
+
+
+def get_service(resource_type: str) -> str:
+    service: str = get_resource_type(resource_type).service
+    return service
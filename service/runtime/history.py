@@ -0,0 +1,487 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Daily adoption history of every account, region and resource type, see README.md
+
+Only depends on the standard library, so the history can be queried outside of the Lambda functions:
+
+    python3 -m service.runtime.history (--bucket BUCKET | --directory DIRECTORY) most-regressed
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import os
+import struct
+import zlib
+from array import array
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import date
+from datetime import timedelta
+from typing import TYPE_CHECKING, Iterable, Iterator, Mapping, Sequence
+
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+
+HISTORY_FORMAT_VERSION = b"IAH1"
+HISTORY_PREFIX = "history"
+HISTORY_OBJECT_SUFFIX = ".history"
+
+# A history object is a sequence of segments, one per resource scan, so appending a day doesn't rewrite
+# the previous segments. Every segment is its compressed length followed by the zlib-compressed columns
+SEGMENT_LENGTH = struct.Struct("<I")
+
+# Row count and byte length of the dictionary of the strings of a segment
+SEGMENT_HEADER = struct.Struct("<II")
+STRING_DELIMITER = "\n"
+
+# Type codes of the columns of a segment: day (days since EPOCH), account ID, region and resource type
+# (indexes in the dictionary of the segment), total and managed resources
+COLUMN_TYPECODES = ("I", "H", "H", "H", "q", "q")
+
+EPOCH = date(1970, 1, 1)
+
+COMPRESSION_LEVEL = 9
+
+DAYS_PER_WEEK = 7
+
+
+# pylint: disable=too-many-instance-attributes
+class HistoryColumns:
+    """
+    Rows of the history, one per account, region, resource type and day, stored column by column in `array`s
+    with the strings replaced by their index in `strings`
+
+    Rows are kept in the order they were appended, and `scan_starts` holds the first row of every resource
+    scan, so the last resource scan of a day wins when an account and region was scanned more than once
+    that day.
+    """
+
+    __slots__ = (
+        "days",
+        "accounts",
+        "regions",
+        "resource_types",
+        "totals",
+        "managed",
+        "strings",
+        "string_indexes",
+        "scan_starts",
+    )
+
+    def __init__(self) -> None:
+        self.days = array("I")
+        self.accounts = array("H")
+        self.regions = array("H")
+        self.resource_types = array("H")
+        self.totals = array("q")
+        self.managed = array("q")
+        self.strings: list[str] = []
+        self.string_indexes: dict[str, int] = {}
+        self.scan_starts = array("I")
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def columns(self) -> tuple[array[int], ...]:
+        return self.days, self.accounts, self.regions, self.resource_types, self.totals, self.managed
+
+    def get_string_index(self, string: str) -> int:
+        index = self.string_indexes.get(string)
+        if index is None:
+            index = self.string_indexes[string] = len(self.strings)
+            self.strings.append(string)
+
+        return index
+
+    def append_day(
+        self,
+        day: date,
+        account_id: str,
+        region: str,
+        resource_type_counts: Mapping[str, Sequence[int]],
+    ) -> None:
+        account_index, region_index = self.get_string_index(account_id), self.get_string_index(region)
+        self.scan_starts.append(len(self))
+        for resource_type, (total, managed) in sorted(resource_type_counts.items()):
+            self.days.append((day - EPOCH).days)
+            self.accounts.append(account_index)
+            self.regions.append(region_index)
+            self.resource_types.append(self.get_string_index(resource_type))
+            self.totals.append(total)
+            self.managed.append(managed)
+
+    def iterate_scans(self) -> Iterator[range]:
+        """
+        Yields the rows of every resource scan with resources, in the order they were appended
+        """
+
+        for start, end in zip(self.scan_starts, [*self.scan_starts[1:], len(self)]):
+            if start < end:
+                yield range(start, end)
+
+    def to_segment(self) -> bytes:
+        dictionary = STRING_DELIMITER.join(self.strings).encode()
+        payload = b"".join(
+            [
+                SEGMENT_HEADER.pack(len(self), len(dictionary)),
+                dictionary,
+                *(column.tobytes() for column in self.columns),
+            ]
+        )
+        compressed = zlib.compress(payload, COMPRESSION_LEVEL)
+        return SEGMENT_LENGTH.pack(len(compressed)) + compressed
+
+    def extend_from_segment(self, payload: bytes) -> None:
+        row_count, dictionary_length = SEGMENT_HEADER.unpack_from(payload)
+        offset = SEGMENT_HEADER.size + dictionary_length
+        dictionary = payload[SEGMENT_HEADER.size : offset].decode()
+        # The strings of the segment are mapped to the strings of these columns
+        string_indexes = array("H", map(self.get_string_index, dictionary.split(STRING_DELIMITER)))
+        self.scan_starts.append(len(self))
+
+        for index, (column, typecode) in enumerate(zip(self.columns, COLUMN_TYPECODES)):
+            segment_column = array(typecode)
+            segment_column.frombytes(payload[offset : offset + row_count * segment_column.itemsize])
+            offset += row_count * segment_column.itemsize
+            # Account, region and resource type columns hold string indexes
+            column.extend(
+                map(string_indexes.__getitem__, segment_column) if 1 <= index <= 3 else segment_column
+            )
+
+    @classmethod
+    def from_objects(cls, objects: Iterable[bytes]) -> HistoryColumns:
+        columns = cls()
+        for data in objects:
+            for payload in iterate_segment_payloads(data):
+                columns.extend_from_segment(payload)
+
+        return columns
+
+
+def iterate_segment_payloads(data: bytes) -> Iterator[bytes]:
+    if not data.startswith(HISTORY_FORMAT_VERSION):
+        raise ValueError("Unsupported adoption history format")
+
+    offset = len(HISTORY_FORMAT_VERSION)
+    while offset < len(data):
+        (length,) = SEGMENT_LENGTH.unpack_from(data, offset)
+        offset += SEGMENT_LENGTH.size
+        yield zlib.decompress(data[offset : offset + length])
+        offset += length
+
+
+@dataclass
+class DailySeries:
+    """
+    Total and managed resources of every day with a resource scan, in day order
+    """
+
+    days: array[int] = field(default_factory=lambda: array("I"))
+    totals: array[int] = field(default_factory=lambda: array("q"))
+    managed: array[int] = field(default_factory=lambda: array("q"))
+
+    def managed_percent(self, index: int) -> float:
+        # Like the ManagedPercent metric, no resources at all count as fully managed
+        total = self.totals[index]
+        return 100.0 if total == 0 else 100 * self.managed[index] / total
+
+    def find_day_index(self, day: int) -> int | None:
+        """
+        Returns the index of the last day on or before `day`, or `None` when the series starts after it
+        """
+
+        index = bisect.bisect_right(self.days, day) - 1
+        return index if index >= 0 else None
+
+
+class AdoptionHistory:
+    """
+    Answers trend queries from the daily series of every resource type, and of all resource types combined
+    under `ALL_RESOURCE_TYPES`, summed across the selected accounts and regions
+
+    The series are built once when the history is loaded, so every query only walks the series it needs.
+    """
+
+    ALL_RESOURCE_TYPES = "*"
+
+    def __init__(
+        self,
+        columns: HistoryColumns,
+        account_ids: Iterable[str] | None = None,
+        regions: Iterable[str] | None = None,
+    ) -> None:
+        self.series = build_daily_series(
+            deduplicate_rows(columns, account_ids, regions), columns.strings, self.ALL_RESOURCE_TYPES
+        )
+        # Last day of every resource type combined, the series of a resource type that ends before it ended
+        all_resource_types_series = self.series.get(self.ALL_RESOURCE_TYPES, DailySeries())
+        self.last_day = all_resource_types_series.days[-1] if all_resource_types_series.days else None
+
+    @property
+    def resource_types(self) -> list[str]:
+        return sorted(
+            resource_type for resource_type in self.series if resource_type != self.ALL_RESOURCE_TYPES
+        )
+
+    def managed_percent(self, resource_type: str = ALL_RESOURCE_TYPES) -> list[tuple[date, float]]:
+        series = self.series.get(resource_type, DailySeries())
+        return [(to_date(day), series.managed_percent(index)) for index, day in enumerate(series.days)]
+
+    def rolling_average(
+        self, resource_type: str = ALL_RESOURCE_TYPES, window_days: int = DAYS_PER_WEEK
+    ) -> list[tuple[date, float]]:
+        """
+        Returns the average managed percentage of the days with a resource scan in the `window_days` days
+        ending on every day of the series
+        """
+
+        series = self.series.get(resource_type, DailySeries())
+        averages, window_start, window_sum = [], 0, 0.0
+        for index, day in enumerate(series.days):
+            window_sum += series.managed_percent(index)
+            while series.days[window_start] <= day - window_days:
+                window_sum -= series.managed_percent(window_start)
+                window_start += 1
+            averages.append((to_date(day), window_sum / (index - window_start + 1)))
+
+        return averages
+
+    def week_over_week(self, resource_type: str = ALL_RESOURCE_TYPES) -> float | None:
+        """
+        Returns the change of the managed percentage, in percentage points, between the last day of the series
+        and the last day a week before it, or `None` when the series doesn't go back a week or ended before
+        the last day of the history
+        """
+
+        return self.managed_percent_delta(self.series.get(resource_type, DailySeries()), DAYS_PER_WEEK)
+
+    def most_regressed_resource_types(
+        self, days: int = DAYS_PER_WEEK, limit: int = 10
+    ) -> list[tuple[str, float]]:
+        """
+        Returns up to `limit` resource types whose managed percentage dropped the most over `days` days,
+        most regressed first, with their change in percentage points
+        """
+
+        deltas = {
+            resource_type: self.managed_percent_delta(self.series[resource_type], days)
+            for resource_type in self.resource_types
+        }
+        regressed = [(resource_type, delta) for resource_type, delta in deltas.items() if delta and delta < 0]
+        return sorted(regressed, key=lambda item: (item[1], item[0]))[:limit]
+
+    def managed_percent_delta(self, series: DailySeries, days: int) -> float | None:
+        # Resource types that are no longer scanned have no current managed percentage to compare
+        if not series.days or series.days[-1] != self.last_day:
+            return None
+
+        previous_index = series.find_day_index(series.days[-1] - days)
+        if previous_index is None:
+            return None
+
+        return series.managed_percent(len(series.days) - 1) - series.managed_percent(previous_index)
+
+
+def deduplicate_rows(
+    columns: HistoryColumns, account_ids: Iterable[str] | None, regions: Iterable[str] | None
+) -> dict[tuple[int, int, int, int], tuple[int, int]]:
+    """
+    Returns the (total, managed) resources of every resource type of the last resource scan of every day,
+    account and region, keyed by (day, resource type, account, region) string indexes, of the selected
+    accounts and regions
+    """
+
+    rows: dict[tuple[int, int, int, int], tuple[int, int]] = {}
+    for (day, account, region), scan_rows in select_last_scans(columns, account_ids, regions).items():
+        for resource_type, total, managed in zip(
+            columns.resource_types[scan_rows.start : scan_rows.stop],
+            columns.totals[scan_rows.start : scan_rows.stop],
+            columns.managed[scan_rows.start : scan_rows.stop],
+        ):
+            rows[(day, resource_type, account, region)] = (total, managed)
+
+    return rows
+
+
+def select_last_scans(
+    columns: HistoryColumns, account_ids: Iterable[str] | None, regions: Iterable[str] | None
+) -> dict[tuple[int, int, int], range]:
+    """
+    Returns the rows of the last resource scan of every day, account and region, keyed by (day, account,
+    region) string indexes, of the selected accounts and regions. The resource types missing from the last
+    resource scan of a day are dropped with the earlier resource scans of that day.
+    """
+
+    selected_accounts = select_string_indexes(columns, account_ids)
+    selected_regions = select_string_indexes(columns, regions)
+
+    last_scans: dict[tuple[int, int, int], range] = {}
+    for scan_rows in columns.iterate_scans():
+        # Every row of a resource scan has the same day, account and region
+        day, account, region = (column[scan_rows.start] for column in columns.columns[:3])
+        if is_selected(account, selected_accounts) and is_selected(region, selected_regions):
+            last_scans[(day, account, region)] = scan_rows
+
+    return last_scans
+
+
+def select_string_indexes(columns: HistoryColumns, strings: Iterable[str] | None) -> frozenset[int] | None:
+    if strings is None:
+        return None
+
+    return frozenset(columns.string_indexes[string] for string in strings if string in columns.string_indexes)
+
+
+def is_selected(string_index: int, selected_string_indexes: frozenset[int] | None) -> bool:
+    return selected_string_indexes is None or string_index in selected_string_indexes
+
+
+def build_daily_series(
+    rows: Mapping[tuple[int, int, int, int], tuple[int, int]], strings: Sequence[str], all_resource_types: str
+) -> dict[str, DailySeries]:
+    # Summed across accounts and regions, keyed by (resource type, day)
+    totals: dict[tuple[str, int], list[int]] = {}
+    for (day, resource_type, _, _), (total, managed) in rows.items():
+        for series_name in (strings[resource_type], all_resource_types):
+            counts = totals.setdefault((series_name, day), [0, 0])
+            counts[0] += total
+            counts[1] += managed
+
+    series: dict[str, DailySeries] = {}
+    for (series_name, day), (total, managed) in sorted(totals.items()):
+        daily_series = series.setdefault(series_name, DailySeries())
+        daily_series.days.append(day)
+        daily_series.totals.append(total)
+        daily_series.managed.append(managed)
+
+    return series
+
+
+def to_date(day: int) -> date:
+    return EPOCH + timedelta(days=day)
+
+
+def generate_history_key(account_id: str, region: str, day: date) -> str:
+    # One object per account, region and year keeps the objects appended to after every resource scan small
+    return f"{HISTORY_PREFIX}/{account_id}/{region}/{day.year}{HISTORY_OBJECT_SUFFIX}"
+
+
+def append_history(s3_client: S3Client, bucket_name: str, key: str, columns: HistoryColumns) -> None:
+    """
+    Appends a segment to a history object, creating the object when it doesn't exist yet
+    S3 objects can't be appended to, so the object is read and written again with the new segment.
+    """
+
+    try:
+        data = s3_client.get_object(Bucket=bucket_name, Key=key)["Body"].read()
+    except s3_client.exceptions.NoSuchKey:
+        data = HISTORY_FORMAT_VERSION
+
+    s3_client.put_object(Bucket=bucket_name, Key=key, Body=data + columns.to_segment())
+
+
+def load_history_from_s3(
+    s3_client: S3Client, bucket_name: str, prefix: str = HISTORY_PREFIX
+) -> HistoryColumns:
+    paginator = s3_client.get_paginator("list_objects_v2")
+    keys = [
+        content["Key"]
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=f"{prefix}/")
+        for content in page.get("Contents", [])
+        if content["Key"].endswith(HISTORY_OBJECT_SUFFIX)
+    ]
+
+    return HistoryColumns.from_objects(
+        s3_client.get_object(Bucket=bucket_name, Key=key)["Body"].read() for key in sorted(keys)
+    )
+
+
+def load_history_from_directory(directory: str) -> HistoryColumns:
+    """
+    Loads the history objects downloaded to a directory, for example with
+    `aws s3 sync s3://<history bucket>/history <directory>`
+    """
+
+    paths = sorted(
+        os.path.join(root, file_name)
+        for root, _, file_names in os.walk(directory)
+        for file_name in file_names
+        if file_name.endswith(HISTORY_OBJECT_SUFFIX)
+    )
+    return HistoryColumns.from_objects(read_file(path) for path in paths)
+
+
+def read_file(path: str) -> bytes:
+    with open(path, "rb") as history_file:
+        return history_file.read()
+
+
+def main(argv: list[str] | None = None) -> None:
+    arguments = parse_arguments(argv)
+    history = AdoptionHistory(load_history_columns(arguments), arguments.account_ids, arguments.regions)
+    QUERY_PRINTERS[arguments.query](history, arguments)
+
+
+def load_history_columns(arguments: argparse.Namespace) -> HistoryColumns:
+    if arguments.directory:
+        return load_history_from_directory(arguments.directory)
+
+    import boto3  # pylint: disable=import-outside-toplevel
+
+    return load_history_from_s3(boto3.client("s3"), arguments.bucket)
+
+
+def print_most_regressed_resource_types(history: AdoptionHistory, arguments: argparse.Namespace) -> None:
+    for resource_type, delta in history.most_regressed_resource_types(arguments.days, arguments.limit):
+        print(f"{resource_type:<60} {delta:+.2f}")
+
+
+def print_week_over_week(history: AdoptionHistory, arguments: argparse.Namespace) -> None:
+    delta = history.week_over_week(arguments.resource_type)
+    print("-" if delta is None else f"{delta:+.2f}")
+
+
+def print_rolling_average(history: AdoptionHistory, arguments: argparse.Namespace) -> None:
+    for day, percent in history.rolling_average(arguments.resource_type, arguments.days):
+        print(f"{day.isoformat()} {percent:.2f}")
+
+
+QUERY_PRINTERS = {
+    "most-regressed": print_most_regressed_resource_types,
+    "week-over-week": print_week_over_week,
+    "rolling-average": print_rolling_average,
+}
+
+
+def parse_arguments(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python3 -m service.runtime.history", description=__doc__)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--bucket", help="History bucket of the solution")
+    source.add_argument("--directory", help="Directory of downloaded history objects")
+    parser.add_argument("query", choices=list(QUERY_PRINTERS))
+    parser.add_argument("--resource-type", default=AdoptionHistory.ALL_RESOURCE_TYPES)
+    parser.add_argument(
+        "--days", type=positive_int, default=DAYS_PER_WEEK, help="Period of the query in days"
+    )
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--account-ids", nargs="+")
+    parser.add_argument("--regions", nargs="+")
+
+    return parser.parse_args(argv)
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+
+    return number
+
+
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,104 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
-from dataclasses import dataclass
-from typing import Callable, Iterator, Self
-
-from mypy_boto3_cloudformation.type_defs import ScannedResourceTypeDef
+from __future__ import annotations
 
-type ScannedResourceFilter = Callable[[ScannedResourceTypeDef], bool]  # type: ignore[valid-type]
+import functools
+import sys
+from dataclasses import dataclass
+from typing import Any
 
 
 # pylint: disable=too-few-public-methods
 class ScannedResourceKeys:
     ManagedByStack = "ManagedByStack"
     ResourceType = "ResourceType"
+    ResourceIdentifier = "ResourceIdentifier"
 
 
 RESOURCE_TYPE_DELIMETER = "::"
 
+ALL_RESOURCES_METRIC_NAME = "Resources"
+TOTAL_METRIC_NAME_PREFIX = "Total"
+MANAGED_METRIC_NAME_PREFIX = "Managed"
 
-@dataclass
-class Metric:
-    name: str
-    filter: ScannedResourceFilter
+# Percentage of managed resources, published alongside the total and managed resources so that dashboards
+# don't need a math expression per resource type
+MANAGED_PERCENT_METRIC_NAME = "ManagedPercent"
+
+# Maximum number of parsed resource types kept by `get_resource_type`, well above the number of resource types
+# supported by IaC Generator, so only a stream of invalid resource types can evict entries
+RESOURCE_TYPE_REGISTRY_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class ResourceType:
+    """
+    Parsed form of a resource type string, see `get_resource_type`
+    `service`, `resource` and the metric names are empty for a resource type that doesn't have three parts.
+    """
 
+    name: str
+    valid: bool
+    service: str = ""
+    resource: str = ""
+    metric_name: str = ""
+    total_metric_name: str = ""
+    managed_metric_name: str = ""
 
-class ManagedResourceMetrics:
-    def __init__(self, metric_name: str, scanned_resource_filter: ScannedResourceFilter) -> None:
-        self.total_resource_metric = Metric(
-            name=f"Total{metric_name}",
-            filter=scanned_resource_filter,
-        )
-        self.managed_resource_metric = Metric(
-            name=f"Managed{metric_name}",
-            filter=create_is_managed_resource_filter(scanned_resource_filter),
-        )
+    @property
+    def metric_names(self) -> tuple[str, str]:
+        return self.total_metric_name, self.managed_metric_name
 
-    def __iter__(self) -> Iterator[Metric]:
-        return iter([self.total_resource_metric, self.managed_resource_metric])
 
-    @classmethod
-    def from_resource_type(cls, resource_type: str) -> Self:
-        """
-        Creates a new instance of ManagedResourceMetrics from a resource type
-        The resource type must be supported by IaC Generator, see docs:
-        https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/resource-import-supported-resources.html
-        """
+@functools.lru_cache(maxsize=RESOURCE_TYPE_REGISTRY_SIZE)
+def get_resource_type(resource_type: str) -> ResourceType:
+    """
+    Returns the parsed form of a resource type, parsing every resource type only once
 
-        if not validate_resource_type(resource_type):
-            raise ValueError()
+    Shared by the runtime and the CDK application. The metric names are interned, so the metric values
+    of every page are keyed by the same string objects.
+    """
 
-        metric_name = generate_metric_name_from_resource_type(resource_type)
-        scanned_resource_filter = generate_resource_type_filter(resource_type)
+    resource_type_parts = resource_type.split(RESOURCE_TYPE_DELIMETER)
+    if len(resource_type_parts) != 3:
+        return ResourceType(name=resource_type, valid=False)
 
-        return cls(metric_name, scanned_resource_filter)
+    prefix, service, resource = resource_type_parts
+    metric_name = f"{service}{resource}s"
+    return ResourceType(
+        name=sys.intern(resource_type),
+        valid=prefix == "AWS",
+        service=service,
+        resource=resource,
+        metric_name=metric_name,
+        total_metric_name=sys.intern(generate_total_metric_name(metric_name)),
+        managed_metric_name=sys.intern(generate_managed_metric_name(metric_name)),
+    )
 
 
-def generate_metric_name_from_resource_type(resource_type: str) -> str:
-    _, service, resource = resource_type.split(RESOURCE_TYPE_DELIMETER)
-    return f"{service}{resource}s"
+def get_resource_type_registry_statistics() -> dict[str, Any]:
+    cache_info = get_resource_type.cache_info()
+    return {
+        "Hits": cache_info.hits,
+        "Misses": cache_info.misses,
+        "Size": cache_info.currsize,
+        "MaxSize": cache_info.maxsize,
+    }
 
 
-def generate_resource_type_filter(resource_type: str) -> ScannedResourceFilter:
-    return lambda scanned_resource: scanned_resource.get(ScannedResourceKeys.ResourceType) == resource_type
+def generate_total_metric_name(metric_name: str) -> str:
+    return f"{TOTAL_METRIC_NAME_PREFIX}{metric_name}"
 
 
-def validate_resource_type(resource_type: str) -> bool:
-    resource_type_parts = resource_type.split(RESOURCE_TYPE_DELIMETER)
-    if len(resource_type_parts) != 3:
-        return False
-    if resource_type_parts[0] != "AWS":
-        return False
-    return True
+def generate_managed_metric_name(metric_name: str) -> str:
+    return f"{MANAGED_METRIC_NAME_PREFIX}{metric_name}"
 
 
-def is_managed(scanned_resource: ScannedResourceTypeDef) -> bool:
-    return scanned_resource.get(ScannedResourceKeys.ManagedByStack, False)  # type: ignore
+def compute_managed_percent(total: int, managed: int) -> float:
+    # Like the math expressions of the dashboard, no resources at all count as fully managed
+    return 100.0 if total == 0 else round(100 * managed / total, 2)
 
 
-def create_is_managed_resource_filter(
-    resource_filter: ScannedResourceFilter,
-) -> ScannedResourceFilter:
-    return lambda scanned_resource: is_managed(scanned_resource) and resource_filter(scanned_resource)
+def validate_resource_type(resource_type: str) -> bool:
+    return get_resource_type(resource_type).valid
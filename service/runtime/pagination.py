@@ -0,0 +1,92 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import string
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator
+
+from metrics import RESOURCE_TYPE_DELIMETER
+
+if TYPE_CHECKING:
+    from mypy_boto3_cloudformation.client import CloudFormationClient
+    from mypy_boto3_cloudformation.type_defs import ScannedResourceTypeDef
+
+# Every resource type supported by IaC Generator has the form `AWS::<Service>::<Resource>`
+# where `<Service>` starts with an uppercase letter, so these prefixes partition a resource scan
+# into disjoint slices that together cover every scanned resource
+RESOURCE_TYPE_PREFIX_PARTITION = [
+    f"AWS{RESOURCE_TYPE_DELIMETER}{service_initial}" for service_initial in string.ascii_uppercase
+]
+
+
+@dataclass
+class ScanSlice:
+    """
+    A part of a resource scan that can be paginated independently of the others
+    An empty `resource_type_prefix` covers the entire resource scan
+    """
+
+    resource_type_prefix: str = ""
+    next_token: str = ""
+
+
+def create_resource_type_prefix_scan_slices() -> list[ScanSlice]:
+    return [ScanSlice(resource_type_prefix=prefix) for prefix in RESOURCE_TYPE_PREFIX_PARTITION]
+
+
+def list_scan_slice_pages(
+    cloudformation_client: CloudFormationClient,
+    resource_scan_id: str,
+    scan_slice: ScanSlice,
+) -> Iterator[list[ScannedResourceTypeDef]]:
+    """
+    Yields the scanned resources of a scan slice page by page
+    `scan_slice.next_token` is kept up to date with the token of the page to be listed next
+    """
+
+    while True:
+        # The first call to `list_resource_scan_resources` must not include `NextToken` argument
+        # The second call onward must include `NextToken` argument
+        #
+        # The response from `list_resource_scan_resources` contains a `NextToken` which
+        # should be used to retrieve the next page of results.
+        response = cloudformation_client.list_resource_scan_resources(
+            ResourceScanId=resource_scan_id,
+            **create_scan_slice_arguments(scan_slice),  # type: ignore
+        )
+        scan_slice.next_token = response.get("NextToken", "")
+
+        yield response["Resources"]
+
+        if is_last_page(scan_slice.next_token):
+            break
+
+
+def list_scan_slice_pages_with_next_tokens(
+    cloudformation_client: CloudFormationClient,
+    resource_scan_id: str,
+    scan_slice: ScanSlice,
+) -> Iterator[tuple[list[ScannedResourceTypeDef], str]]:
+    """
+    Yields the scanned resources of a scan slice page by page, with the token of the page that follows
+    Unlike `scan_slice.next_token`, the token stays with its page when pages are fetched ahead of time.
+    """
+
+    for scanned_resources in list_scan_slice_pages(cloudformation_client, resource_scan_id, scan_slice):
+        yield scanned_resources, scan_slice.next_token
+
+
+def create_scan_slice_arguments(scan_slice: ScanSlice) -> dict[str, str]:
+    arguments = {}
+    if scan_slice.resource_type_prefix:
+        arguments["ResourceTypePrefix"] = scan_slice.resource_type_prefix
+    if scan_slice.next_token:
+        arguments["NextToken"] = scan_slice.next_token
+
+    return arguments
+
+
+def is_last_page(next_token: str) -> bool:
+    return not next_token
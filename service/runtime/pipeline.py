@@ -0,0 +1,148 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# How long a blocked producer waits before checking whether the consumer stopped consuming
+PUT_TIMEOUT_SECONDS = 1
+
+
+@dataclass
+class PipelineStatistics:
+    """
+    Per-stage timing of a fetch/aggregate pipeline of pages
+
+    `fetch_seconds` is the time spent fetching pages, `wait_seconds` the time the consumer was blocked
+    waiting for a page to be fetched and `aggregate_seconds` the time the consumer spent on the pages.
+    With prefetching, fetching overlaps aggregating, so `wait_seconds` is lower than `fetch_seconds`.
+    """
+
+    prefetch_depth: int = 0
+    pages: int = 0
+    fetch_seconds: float = 0.0
+    wait_seconds: float = 0.0
+    aggregate_seconds: float = 0.0
+
+    def merge(self, other: "PipelineStatistics") -> None:
+        self.prefetch_depth = max(self.prefetch_depth, other.prefetch_depth)
+        self.pages += other.pages
+        self.fetch_seconds += other.fetch_seconds
+        self.wait_seconds += other.wait_seconds
+        self.aggregate_seconds += other.aggregate_seconds
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "PrefetchDepth": self.prefetch_depth,
+            "Pages": self.pages,
+            "FetchSeconds": round(self.fetch_seconds, 3),
+            "WaitSeconds": round(self.wait_seconds, 3),
+            "AggregateSeconds": round(self.aggregate_seconds, 3),
+        }
+
+
+# pylint: disable=too-few-public-methods
+class _EndOfPages:
+    pass
+
+
+@dataclass
+class _Failure:
+    error: Exception
+
+
+def prefetch(pages: Iterator[T], prefetch_depth: int, statistics: PipelineStatistics) -> Iterator[T]:
+    """
+    Yields the pages of `pages` while a background thread fetches up to `prefetch_depth` pages ahead
+
+    The bounded buffer applies backpressure on the fetching thread, so at most `prefetch_depth + 2` pages
+    are held in memory regardless of the number of pages: the buffered pages, the page being processed by
+    the consumer and the page the fetching thread waits to buffer. Errors raised while fetching are
+    re-raised to the consumer. A `prefetch_depth` lower than 1 fetches the pages on the consumer thread.
+    """
+
+    statistics.prefetch_depth = max(prefetch_depth, 0)
+    if prefetch_depth < 1:
+        return _fetch_synchronously(pages, statistics)
+
+    return _fetch_in_background(pages, prefetch_depth, statistics)
+
+
+def _fetch_synchronously(pages: Iterator[T], statistics: PipelineStatistics) -> Iterator[T]:
+    for page in _time_fetches(pages, statistics):
+        statistics.pages += 1
+        yield page
+
+    # Without prefetching the consumer waits for every fetch
+    statistics.wait_seconds = statistics.fetch_seconds
+
+
+def _fetch_in_background(
+    pages: Iterator[T], prefetch_depth: int, statistics: PipelineStatistics
+) -> Iterator[T]:
+    buffer: queue.Queue[Any] = queue.Queue(maxsize=prefetch_depth)
+    stopped = threading.Event()
+
+    fetcher = threading.Thread(target=_produce, args=(pages, buffer, stopped, statistics), daemon=True)
+    fetcher.start()
+
+    try:
+        while True:
+            start = time.perf_counter()
+            page = buffer.get()
+            statistics.wait_seconds += time.perf_counter() - start
+
+            if isinstance(page, _EndOfPages):
+                return
+            if isinstance(page, _Failure):
+                raise page.error
+
+            statistics.pages += 1
+            yield page
+    finally:
+        # Unblocks the fetching thread when the consumer stops early
+        stopped.set()
+
+
+def _produce(
+    pages: Iterator[Any],
+    buffer: queue.Queue[Any],
+    stopped: threading.Event,
+    statistics: PipelineStatistics,
+) -> None:
+    try:
+        for page in _time_fetches(pages, statistics):
+            if not _put(buffer, page, stopped):
+                return
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        _put(buffer, _Failure(error), stopped)
+        return
+
+    _put(buffer, _EndOfPages(), stopped)
+
+
+def _time_fetches(pages: Iterator[T], statistics: PipelineStatistics) -> Iterator[T]:
+    while True:
+        start = time.perf_counter()
+        page = next(pages, _EndOfPages())
+        statistics.fetch_seconds += time.perf_counter() - start
+
+        if isinstance(page, _EndOfPages):
+            return
+        yield page
+
+
+def _put(buffer: queue.Queue[Any], page: Any, stopped: threading.Event) -> bool:
+    while not stopped.is_set():
+        try:
+            buffer.put(page, timeout=PUT_TIMEOUT_SECONDS)
+            return True
+        except queue.Full:
+            continue
+
+    return False
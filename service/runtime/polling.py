@@ -0,0 +1,60 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+from datetime import datetime
+from datetime import timezone
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from mypy_boto3_cloudformation.type_defs import DescribeResourceScanOutputTypeDef
+
+
+# Wait before the first status check of a resource scan, small accounts are often scanned within minutes
+INITIAL_WAIT_SECONDS = 60
+
+MIN_WAIT_SECONDS = 30
+
+# Ceiling of the wait between two status checks of a resource scan
+MAX_WAIT_SECONDS = 600
+
+# Waits grow at most by this factor between two status checks, which bounds the cost of an
+# estimate made too early in the resource scan to be accurate
+BACKOFF_MULTIPLIER = 2
+
+# Waits slightly longer than the estimated completion time to avoid a status check right before completion
+ESTIMATE_MARGIN = 1.1
+
+
+def calculate_wait_seconds(
+    resource_scan: DescribeResourceScanOutputTypeDef, previous_wait_seconds: int | None
+) -> int:
+    """
+    Returns the number of seconds to wait before the next status check of an in-progress resource scan
+
+    The wait is the estimated remaining time of the resource scan, extrapolated from `StartTime` and
+    `PercentageCompleted`, bounded by an exponential backoff of the previous wait and `MAX_WAIT_SECONDS`.
+    Without an estimate, the wait follows the exponential backoff alone.
+    """
+
+    backoff_wait_seconds = min(
+        (previous_wait_seconds or INITIAL_WAIT_SECONDS) * BACKOFF_MULTIPLIER, MAX_WAIT_SECONDS
+    )
+
+    estimated_remaining_seconds = estimate_remaining_seconds(resource_scan)
+    if estimated_remaining_seconds is None:
+        return backoff_wait_seconds
+
+    wait_seconds = min(int(estimated_remaining_seconds * ESTIMATE_MARGIN), backoff_wait_seconds)
+    return max(wait_seconds, MIN_WAIT_SECONDS)
+
+
+def estimate_remaining_seconds(resource_scan: DescribeResourceScanOutputTypeDef) -> float | None:
+    start_time = resource_scan.get("StartTime")
+    percentage_completed = resource_scan.get("PercentageCompleted", 0.0)
+    if start_time is None or percentage_completed <= 0:
+        return None
+
+    elapsed_seconds = (datetime.now(timezone.utc) - start_time).total_seconds()
+    return elapsed_seconds * (100 - percentage_completed) / percentage_completed
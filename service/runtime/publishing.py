@@ -0,0 +1,234 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import math
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+from urllib.parse import urlencode
+
+from botocore.config import Config
+from clients import CLIENT_MAX_POOL_CONNECTIONS
+from clients import create_client_config
+from clients import get_cloudwatch_client
+from constants import PUBLISHING_SUMMARY_PAYLOAD_KEY
+from constants import EnvVarsNames
+from constants import MetricsPublishingModes
+
+if TYPE_CHECKING:
+    from mypy_boto3_cloudwatch.client import CloudWatchClient
+
+# Whether the metrics are published by the Lambda functions or by the state machine
+METRICS_PUBLISHING_MODE = os.getenv(
+    EnvVarsNames.METRICS_PUBLISHING_MODE, MetricsPublishingModes.STATE_MACHINE
+)
+
+# Number of `PutMetricData` requests sent concurrently
+PUBLISHING_CONCURRENCY = 4
+
+# Throttled requests are retried like the requests of every other client, with `CLIENT_RETRY_MODE`, and every
+# concurrent request needs a connection of its own
+CLOUDWATCH_CLIENT_CONFIG = create_client_config(
+    Config(max_pool_connections=max(CLIENT_MAX_POOL_CONNECTIONS, PUBLISHING_CONCURRENCY))
+)
+
+# Limits of a single `PutMetricData` request, the size limit is 1 MB, rounded down to leave room
+# for the parameters that are not metric data
+MAX_METRIC_DATA_PER_REQUEST = 1000
+MAX_REQUEST_BYTES = 1_000_000
+REQUEST_OVERHEAD_BYTES = 1024
+
+# `PutMetricData` is a query protocol request, the size of a metric datum is estimated with the largest
+# index a metric datum can have in a request
+METRIC_DATUM_QUERY_PREFIX = f"MetricData.member.{MAX_METRIC_DATA_PER_REQUEST}"
+
+
+# Limit of the number of metrics of a single Embedded Metric Format document
+MAX_METRICS_PER_EMBEDDED_METRICS_DOCUMENT = 100
+
+type MetricsPublisher = Callable[[str, list[dict[str, Any]]], "PublishingSummary"]  # type: ignore[valid-type]
+
+
+@dataclass
+class PublishingSummary:
+    """
+    `batches` is the number of `PutMetricData` requests or Embedded Metric Format documents
+    the metrics were published with
+    """
+
+    metrics: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "Metrics": self.metrics,
+            "Batches": self.batches,
+            "Seconds": round(self.seconds, 3),
+        }
+
+
+def publish_metrics(metrics: dict[str, Any]) -> dict[str, Any]:
+    """
+    Publishes the `MetricData` of `metrics` when the metrics are published by the Lambda functions
+
+    Returns the payload for the state machine, which is `metrics` itself when the state machine publishes
+    the metrics, or `metrics` with a publishing summary in place of the `MetricData`.
+    """
+
+    metrics_publisher = get_metrics_publisher(METRICS_PUBLISHING_MODE)
+    if metrics_publisher is None:
+        return metrics
+
+    payload = dict(metrics)
+    metric_data = payload.pop("MetricData")
+    summary = metrics_publisher(payload["Namespace"], metric_data)
+    payload[PUBLISHING_SUMMARY_PAYLOAD_KEY] = summary.to_payload()
+
+    return payload
+
+
+def get_metrics_publisher(metrics_publishing_mode: str) -> MetricsPublisher | None:
+    if metrics_publishing_mode == MetricsPublishingModes.LAMBDA:
+        return lambda namespace, metric_data: put_metric_data(
+            get_cloudwatch_client(CLOUDWATCH_CLIENT_CONFIG), namespace, metric_data
+        )
+    if metrics_publishing_mode == MetricsPublishingModes.EMF:
+        return emit_embedded_metrics
+
+    # The state machine publishes the metrics
+    return None
+
+
+def put_metric_data(
+    cloudwatch_client: CloudWatchClient, namespace: str, metric_data: list[dict[str, Any]]
+) -> PublishingSummary:
+    """
+    Sends `metric_data` in as few `PutMetricData` requests as the request limits allow,
+    with up to `PUBLISHING_CONCURRENCY` requests in flight
+    """
+
+    start = time.perf_counter()
+    chunks = chunk_metric_data(metric_data)
+
+    def put_metric_data_chunk(chunk: list[dict[str, Any]]) -> None:
+        cloudwatch_client.put_metric_data(Namespace=namespace, MetricData=chunk)  # type: ignore
+
+    with ThreadPoolExecutor(max_workers=PUBLISHING_CONCURRENCY) as executor:
+        # Consuming the results re-raises the errors of the requests
+        list(executor.map(put_metric_data_chunk, chunks))
+
+    return PublishingSummary(
+        metrics=len(metric_data),
+        batches=len(chunks),
+        seconds=time.perf_counter() - start,
+    )
+
+
+def emit_embedded_metrics(namespace: str, metric_data: list[dict[str, Any]]) -> PublishingSummary:
+    """
+    Writes `metric_data` to the standard output as Embedded Metric Format documents, which CloudWatch Logs
+    turns into metrics without any `PutMetricData` request
+
+    A document shares its dimensions between all of its metrics, so metric data is grouped by dimensions
+    and every group is written in documents of up to `MAX_METRICS_PER_EMBEDDED_METRICS_DOCUMENT` metrics.
+    """
+
+    # Importing Powertools metrics takes a noticeable part of a cold start, so only this mode pays for it
+    # pylint: disable-next=import-outside-toplevel
+    from aws_lambda_powertools.metrics import EphemeralMetrics
+
+    start = time.perf_counter()
+    summary = PublishingSummary(metrics=len(metric_data))
+
+    for dimensions, dimensions_metric_data in group_metric_data_by_dimensions(metric_data).items():
+        # Ephemeral metrics don't share their metrics and dimensions with other instances
+        embedded_metrics = EphemeralMetrics(namespace=namespace)
+        for name, value in dimensions:
+            embedded_metrics.add_dimension(name=name, value=value)
+
+        # Every `MAX_METRICS_PER_EMBEDDED_METRICS_DOCUMENT` metrics are written as a document when added
+        for metric_datum in dimensions_metric_data:
+            embedded_metrics.add_metric(
+                name=metric_datum["MetricName"], unit=metric_datum["Unit"], value=metric_datum["Value"]
+            )
+        # A group of a multiple of `MAX_METRICS_PER_EMBEDDED_METRICS_DOCUMENT` metrics is already written
+        if embedded_metrics.metric_set:
+            embedded_metrics.flush_metrics()
+
+        summary.batches += math.ceil(len(dimensions_metric_data) / MAX_METRICS_PER_EMBEDDED_METRICS_DOCUMENT)
+
+    summary.seconds = time.perf_counter() - start
+    return summary
+
+
+def group_metric_data_by_dimensions(
+    metric_data: list[dict[str, Any]],
+) -> dict[tuple[tuple[str, str], ...], list[dict[str, Any]]]:
+    groups: dict[tuple[tuple[str, str], ...], list[dict[str, Any]]] = defaultdict(list)
+    for metric_datum in metric_data:
+        dimensions = tuple(
+            (dimension["Name"], dimension["Value"]) for dimension in metric_datum.get("Dimensions", [])
+        )
+        groups[dimensions].append(metric_datum)
+
+    return groups
+
+
+def chunk_metric_data(
+    metric_data: list[dict[str, Any]],
+    max_metric_data: int = MAX_METRIC_DATA_PER_REQUEST,
+    max_request_bytes: int = MAX_REQUEST_BYTES,
+) -> list[list[dict[str, Any]]]:
+    """
+    Splits `metric_data` into chunks that fit a single `PutMetricData` request,
+    both by number of metric data and by estimated request size
+    """
+
+    chunks: list[list[dict[str, Any]]] = []
+    chunk: list[dict[str, Any]] = []
+    chunk_bytes = REQUEST_OVERHEAD_BYTES
+
+    for metric_datum in metric_data:
+        metric_datum_bytes = estimate_metric_datum_bytes(metric_datum)
+        if chunk and not fits_request(
+            chunk, chunk_bytes + metric_datum_bytes, max_metric_data, max_request_bytes
+        ):
+            chunks.append(chunk)
+            chunk, chunk_bytes = [], REQUEST_OVERHEAD_BYTES
+
+        chunk.append(metric_datum)
+        chunk_bytes += metric_datum_bytes
+
+    if chunk:
+        chunks.append(chunk)
+
+    return chunks
+
+
+def fits_request(
+    chunk: list[dict[str, Any]], request_bytes: int, max_metric_data: int, max_request_bytes: int
+) -> bool:
+    # `request_bytes` already includes the metric datum to be added to `chunk`
+    return len(chunk) < max_metric_data and request_bytes <= max_request_bytes
+
+
+def estimate_metric_datum_bytes(metric_datum: dict[str, Any]) -> int:
+    # The extra byte is the `&` separating the metric datum from the other parameters
+    return len(urlencode(list(flatten_query_parameters(metric_datum, METRIC_DATUM_QUERY_PREFIX)))) + 1
+
+
+def flatten_query_parameters(value: Any, prefix: str) -> Iterator[tuple[str, str]]:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten_query_parameters(item, f"{prefix}.{key}")
+    elif isinstance(value, list):
+        for index, item in enumerate(value, start=1):
+            yield from flatten_query_parameters(item, f"{prefix}.member.{index}")
+    else:
+        yield prefix, str(value)
@@ -0,0 +1,144 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+from typing import Any, Mapping
+
+from classification import generate_resource_type_metric_names
+from clients import get_cloudwatch_client
+from constants import EnvVarsNames
+from metrics import get_resource_type
+
+# Dashboard that isn't part of the stack, created by the first full resource scan and replaced by every other
+# one, no dashboard is updated when empty
+RESOURCE_TYPES_DASHBOARD_NAME = os.getenv(EnvVarsNames.RESOURCE_TYPES_DASHBOARD_NAME, "")
+
+# Number of resource types with the most unmanaged resources that get a widget
+RESOURCE_TYPES_DASHBOARD_SIZE = int(os.getenv(EnvVarsNames.RESOURCE_TYPES_DASHBOARD_SIZE, "12"))
+
+CLOUDWATCH_METRICS_NAMESPACE = os.getenv(EnvVarsNames.CLOUDWATCH_METRICS_NAMESPACE, "")
+
+DASHBOARD_WIDTH = 24
+HEADER_HEIGHT = 1
+WIDGET_WIDTH = 6
+WIDGET_HEIGHT = 6
+PERIOD_SECONDS = 24 * 60 * 60
+
+MATH_EXPRESSION_PERCENTAGE = "IF(total==0,100,100*(managed/total))"
+
+
+def select_top_unmanaged_resource_types(unmanaged_resources: Mapping[str, int], count: int) -> list[str]:
+    """
+    Returns up to `count` resource types with the most unmanaged resources, most unmanaged first
+    Ties are ordered by resource type, so the widgets don't move between resource scans with equal counts.
+    """
+
+    top_unmanaged_resources = heapq.nsmallest(
+        count,
+        (
+            (resource_type, unmanaged)
+            for resource_type, unmanaged in unmanaged_resources.items()
+            if unmanaged > 0
+        ),
+        key=lambda item: (-item[1], item[0]),
+    )
+    return [resource_type for resource_type, _ in top_unmanaged_resources]
+
+
+def update_resource_types_dashboard(
+    unmanaged_resources: Mapping[str, int], dimensions: list[dict[str, str]]
+) -> list[str]:
+    """
+    Replaces the widgets of the resource types dashboard with the resource types with the most
+    unmanaged resources and returns these resource types
+    """
+
+    if not RESOURCE_TYPES_DASHBOARD_NAME:
+        return []
+
+    resource_types = select_top_unmanaged_resource_types(unmanaged_resources, RESOURCE_TYPES_DASHBOARD_SIZE)
+
+    cloudwatch_client = get_cloudwatch_client()
+    dashboard_body = generate_resource_types_dashboard_body(
+        resource_types, dimensions, cloudwatch_client.meta.region_name
+    )
+    cloudwatch_client.put_dashboard(
+        DashboardName=RESOURCE_TYPES_DASHBOARD_NAME, DashboardBody=json.dumps(dashboard_body)
+    )
+    return resource_types
+
+
+def generate_resource_types_dashboard_body(
+    resource_types: list[str], dimensions: list[dict[str, str]], region: str
+) -> dict[str, Any]:
+    header = {
+        "type": "text",
+        "x": 0,
+        "y": 0,
+        "width": DASHBOARD_WIDTH,
+        "height": HEADER_HEIGHT,
+        "properties": {
+            "markdown": "## Resource types with the most unmanaged resources",
+            "background": "transparent",
+        },
+    }
+
+    widgets_per_row = DASHBOARD_WIDTH // WIDGET_WIDTH
+    widgets = [
+        generate_resource_type_widget(
+            resource_type,
+            dimensions,
+            region,
+            x=(index % widgets_per_row) * WIDGET_WIDTH,
+            y=HEADER_HEIGHT + (index // widgets_per_row) * WIDGET_HEIGHT,
+        )
+        for index, resource_type in enumerate(resource_types)
+    ]
+
+    return {"widgets": [header, *widgets]}
+
+
+def generate_resource_type_widget(
+    resource_type: str, dimensions: list[dict[str, str]], region: str, x: int, y: int
+) -> dict[str, Any]:
+    total_metric_name, managed_metric_name = generate_resource_type_metric_names(resource_type)
+    dimension_values = [
+        value for dimension in dimensions for value in (dimension["Name"], dimension["Value"])
+    ]
+
+    return {
+        "type": "metric",
+        "x": x,
+        "y": y,
+        "width": WIDGET_WIDTH,
+        "height": WIDGET_HEIGHT,
+        "properties": {
+            "title": generate_resource_type_label(resource_type),
+            "view": "timeSeries",
+            "stat": "Maximum",
+            "period": PERIOD_SECONDS,
+            "region": region,
+            "metrics": [
+                [CLOUDWATCH_METRICS_NAMESPACE, total_metric_name, *dimension_values, {"id": "total"}],
+                [CLOUDWATCH_METRICS_NAMESPACE, managed_metric_name, *dimension_values, {"id": "managed"}],
+                [
+                    {
+                        "expression": MATH_EXPRESSION_PERCENTAGE,
+                        "label": "Managed resources (%)",
+                        "id": "percentage",
+                        "yAxis": "right",
+                    }
+                ],
+            ],
+            "yAxis": {"left": {"min": 0}, "right": {"min": 0, "max": 100, "showUnits": False}},
+        },
+    }
+
+
+def generate_resource_type_label(resource_type: str) -> str:
+    parsed_resource_type = get_resource_type(resource_type)
+    return f"{parsed_resource_type.service} {parsed_resource_type.resource}s"
@@ -0,0 +1,183 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import json
+import os
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, DefaultDict, Iterator
+
+from attribution import IAC_TOOL_DIMENSION_NAME
+from attribution import generate_dimension_metric_data
+from clients import CLIENT_STATISTICS
+from clients import get_s3_client
+from constants import CLIENT_STATISTICS_PAYLOAD_KEY
+from constants import DASHBOARD_RESOURCE_TYPES_PAYLOAD_KEY
+from constants import GLOBAL_RESOURCE_DEDUPLICATION_PAYLOAD_KEY
+from constants import GLOBAL_RESOURCES_PAYLOAD_KEY
+from constants import METRIC_VALUES_PAYLOAD_KEY
+from constants import RESOURCE_TYPE_COUNTS_PAYLOAD_KEY
+from constants import RESULT_WRITER_DETAILS_EVENT_KEY
+from constants import STACK_ATTRIBUTION_PAYLOAD_KEY
+from constants import TAG_GROUPING_PAYLOAD_KEY
+from constants import UNMANAGED_RESOURCES_BY_RESOURCE_TYPE_PAYLOAD_KEY
+from constants import EnvVarsNames
+from deduplication import GlobalResourceSet
+from deduplication import generate_unique_resources_metric_values
+from hierarchy import generate_global_level_metric_data
+from hierarchy import generate_hierarchical_metric_data
+from hierarchy import merge_resource_type_counts
+from publishing import publish_metrics
+from resource_types_dashboard import update_resource_types_dashboard
+from tagging import TAG_VALUE_CAPACITY_FACTOR
+from tagging import TagGrouping
+from tagging import generate_tag_grouping_metric_data
+
+if TYPE_CHECKING:
+    from aws_lambda_powertools.utilities.typing import LambdaContext
+
+CLOUDWATCH_METRICS_NAMESPACE = os.getenv(EnvVarsNames.CLOUDWATCH_METRICS_NAMESPACE)
+
+# Number of distinct global resources of every target beyond which they're counted with HyperLogLog sketches
+GLOBAL_RESOURCES_MAX_EXACT_KEYS = int(os.getenv(EnvVarsNames.GLOBAL_RESOURCES_MAX_EXACT_KEYS, "4096"))
+
+# Number of values of every tag key with the most resources across the targets that get a metric of their own
+TAG_GROUPING_TOP_VALUES = int(os.getenv(EnvVarsNames.TAG_GROUPING_TOP_VALUES, "10"))
+
+MONITORED_TARGETS_METRIC_NAME = "MonitoredTargets"
+FAILED_TARGETS_METRIC_NAME = "FailedTargets"
+
+
+# pylint: disable=unused-argument
+def lambda_handler(event: dict[str, Any], context: LambdaContext) -> dict[str, Any]:
+    """
+    Rolls up the metrics extracted from every target of a fan-out orchestration into organization-level
+    metrics, which have no `AccountID` and `Region` dimensions
+
+    `event` is the output of the distributed map, whose results are written to S3 by its result writer.
+    """
+
+    result_writer_details = event.get(RESULT_WRITER_DETAILS_EVENT_KEY)
+    if not result_writer_details:
+        raise ValueError("ResultWriterDetails is required")
+
+    CLIENT_STATISTICS.reset()
+    manifest = read_json_object(result_writer_details["Bucket"], result_writer_details["Key"])
+    result_files = manifest.get("ResultFiles", {})
+
+    metric_values: DefaultDict[str, int] = defaultdict(int)
+    unmanaged_resources: DefaultDict[str, int] = defaultdict(int)
+    resource_type_counts: dict[str, list[int]] = {}
+    iac_tool_resources: DefaultDict[str, int] = defaultdict(int)
+    global_resources: GlobalResourceSet | None = None
+    tag_grouping = TagGrouping(capacity=TAG_GROUPING_TOP_VALUES * TAG_VALUE_CAPACITY_FACTOR)
+    for target_payload in read_target_payloads(manifest["DestinationBucket"], result_files):
+        add_values(metric_values, target_payload[METRIC_VALUES_PAYLOAD_KEY])
+        add_values(
+            unmanaged_resources, target_payload.get(UNMANAGED_RESOURCES_BY_RESOURCE_TYPE_PAYLOAD_KEY, {})
+        )
+        merge_resource_type_counts(
+            resource_type_counts, target_payload.get(RESOURCE_TYPE_COUNTS_PAYLOAD_KEY, {})
+        )
+        add_values(
+            iac_tool_resources, target_payload.get(STACK_ATTRIBUTION_PAYLOAD_KEY, {}).get("IaCTools", {})
+        )
+        global_resources = merge_global_resources(global_resources, target_payload)
+        tag_grouping.merge(
+            TagGrouping.from_json(target_payload.get(TAG_GROUPING_PAYLOAD_KEY, {}), tag_grouping.capacity)
+        )
+        metric_values[MONITORED_TARGETS_METRIC_NAME] += 1
+
+    metric_values[FAILED_TARGETS_METRIC_NAME] = count_failed_targets(
+        manifest["DestinationBucket"], result_files
+    )
+    metric_values.update(generate_unique_resources_metric_values(metric_values, global_resources))
+
+    metric_data = [
+        {"MetricName": metric_name, "Value": value, "Unit": "Count"}
+        for metric_name, value in metric_values.items()
+    ]
+    metric_data.extend(generate_global_level_metric_data(metric_values, []))
+    # Targets only count resource types when hierarchical metrics are enabled
+    metric_data.extend(generate_hierarchical_metric_data(resource_type_counts, []))
+    # Top stacks are specific to an account, only the managed resources of every IaC tool are rolled up
+    metric_data.extend(generate_dimension_metric_data(iac_tool_resources, IAC_TOOL_DIMENSION_NAME, []))
+    # Targets only group their resources by tag value when tag keys are configured
+    metric_data.extend(generate_tag_grouping_metric_data(tag_grouping, TAG_GROUPING_TOP_VALUES, []))
+
+    payload: dict[str, Any] = publish_metrics(
+        {
+            "MetricData": metric_data,
+            "Namespace": CLOUDWATCH_METRICS_NAMESPACE,
+        }
+    )
+
+    # Targets only count unmanaged resources by resource type when every resource type has metrics
+    if unmanaged_resources:
+        payload[DASHBOARD_RESOURCE_TYPES_PAYLOAD_KEY] = update_resource_types_dashboard(
+            unmanaged_resources, []
+        )
+
+    add_global_resource_deduplication_payload(payload, global_resources)
+    payload[CLIENT_STATISTICS_PAYLOAD_KEY] = CLIENT_STATISTICS.to_payload()
+    return payload
+
+
+def add_values(values: DefaultDict[str, int], other_values: dict[str, int]) -> None:
+    for name, value in other_values.items():
+        values[name] += value
+
+
+def merge_global_resources(
+    global_resources: GlobalResourceSet | None, target_payload: dict[str, Any]
+) -> GlobalResourceSet | None:
+    """
+    Merges the global resources of a target into the global resources of the previous targets, the same
+    global resources are listed by the target of every region of an account
+    """
+
+    if GLOBAL_RESOURCES_PAYLOAD_KEY not in target_payload:
+        return global_resources
+
+    target_global_resources = GlobalResourceSet.from_json(
+        target_payload[GLOBAL_RESOURCES_PAYLOAD_KEY], GLOBAL_RESOURCES_MAX_EXACT_KEYS
+    )
+    if global_resources is None:
+        return target_global_resources
+
+    global_resources.merge(target_global_resources)
+    return global_resources
+
+
+def add_global_resource_deduplication_payload(
+    payload: dict[str, Any], global_resources: GlobalResourceSet | None
+) -> None:
+    # Targets only return their global resources when the deduplication of global resources is enabled
+    if global_resources is not None:
+        payload[GLOBAL_RESOURCE_DEDUPLICATION_PAYLOAD_KEY] = global_resources.to_payload()
+
+
+def read_target_payloads(bucket_name: str, result_files: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """
+    Yields the output payload of the metric extraction of every target whose child execution succeeded
+    """
+
+    for execution_result in read_execution_results(bucket_name, result_files.get("SUCCEEDED", [])):
+        output = json.loads(execution_result["Output"])
+        yield output["Payload"]
+
+
+def count_failed_targets(bucket_name: str, result_files: dict[str, Any]) -> int:
+    failed_result_files = result_files.get("FAILED", []) + result_files.get("ABORTED", [])
+    return sum(1 for _ in read_execution_results(bucket_name, failed_result_files))
+
+
+def read_execution_results(bucket_name: str, result_files: list[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    for result_file in result_files:
+        yield from read_json_object(bucket_name, result_file["Key"])
+
+
+def read_json_object(bucket_name: str, key: str) -> Any:
+    response = get_s3_client().get_object(Bucket=bucket_name, Key=key)
+    return json.loads(response["Body"].read())
@@ -0,0 +1,175 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import hashlib
+import zlib
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Self
+
+from metrics import ScannedResourceKeys
+
+if TYPE_CHECKING:
+    from mypy_boto3_cloudformation.type_defs import ScannedResourceTypeDef
+    from mypy_boto3_s3.client import S3Client
+
+SNAPSHOT_FORMAT_VERSION = b"IAS1"
+
+# The lowest bit of a snapshot key holds the `ManagedByStack` flag,
+# the remaining 63 bits hold a hash of the resource type and resource identifier
+MANAGED_BIT = 1
+
+
+@dataclass
+class SnapshotDiff:
+    added_resources: int = 0
+    removed_resources: int = 0
+    added_unmanaged_resources: int = 0
+    newly_managed_resources: int = 0
+    newly_unmanaged_resources: int = 0
+
+    def record_added(self, key: int) -> None:
+        self.added_resources += 1
+        self.added_unmanaged_resources += not key & MANAGED_BIT
+
+    def record_removed(self) -> None:
+        self.removed_resources += 1
+
+    def record_unchanged_identity(self, previous_key: int, current_key: int) -> None:
+        if previous_key == current_key:
+            return
+
+        if current_key & MANAGED_BIT:
+            self.newly_managed_resources += 1
+        else:
+            self.newly_unmanaged_resources += 1
+
+    def to_metric_values(self) -> dict[str, int]:
+        return {
+            "AddedResources": self.added_resources,
+            "RemovedResources": self.removed_resources,
+            "AddedUnmanagedResources": self.added_unmanaged_resources,
+            "NewlyManagedResources": self.newly_managed_resources,
+            "NewlyUnmanagedResources": self.newly_unmanaged_resources,
+        }
+
+
+class ResourceSnapshot:
+    """
+    Compact record of the classified resources of a resource scan
+
+    Every resource is stored as a single 64-bit key in an `array`, which takes 8 bytes per resource
+    instead of the hundreds of bytes of a `ScannedResourceTypeDef`.
+    """
+
+    def __init__(self, keys: array[int] | None = None) -> None:
+        self.keys = keys if keys is not None else array("Q")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(
+        self, scanned_resources: Iterable[ScannedResourceTypeDef], excluded_resource_types: frozenset[str]
+    ) -> None:
+        self.keys.extend(
+            encode_scanned_resource(scanned_resource)
+            for scanned_resource in scanned_resources
+            if scanned_resource.get(ScannedResourceKeys.ResourceType, "") not in excluded_resource_types
+        )
+
+    def extend(self, other: "ResourceSnapshot") -> None:
+        self.keys.extend(other.keys)
+
+    def clear(self) -> None:
+        self.keys = array("Q")
+
+    def to_bytes(self) -> bytes:
+        self.sort()
+        return SNAPSHOT_FORMAT_VERSION + zlib.compress(self.keys.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Self:
+        if not data.startswith(SNAPSHOT_FORMAT_VERSION):
+            raise ValueError("Unsupported resource snapshot format")
+
+        keys = array("Q")
+        keys.frombytes(zlib.decompress(data[len(SNAPSHOT_FORMAT_VERSION) :]))
+        return cls(keys)
+
+    def sort(self) -> None:
+        self.keys = array("Q", sorted(self.keys))
+
+    def diff(self, previous: "ResourceSnapshot") -> SnapshotDiff:
+        """
+        Compares the resources of this snapshot with the resources of a previous one
+
+        Both snapshots are walked once in key order, so resources are matched by identity
+        without building a hash table of either snapshot.
+        """
+
+        self.sort()
+        previous.sort()
+
+        snapshot_diff = SnapshotDiff()
+        previous_index, current_index = _walk_common_range(previous.keys, self.keys, snapshot_diff)
+
+        snapshot_diff.removed_resources += len(previous.keys) - previous_index
+        for current_key in self.keys[current_index:]:
+            snapshot_diff.record_added(current_key)
+
+        return snapshot_diff
+
+
+def _walk_common_range(
+    previous_keys: array[int], current_keys: array[int], snapshot_diff: SnapshotDiff
+) -> tuple[int, int]:
+    previous_index, current_index = 0, 0
+
+    while previous_index < len(previous_keys) and current_index < len(current_keys):
+        previous_key, current_key = previous_keys[previous_index], current_keys[current_index]
+
+        if previous_key >> 1 < current_key >> 1:
+            snapshot_diff.record_removed()
+            previous_index += 1
+        elif previous_key >> 1 > current_key >> 1:
+            snapshot_diff.record_added(current_key)
+            current_index += 1
+        else:
+            snapshot_diff.record_unchanged_identity(previous_key, current_key)
+            previous_index += 1
+            current_index += 1
+
+    return previous_index, current_index
+
+
+def encode_scanned_resource(scanned_resource: ScannedResourceTypeDef, namespace: str = "") -> int:
+    resource_type: str = scanned_resource.get(ScannedResourceKeys.ResourceType, "")  # type: ignore
+    identifier = scanned_resource.get(ScannedResourceKeys.ResourceIdentifier, {})
+    identifier_parts = [f"{key}={value}" for key, value in sorted(identifier.items())]  # type: ignore
+    identity = "|".join([resource_type, *identifier_parts])
+    # A namespace, such as an account ID, tells apart the resources of different accounts with the same
+    # identifier
+    if namespace:
+        identity = f"{namespace}|{identity}"
+
+    digest = hashlib.blake2b(identity.encode(), digest_size=8).digest()
+    managed = bool(scanned_resource.get(ScannedResourceKeys.ManagedByStack, False))
+
+    return (int.from_bytes(digest, "little") & ~MANAGED_BIT) | managed
+
+
+def load_resource_snapshot(s3_client: S3Client, bucket_name: str, key: str) -> ResourceSnapshot | None:
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=key)
+    except s3_client.exceptions.NoSuchKey:
+        return None
+
+    return ResourceSnapshot.from_bytes(response["Body"].read())
+
+
+def save_resource_snapshot(
+    s3_client: S3Client, bucket_name: str, key: str, snapshot: ResourceSnapshot
+) -> None:
+    s3_client.put_object(Bucket=bucket_name, Key=key, Body=snapshot.to_bytes())
@@ -1,27 +1,143 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+from __future__ import annotations
+
 import json
-from typing import Any
+import os
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import TYPE_CHECKING, Any
 
-import boto3
-from aws_lambda_powertools.utilities.typing import LambdaContext
+from clients import CLIENT_STATISTICS
+from constants import CLIENT_STATISTICS_PAYLOAD_KEY
 from constants import RESOURCE_SCAN_ID_EVENT_KEY
+from constants import SCAN_TYPE_EVENT_KEY
+from constants import WAIT_SECONDS_EVENT_KEY
+from constants import EnvVarsNames
+from constants import ScanTypes
+from polling import INITIAL_WAIT_SECONDS
+from targets import get_target_cloudformation_client
+from targets import get_target_event_values
+
+if TYPE_CHECKING:
+    from aws_lambda_powertools.utilities.typing import LambdaContext
+    from mypy_boto3_cloudformation.client import CloudFormationClient
+    from mypy_boto3_cloudformation.type_defs import ResourceScanSummaryTypeDef
+
+RESOURCE_TYPE_FOCUS_LIST_JSON = os.getenv(EnvVarsNames.RESOURCE_TYPE_FOCUS_LIST_JSON, "[]")
+RESOURCE_TYPE_FOCUS_LIST = json.loads(RESOURCE_TYPE_FOCUS_LIST_JSON)
+
+# A COMPLETE full resource scan started within this number of minutes is reused instead of starting
+# a new resource scan, a value of 0 always starts a new resource scan
+REUSE_RESOURCE_SCAN_MAX_AGE_MINUTES = int(os.getenv(EnvVarsNames.REUSE_RESOURCE_SCAN_MAX_AGE_MINUTES, "0"))
 
-CLOUDFORMATION_CLIENT = boto3.client("cloudformation")
+COMPLETE_RESOURCE_SCAN_STATUS = "COMPLETE"
+
+# A scan filter of `StartResourceScan` accepts up to 100 resource types
+MAX_SCAN_FILTER_RESOURCE_TYPES = 100
 
 
 # pylint: disable=unused-argument
 def lambda_handler(event: dict[str, Any], context: LambdaContext) -> Any:
     # Don't start a new resource scan and if `ResourceScanId` exists in `event`
     # return the existing `ResourceScanId` instead
+    # The target account and region of the fan-out orchestration are passed on to the next states
+    target_event_values = get_target_event_values(event)
+
     resource_scan_id = event.get(RESOURCE_SCAN_ID_EVENT_KEY)
     if resource_scan_id:
-        return {RESOURCE_SCAN_ID_EVENT_KEY: resource_scan_id}
+        return {
+            RESOURCE_SCAN_ID_EVENT_KEY: resource_scan_id,
+            WAIT_SECONDS_EVENT_KEY: INITIAL_WAIT_SECONDS,
+            **target_event_values,
+        }
+
+    CLIENT_STATISTICS.reset()
+    cloudformation_client = get_target_cloudformation_client(event)
+
+    # A reused resource scan is returned as described by `DescribeResourceScan` with a COMPLETE status,
+    # so the state machine can skip waiting for it and extract its metrics straight away
+    reusable_resource_scan = find_reusable_resource_scan(cloudformation_client)
+    if reusable_resource_scan is not None:
+        return json.loads(
+            json.dumps(
+                {
+                    **cloudformation_client.describe_resource_scan(
+                        ResourceScanId=reusable_resource_scan["ResourceScanId"]
+                    ),
+                    CLIENT_STATISTICS_PAYLOAD_KEY: CLIENT_STATISTICS.to_payload(),
+                    **target_event_values,
+                },
+                default=str,
+            )
+        )
 
     return json.loads(
         json.dumps(
-            CLOUDFORMATION_CLIENT.start_resource_scan(),
+            {
+                **cloudformation_client.start_resource_scan(**create_scan_arguments(event)),
+                WAIT_SECONDS_EVENT_KEY: INITIAL_WAIT_SECONDS,
+                CLIENT_STATISTICS_PAYLOAD_KEY: CLIENT_STATISTICS.to_payload(),
+                **target_event_values,
+            },
             default=str,
         )
     )
+
+
+def find_reusable_resource_scan(
+    cloudformation_client: CloudFormationClient,
+) -> ResourceScanSummaryTypeDef | None:
+    """
+    Returns the most recent COMPLETE full resource scan started within the reuse max age, if any
+
+    Only full resource scans are reused, they cover every resource type and serve partial runs as well,
+    while a partial resource scan may have been started by another tool with different scan filters.
+    """
+
+    if REUSE_RESOURCE_SCAN_MAX_AGE_MINUTES <= 0:
+        return None
+
+    oldest_start_time = datetime.now(timezone.utc) - timedelta(minutes=REUSE_RESOURCE_SCAN_MAX_AGE_MINUTES)
+    reusable_resource_scans = list_reusable_resource_scans(cloudformation_client, oldest_start_time)
+    if not reusable_resource_scans:
+        return None
+
+    return max(reusable_resource_scans, key=lambda summary: summary["StartTime"])
+
+
+def list_reusable_resource_scans(
+    cloudformation_client: CloudFormationClient, oldest_start_time: datetime
+) -> list[ResourceScanSummaryTypeDef]:
+    paginator = cloudformation_client.get_paginator("list_resource_scans")
+    return [
+        resource_scan_summary
+        for page in paginator.paginate(ScanTypeFilter=ScanTypes.FULL)
+        for resource_scan_summary in page["ResourceScanSummaries"]
+        if is_reusable_resource_scan(resource_scan_summary, oldest_start_time)
+    ]
+
+
+def is_reusable_resource_scan(
+    resource_scan_summary: ResourceScanSummaryTypeDef, oldest_start_time: datetime
+) -> bool:
+    start_time = resource_scan_summary.get("StartTime")
+    if start_time is None or start_time < oldest_start_time:
+        return False
+
+    return resource_scan_summary.get("Status") == COMPLETE_RESOURCE_SCAN_STATUS
+
+
+def create_scan_arguments(event: dict[str, Any]) -> dict[str, Any]:
+    # A partial resource scan only scans the focused resource types, which is much faster than a full one
+    if event.get(SCAN_TYPE_EVENT_KEY) != ScanTypes.PARTIAL:
+        return {}
+
+    if not RESOURCE_TYPE_FOCUS_LIST or len(RESOURCE_TYPE_FOCUS_LIST) > MAX_SCAN_FILTER_RESOURCE_TYPES:
+        raise ValueError(
+            f"A partial resource scan requires 1 to {MAX_SCAN_FILTER_RESOURCE_TYPES} focused resource types"
+        )
+
+    return {"ScanFilters": [{"Types": RESOURCE_TYPE_FOCUS_LIST}]}
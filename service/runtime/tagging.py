@@ -0,0 +1,376 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import functools
+import heapq
+import re
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING, Any, Iterable, Mapping, Self, Sequence
+
+from metrics import ALL_RESOURCES_METRIC_NAME
+from metrics import ScannedResourceKeys
+from metrics import generate_managed_metric_name
+from metrics import generate_total_metric_name
+from metrics import get_resource_type
+
+if TYPE_CHECKING:
+    from mypy_boto3_cloudformation.type_defs import ScannedResourceTypeDef
+    from mypy_boto3_resourcegroupstaggingapi.client import (
+        ResourceGroupsTaggingAPIClient,
+    )
+    from mypy_boto3_resourcegroupstaggingapi.type_defs import TagTypeDef
+
+TAG_KEY_DIMENSION_NAME = "TagKey"
+TAG_VALUE_DIMENSION_NAME = "TagValue"
+
+# Dimension values of the resources of the tag values that aren't among the top tag values, and of the
+# resources without the tag key
+OTHER_TAG_VALUES_DIMENSION_VALUE = "(Other)"
+UNTAGGED_DIMENSION_VALUE = "(Untagged)"
+
+TOTAL_RESOURCES_METRIC_NAME = generate_total_metric_name(ALL_RESOURCES_METRIC_NAME)
+MANAGED_RESOURCES_METRIC_NAME = generate_managed_metric_name(ALL_RESOURCES_METRIC_NAME)
+
+# Number of tag values tracked for every top tag value, so that the top tag values are the ones with the most
+# resources although tag values are dropped from the counts while the resource scan is listed
+TAG_VALUE_CAPACITY_FACTOR = 10
+
+# The resource part of most ARNs is an ARN resource type followed by the resource ID, such as
+# `instance/i-1234567890abcdef0` or `log-group:/aws/lambda/my-function`, where the resource ID keeps its path
+ARN_RESOURCE_TYPE_SEPARATORS = re.compile("[/:]")
+ARN_PREFIX = "arn:"
+ARN_PARTS = 6
+
+# Identifiers of some resource types are URLs ending with the resource ID, such as the URL of a queue
+URL_PREFIX = "https://"
+
+# Word boundaries of the resource of a resource type, the ARN resource type of most resource types is their
+# resource in kebab case, such as the `log-group` of `AWS::Logs::LogGroup` or the `vpc` of `AWS::EC2::VPC`
+RESOURCE_WORD_BOUNDARIES = re.compile("(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+# Maximum number of resource types whose ARN resource type is kept by `get_arn_resource_type`, the same as
+# the registry of `get_resource_type`
+ARN_RESOURCE_TYPE_CACHE_SIZE = 4096
+
+# ARN service and ARN resource type of the resource types whose ARN doesn't follow their lowercased service
+# and kebab case resource. The ARN resource type is empty when the resource part of the ARN is the resource
+# ID alone.
+ARN_RESOURCE_TYPES = {
+    "AWS::S3::Bucket": ("s3", ""),
+    "AWS::SNS::Topic": ("sns", ""),
+    "AWS::SQS::Queue": ("sqs", ""),
+    "AWS::ApiGateway::RestApi": ("apigateway", "restapis"),
+    "AWS::Cognito::UserPool": ("cognito-idp", "userpool"),
+    "AWS::EC2::EIP": ("ec2", "elastic-ip"),
+    "AWS::EC2::NatGateway": ("ec2", "natgateway"),
+    "AWS::EFS::FileSystem": ("elasticfilesystem", "file-system"),
+    "AWS::ElastiCache::CacheCluster": ("elasticache", "cluster"),
+    "AWS::ElasticLoadBalancingV2::LoadBalancer": ("elasticloadbalancing", "loadbalancer"),
+    "AWS::ElasticLoadBalancingV2::TargetGroup": ("elasticloadbalancing", "targetgroup"),
+    "AWS::IAM::ManagedPolicy": ("iam", "policy"),
+    "AWS::KinesisFirehose::DeliveryStream": ("firehose", "deliverystream"),
+    "AWS::RDS::DBCluster": ("rds", "cluster"),
+    "AWS::RDS::DBInstance": ("rds", "db"),
+    "AWS::StepFunctions::Activity": ("states", "activity"),
+    "AWS::StepFunctions::StateMachine": ("states", "stateMachine"),
+}
+
+
+class ResourceTagIndex:
+    """
+    Values of the grouping tag keys of the tagged resources of an account and region
+
+    Resource scans don't return the tags of the resources, and the Resource Groups Tagging API identifies
+    resources by ARN, so the tag values are indexed by ARN and by the service, resource type and resource ID
+    of the ARN. The identifier of most scanned resources contains one of them, such as the name of a bucket,
+    the ID of an instance or the name of a log group with its path. The resources found neither way count
+    as untagged.
+    """
+
+    __slots__ = ("tag_keys", "tag_values", "untagged_values")
+
+    def __init__(self, tag_keys: tuple[str, ...] = ()) -> None:
+        self.tag_keys = tag_keys
+        # The ARN and the resource ID key of a resource share the same list of tag values
+        self.tag_values: dict[str, list[str]] = {}
+        self.untagged_values = (UNTAGGED_DIMENSION_VALUE,) * len(tag_keys)
+
+    def add(self, resource_arn: str, tag_key_position: int, tag_value: str) -> None:
+        tag_values = self.tag_values.get(resource_arn)
+        if tag_values is None:
+            tag_values = [UNTAGGED_DIMENSION_VALUE] * len(self.tag_keys)
+            self.tag_values[resource_arn] = tag_values
+            self.tag_values[generate_arn_resource_key(resource_arn)] = tag_values
+
+        tag_values[tag_key_position] = tag_value
+
+    def get_tag_values(self, resource_type: str, resource_identifier: Mapping[str, str]) -> Sequence[str]:
+        arn_service, arn_resource_type = get_arn_resource_type(resource_type)
+        for identifier_value in resource_identifier.values():
+            tag_values = self.tag_values.get(
+                generate_identifier_key(arn_service, arn_resource_type, identifier_value)
+            )
+            if tag_values is not None:
+                return tag_values
+
+        return self.untagged_values
+
+    def count_tag_values(
+        self, scanned_resources: Iterable[ScannedResourceTypeDef], excluded_resource_types: frozenset[str]
+    ) -> list[dict[str, list[int]]]:
+        """
+        Returns the [total, managed] resources of every value of every tag key, in the order of `tag_keys`
+        """
+
+        value_counts: list[dict[str, list[int]]] = [{} for _ in self.tag_keys]
+        for scanned_resource in scanned_resources:
+            resource_type: str = scanned_resource.get(ScannedResourceKeys.ResourceType, "")  # type: ignore
+            if resource_type in excluded_resource_types:
+                continue
+
+            managed = int(bool(scanned_resource.get(ScannedResourceKeys.ManagedByStack, False)))
+            resource_identifier = scanned_resource.get(ScannedResourceKeys.ResourceIdentifier, {})
+            tag_values = self.get_tag_values(resource_type, resource_identifier)  # type: ignore
+            for tag_value_counts, tag_value in zip(value_counts, tag_values):
+                counts = tag_value_counts.setdefault(tag_value, [0, 0])
+                counts[0] += 1
+                counts[1] += managed
+
+        return value_counts
+
+
+@dataclass
+class TagValueCounts:
+    """
+    Total and managed resources of the most frequent values of a tag key
+
+    A Space-Saving style summary of at most `capacity` tag values: once the tag values reach twice the
+    capacity, only the `capacity` tag values with the most resources are kept, and the resources of the
+    dropped tag values are added to `other`. Summaries are merged the same way, so the memory, the payload
+    and the number of metrics stay the same on accounts with thousands of distinct tag values.
+    """
+
+    capacity: int
+    # Maps every tag value to its [total, managed] resources
+    values: dict[str, list[int]] = field(default_factory=dict)
+    other: list[int] = field(default_factory=lambda: [0, 0])
+
+    def add_counts(self, value_counts: Mapping[str, Sequence[int]]) -> None:
+        for tag_value, (total, managed) in value_counts.items():
+            counts = self.values.setdefault(tag_value, [0, 0])
+            counts[0] += total
+            counts[1] += managed
+
+        # Trimming every time twice the capacity is reached spreads its cost over many pages
+        if len(self.values) > 2 * self.capacity:
+            self.trim(self.capacity)
+
+    def trim(self, size: int) -> None:
+        kept_values = dict(heapq.nsmallest(size, self.values.items(), key=rank_tag_value))
+        for tag_value, (total, managed) in self.values.items():
+            if tag_value not in kept_values:
+                self.other[0] += total
+                self.other[1] += managed
+
+        self.values = kept_values
+
+    def merge(self, other: TagValueCounts) -> None:
+        self.other[0] += other.other[0]
+        self.other[1] += other.other[1]
+        self.add_counts(other.values)
+
+    def select_top(self, top_values: int) -> dict[str, list[int]]:
+        """
+        Returns the [total, managed] resources of the `top_values` tag values with the most resources, of the
+        untagged resources, and of the other tag values combined under `OTHER_TAG_VALUES_DIMENSION_VALUE`
+        """
+
+        # The untagged resources always rank first, so they don't take the place of a top tag value
+        selected_values = dict(
+            heapq.nsmallest(
+                top_values + (UNTAGGED_DIMENSION_VALUE in self.values),
+                self.values.items(),
+                key=rank_tag_value,
+            )
+        )
+        other = list(self.other)
+        for tag_value, (total, managed) in self.values.items():
+            if tag_value not in selected_values:
+                other[0] += total
+                other[1] += managed
+
+        if other[0] > 0:
+            selected_values[OTHER_TAG_VALUES_DIMENSION_VALUE] = other
+
+        return selected_values
+
+    def to_json(self) -> dict[str, Any]:
+        return {"Values": self.values, "Other": self.other}
+
+    @classmethod
+    def from_json(cls, data: Mapping[str, Any], capacity: int) -> Self:
+        return cls(capacity=capacity, values=data["Values"], other=data["Other"])
+
+
+class TagGrouping:
+    """
+    Total and managed resources of a resource scan grouped by the values of every tag key of the tag index,
+    counted in the same pass over the pages as the other metrics. Groups nothing without tag keys.
+    """
+
+    __slots__ = ("tag_index", "capacity", "tag_value_counts")
+
+    def __init__(self, tag_index: ResourceTagIndex | None = None, capacity: int = 0) -> None:
+        self.tag_index = tag_index if tag_index is not None else ResourceTagIndex()
+        self.capacity = capacity
+        self.tag_value_counts = {tag_key: TagValueCounts(capacity) for tag_key in self.tag_index.tag_keys}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.tag_index.tag_keys)
+
+    def create_empty(self) -> TagGrouping:
+        # The tag index is only read once listed, so it's shared by the groupings of every scan slice
+        return TagGrouping(self.tag_index, self.capacity)
+
+    def add(
+        self, scanned_resources: Iterable[ScannedResourceTypeDef], excluded_resource_types: frozenset[str]
+    ) -> None:
+        if not self.enabled:
+            return
+
+        value_counts = self.tag_index.count_tag_values(scanned_resources, excluded_resource_types)
+        for tag_key, tag_value_counts in zip(self.tag_index.tag_keys, value_counts):
+            self.tag_value_counts[tag_key].add_counts(tag_value_counts)
+
+    def merge(self, other: TagGrouping) -> None:
+        for tag_key, tag_value_counts in other.tag_value_counts.items():
+            self.tag_value_counts.setdefault(tag_key, TagValueCounts(self.capacity)).merge(tag_value_counts)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            tag_key: tag_value_counts.to_json() for tag_key, tag_value_counts in self.tag_value_counts.items()
+        }
+
+    @classmethod
+    def from_json(cls, data: Mapping[str, Any], capacity: int) -> Self:
+        tag_grouping = cls(capacity=capacity)
+        tag_grouping.tag_value_counts = {
+            tag_key: TagValueCounts.from_json(tag_value_counts, capacity)
+            for tag_key, tag_value_counts in data.items()
+        }
+        return tag_grouping
+
+
+def rank_tag_value(item: tuple[str, list[int]]) -> tuple[bool, int, str]:
+    # Untagged resources first, then the tag values with the most resources, ties ordered by tag value
+    tag_value, (total, _) = item
+    return tag_value != UNTAGGED_DIMENSION_VALUE, -total, tag_value
+
+
+def list_resource_tags(tagging_client: ResourceGroupsTaggingAPIClient, tag_index: ResourceTagIndex) -> None:
+    """
+    Adds the value of every tag key of `tag_index` of every tagged resource of the account and region to
+    `tag_index`, listed with `GetResources` filtered by tag key, since multiple tag filters only return the
+    resources with every tag key
+    """
+
+    paginator = tagging_client.get_paginator("get_resources")
+    for tag_key_position, tag_key in enumerate(tag_index.tag_keys):
+        for page in paginator.paginate(TagFilters=[{"Key": tag_key}], PaginationConfig={"PageSize": 100}):
+            for resource_tag_mapping in page["ResourceTagMappingList"]:
+                tag_index.add(
+                    resource_tag_mapping.get("ResourceARN", ""),
+                    tag_key_position,
+                    get_tag_value(resource_tag_mapping.get("Tags", []), tag_key),
+                )
+
+
+def get_tag_value(tags: Iterable[TagTypeDef], tag_key: str) -> str:
+    return next((tag["Value"] for tag in tags if tag["Key"] == tag_key), UNTAGGED_DIMENSION_VALUE)
+
+
+def generate_arn_resource_key(resource_arn: str) -> str:
+    # arn:partition:service:region:account-id:resource
+    arn_parts = resource_arn.split(":", ARN_PARTS - 1)
+    if len(arn_parts) < ARN_PARTS:
+        return resource_arn
+
+    return generate_resource_key(arn_parts[2], *split_arn_resource(arn_parts[5]))
+
+
+def split_arn_resource(arn_resource: str) -> tuple[str, str]:
+    """
+    Returns the ARN resource type and the resource ID of the resource part of an ARN, such as `log-group` and
+    `/aws/lambda/my-function` for `log-group:/aws/lambda/my-function:*`, or an empty ARN resource type when
+    the resource part is the resource ID alone, such as the name of a bucket
+    """
+
+    # Log group ARNs may end with `:*`, and API Gateway ARNs start with `/`, such as `/restapis/a1b2c3d4e5`
+    arn_resource = arn_resource.removeprefix("/").removesuffix(":*")
+    separator = ARN_RESOURCE_TYPE_SEPARATORS.search(arn_resource)
+    if separator is None:
+        return "", arn_resource
+
+    return arn_resource[: separator.start()], arn_resource[separator.end() :]
+
+
+@functools.lru_cache(maxsize=ARN_RESOURCE_TYPE_CACHE_SIZE)
+def get_arn_resource_type(resource_type: str) -> tuple[str, str]:
+    """
+    Returns the ARN service and the ARN resource type of a resource type, such as `logs` and `log-group`
+    for `AWS::Logs::LogGroup`
+    """
+
+    if resource_type in ARN_RESOURCE_TYPES:
+        return ARN_RESOURCE_TYPES[resource_type]
+
+    parsed_resource_type = get_resource_type(resource_type)
+    return (
+        parsed_resource_type.service.lower(),
+        RESOURCE_WORD_BOUNDARIES.sub("-", parsed_resource_type.resource).lower(),
+    )
+
+
+def generate_identifier_key(arn_service: str, arn_resource_type: str, identifier_value: str) -> str:
+    # ARN identifiers, such as the ARN of a topic, are indexed as is
+    if identifier_value.startswith(ARN_PREFIX):
+        return identifier_value
+
+    # URL identifiers end with the resource ID, such as `https://sqs.<region>.amazonaws.com/<account>/<queue>`
+    if identifier_value.startswith(URL_PREFIX):
+        identifier_value = identifier_value.rstrip("/").rpartition("/")[2]
+
+    return generate_resource_key(arn_service, arn_resource_type, identifier_value)
+
+
+def generate_resource_key(arn_service: str, arn_resource_type: str, resource_id: str) -> str:
+    return f"{arn_service}|{arn_resource_type}|{resource_id}"
+
+
+def generate_tag_grouping_metric_data(
+    tag_grouping: TagGrouping, top_values: int, dimensions: list[dict[str, str]]
+) -> list[dict[str, Any]]:
+    """
+    Generates the total and managed resources metric data of the top values of every tag key, of the untagged
+    resources and of the other tag values, dimensioned by `TagKey` and `TagValue` in addition to `dimensions`
+    """
+
+    return [
+        {
+            "MetricName": metric_name,
+            "Value": value,
+            "Unit": "Count",
+            "Dimensions": [
+                *dimensions,
+                {"Name": TAG_KEY_DIMENSION_NAME, "Value": tag_key},
+                {"Name": TAG_VALUE_DIMENSION_NAME, "Value": tag_value},
+            ],
+        }
+        for tag_key, tag_value_counts in sorted(tag_grouping.tag_value_counts.items())
+        for tag_value, counts in sorted(tag_value_counts.select_top(top_values).items())
+        for metric_name, value in zip((TOTAL_RESOURCES_METRIC_NAME, MANAGED_RESOURCES_METRIC_NAME), counts)
+    ]
@@ -0,0 +1,117 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import boto3
+from botocore.config import Config
+from clients import create_client_config
+from clients import get_cloudformation_client
+from clients import get_sts_client
+from clients import get_tagging_client
+from clients import instrument_client
+from constants import TARGET_ACCOUNT_ID_EVENT_KEY
+from constants import TARGET_REGION_EVENT_KEY
+from constants import EnvVarsNames
+
+if TYPE_CHECKING:
+    from mypy_boto3_cloudformation.client import CloudFormationClient
+    from mypy_boto3_resourcegroupstaggingapi.client import (
+        ResourceGroupsTaggingAPIClient,
+    )
+
+# ARN of the role assumed in a monitored account, with an `{AccountId}` placeholder for the account ID
+TARGET_ROLE_ARN_TEMPLATE = os.getenv(EnvVarsNames.TARGET_ROLE_ARN_TEMPLATE, "")
+
+TARGET_ROLE_SESSION_NAME = "IacAdoptionMonitor"
+
+
+@dataclass(frozen=True)
+class Target:
+    """
+    An account and region monitored through the fan-out orchestration
+    """
+
+    account_id: str
+    region: str
+
+
+def get_target(event: dict[str, Any]) -> Target | None:
+    # Events without a target are for the account and region the solution is deployed to
+    account_id = event.get(TARGET_ACCOUNT_ID_EVENT_KEY)
+    region = event.get(TARGET_REGION_EVENT_KEY)
+    if not account_id or not region:
+        return None
+
+    return Target(account_id=account_id, region=region)
+
+
+def get_target_event_values(event: dict[str, Any]) -> dict[str, str]:
+    """
+    Returns the target keys of `event`, to be passed on to the next state of the orchestration
+    """
+
+    return {key: event[key] for key in (TARGET_ACCOUNT_ID_EVENT_KEY, TARGET_REGION_EVENT_KEY) if key in event}
+
+
+def get_target_cloudformation_client(
+    event: dict[str, Any], config: Config | None = None
+) -> CloudFormationClient:
+    """
+    Returns a CloudFormation client of the target of `event` using the role assumed in the target account,
+    or the shared CloudFormation client of the execution environment when `event` has no target
+    """
+
+    target = get_target(event)
+    if target is None:
+        cloudformation_client: CloudFormationClient = get_cloudformation_client(config)
+        return cloudformation_client
+
+    cloudformation_client = instrument_client(
+        assume_target_role(target).client(
+            "cloudformation", region_name=target.region, config=create_client_config(config)
+        )
+    )
+    return cloudformation_client
+
+
+def get_target_tagging_client(
+    event: dict[str, Any], config: Config | None = None
+) -> ResourceGroupsTaggingAPIClient:
+    """
+    Returns a Resource Groups Tagging API client of the target of `event` using the role assumed in the target
+    account, or the shared client of the execution environment when `event` has no target
+    """
+
+    target = get_target(event)
+    if target is None:
+        tagging_client: ResourceGroupsTaggingAPIClient = get_tagging_client(config)
+        return tagging_client
+
+    tagging_client = instrument_client(
+        assume_target_role(target).client(
+            "resourcegroupstaggingapi", region_name=target.region, config=create_client_config(config)
+        )
+    )
+    return tagging_client
+
+
+def assume_target_role(target: Target) -> boto3.Session:
+    if not TARGET_ROLE_ARN_TEMPLATE:
+        raise ValueError("TARGET_ROLE_ARN_TEMPLATE is required to monitor other accounts")
+
+    credentials = get_sts_client().assume_role(
+        RoleArn=TARGET_ROLE_ARN_TEMPLATE.format(AccountId=target.account_id),
+        RoleSessionName=TARGET_ROLE_SESSION_NAME,
+    )["Credentials"]
+
+    return boto3.Session(
+        aws_access_key_id=credentials["AccessKeyId"],
+        aws_secret_access_key=credentials["SecretAccessKey"],
+        aws_session_token=credentials["SessionToken"],
+        region_name=target.region,
+    )
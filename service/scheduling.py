@@ -1,20 +1,25 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import json
 from typing import Any
 
 from aws_cdk import aws_iam as iam
 from aws_cdk import aws_scheduler as scheduler
 from constructs import Construct
 
+import cdk_constants as constants
 from service.orchestration import Orchestration
+from service.runtime.constants import SCAN_TYPE_EVENT_KEY
+from service.runtime.constants import ScanTypes
 
 FLEXIBLE_TIME_WINDOW = scheduler.CfnSchedule.FlexibleTimeWindowProperty(
     mode="FLEXIBLE",
     maximum_window_in_minutes=60,
 )
 SCHEDULE_EXPRESSION_DAILY = "rate(1 day)"
-STATE_MACHINE_INPUT = "{}"
+STATE_MACHINE_INPUT = json.dumps({SCAN_TYPE_EVENT_KEY: ScanTypes.FULL})
+PARTIAL_SCAN_STATE_MACHINE_INPUT = json.dumps({SCAN_TYPE_EVENT_KEY: ScanTypes.PARTIAL})
 
 
 class Scheduling(Construct):
@@ -24,7 +29,7 @@ class Scheduling(Construct):
         # IAM role allowing scheduler to execute orchestration.state_machine
         scheduler_execution_role = self._create_scheduler_iam_execution_role(orchestration)
 
-        target = self._create_schedule_target(orchestration, scheduler_execution_role)
+        target = self._create_schedule_target(orchestration, scheduler_execution_role, STATE_MACHINE_INPUT)
 
         # Schedule the execution of orchestration.state_machine
         self.event_bridge_schedule = scheduler.CfnSchedule(
@@ -35,13 +40,27 @@ class Scheduling(Construct):
             target=target,
         )
 
+        # Schedule more frequent executions of orchestration.state_machine that only scan the focused
+        # resource types, these only refresh the metrics of the focused resource types
+        if constants.PARTIAL_SCAN_SCHEDULE_EXPRESSION:
+            partial_scan_target = self._create_schedule_target(
+                orchestration, scheduler_execution_role, PARTIAL_SCAN_STATE_MACHINE_INPUT
+            )
+            self.partial_scan_event_bridge_schedule = scheduler.CfnSchedule(
+                self,
+                "PartialScanSchedule",
+                flexible_time_window=FLEXIBLE_TIME_WINDOW,
+                schedule_expression=constants.PARTIAL_SCAN_SCHEDULE_EXPRESSION,
+                target=partial_scan_target,
+            )
+
     def _create_schedule_target(
-        self, orchestration: Orchestration, target_execution_role: iam.Role
+        self, orchestration: Orchestration, target_execution_role: iam.Role, state_machine_input: str
     ) -> scheduler.CfnSchedule.TargetProperty:
         return scheduler.CfnSchedule.TargetProperty(
             arn=orchestration.state_machine.state_machine_arn,
             role_arn=target_execution_role.role_arn,
-            input=STATE_MACHINE_INPUT,
+            input=state_machine_input,
         )
 
     def _create_scheduler_iam_execution_role(self, orchestration: Orchestration) -> iam.Role:
@@ -7,9 +7,11 @@ import aws_cdk as cdk
 import cdk_nag
 from constructs import Construct
 
+import cdk_constants as constants
 from service.dashboard import Dashboard
 from service.metric_extraction import MetricsExtraction
 from service.orchestration import Orchestration
+from service.resource_export import ResourceExport
 from service.scheduling import Scheduling
 
 
@@ -21,6 +23,9 @@ class ServiceStack(cdk.Stack):
         self.orchestration = Orchestration(self, "Orchestration", self.metric_extraction)
         Scheduling(self, "Schduling", self.orchestration)
 
+        if constants.RESOURCE_EXPORT_ENABLED:
+            ResourceExport(self, "ResourceExport", self.metric_extraction)
+
         Dashboard(self, "Dashboard")
 
         self._add_cdk_nag_suppressions()
@@ -34,6 +39,24 @@ class ServiceStack(cdk.Stack):
             stack=self, suppressions=[aws_managed_policies_suppression]
         )
 
+        server_access_logs_suppression = cdk_nag.NagPackSuppression(
+            id="AwsSolutions-S1",
+            reason="The scan data bucket is only accessed by the metric extraction",
+        )
+        cdk_nag.NagSuppressions.add_resource_suppressions(
+            self.metric_extraction.scan_data_bucket,
+            suppressions=[server_access_logs_suppression],
+        )
+        if self.metric_extraction.history_bucket is not None:
+            history_server_access_logs_suppression = cdk_nag.NagPackSuppression(
+                id="AwsSolutions-S1",
+                reason="The history bucket is only accessed by the metric extraction and the history queries",
+            )
+            cdk_nag.NagSuppressions.add_resource_suppressions(
+                self.metric_extraction.history_bucket,
+                suppressions=[history_server_access_logs_suppression],
+            )
+
         aws_wildcard_policy_suppression = cdk_nag.NagPackSuppression(
             id="AwsSolutions-IAM5",
             reason="Allow wildcard policies",